@@ -0,0 +1,146 @@
+# -*- mode: python ; coding: utf-8 -*-
+"""
+RT-VoiceChat-CLI 的 PyInstaller 构建配置
+
+由 scripts/build_exe.py 调用（spec 自身的参数都放在 "--" 之后）:
+    pyinstaller RT-VoiceChat-CLI.spec --noconfirm [-- [--onefile] [--with-model base]]
+
+默认构建 onedir 目录（启动时无需解压到临时目录）；--onefile 生成单文件 exe，
+但每次启动都要把全部依赖解压到 %TEMP%，冷启动明显更慢。
+"""
+import argparse
+import ast
+from pathlib import Path
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--onefile', action='store_true', help='单文件模式')
+parser.add_argument('--with-model', metavar='SIZE', help='同时打包 models/whisper-SIZE，避免首次运行下载模型')
+options = parser.parse_args()
+
+PROJECT_ROOT = Path(SPECPATH)
+APP_NAME = "RT-VoiceChat-CLI"
+ICON_FILE = None  # 如果有图标文件，设置路径
+
+# 依赖的数据文件
+DATA_FILES = [
+    (str(PROJECT_ROOT / "config" / "default_config.yaml"), 'config'),
+    (str(PROJECT_ROOT / ".env.example"), '.'),
+]
+
+if options.with_model:
+    model_dir = f"models/whisper-{options.with_model}"
+    DATA_FILES.append((str(PROJECT_ROOT / model_dir), model_dir))
+
+# 需要以隐藏导入方式声明的依赖（存在动态导入，静态分析可能漏掉）
+# 只有在 src/ 中确实被导入时才会加入，移除依赖后不会被重新带入
+DYNAMIC_IMPORT_NAMES = {
+    "yaml",
+    "dotenv",
+    "openai",
+    "edge_tts",
+    "faster_whisper",
+    "rich",
+    "click",
+}
+
+
+def _discover_hidden_imports(root: Path) -> list:
+    """扫描 root 下所有 .py 文件的 import 语句，返回实际用到的 DYNAMIC_IMPORT_NAMES"""
+    found = set()
+    for py_file in root.rglob("*.py"):
+        try:
+            tree = ast.parse(py_file.read_text(encoding="utf-8"))
+        except (SyntaxError, UnicodeDecodeError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names = [node.module]
+            else:
+                continue
+            found.update(name.split(".")[0] for name in names)
+    return sorted(found & DYNAMIC_IMPORT_NAMES)
+
+
+# 通过 importlib 按需加载的项目模块，静态分析无法发现
+LAZY_PROJECT_MODULES = [
+    "src.llm.openai_compatible",
+    "src.llm.deepseek_llm",
+    "src.llm.openai_llm",
+]
+
+HIDDEN_IMPORTS = _discover_hidden_imports(PROJECT_ROOT / "src") + LAZY_PROJECT_MODULES
+
+# 不使用 UPX 压缩：
+# - 体积收益很小：大头是 ctranslate2/numpy 的 MKL/OpenBLAS 等二进制，本身已难以再压缩；
+# - 拖慢启动：UPX 压缩的 DLL/.pyd 每次加载都要先在内存中解压，抵消了 onedir 模式的启动优势；
+# - 兼容性差：部分带控制流保护（CFG）的 DLL 和 vcruntime 压缩后无法加载，
+#   且 UPX 加壳的 exe 容易被杀毒软件误报
+USE_UPX = False
+
+# 运行时不需要、但会被依赖链自动带入的模块
+# （numpy/faster-whisper 的可选依赖、标准库测试与文档数据等）
+EXCLUDE_MODULES = [
+    'tkinter',
+    'unittest',
+    'distutils',
+    'test',
+    'pandas',
+    'PIL',
+    'scipy',
+    'sqlite3',
+    'numpy.tests',
+    'numpy.f2py',
+    'email.test',
+    'pydoc_data',
+]
+
+a = Analysis(
+    [str(PROJECT_ROOT / "src" / "main.py")],
+    pathex=[str(PROJECT_ROOT)],
+    binaries=[],
+    datas=[(src, dest) for src, dest in DATA_FILES if Path(src).exists()],
+    hiddenimports=HIDDEN_IMPORTS,
+    hookspath=[],
+    runtime_hooks=[],
+    excludes=EXCLUDE_MODULES,
+    noarchive=False,
+)
+
+pyz = PYZ(a.pure)
+
+exe_options = dict(
+    name=APP_NAME,
+    debug=False,
+    strip=False,
+    upx=USE_UPX,
+    console=True,
+    icon=ICON_FILE if ICON_FILE and Path(ICON_FILE).exists() else None,
+)
+
+if options.onefile:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        **exe_options,
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        **exe_options,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=USE_UPX,
+        name=APP_NAME,
+    )
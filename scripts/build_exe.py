@@ -7,29 +7,33 @@
     
     或在项目根目录：
     python scripts/build_exe.py
+
+    日常迭代不会传 --clean，PyInstaller 复用 build/ 中的分析缓存，增量构建只需数秒；
+    需要完全重新构建时使用 --force-clean。
 """
 import os
 import sys
 import shutil
+import subprocess
 from pathlib import Path
 
 # 获取项目根目录（从 scripts/ 回到项目根目录）
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 
-# PyInstaller配置
+# PyInstaller配置（Analysis/EXE 参数、数据文件、隐藏导入等见 spec 文件）
 APP_NAME = "RT-VoiceChat-CLI"
-MAIN_SCRIPT = str(PROJECT_ROOT / "src" / "main.py")
-ICON_FILE = None  # 如果有图标文件，设置路径
-
-# 依赖的数据文件（使用绝对路径）
-DATA_FILES = [
-    (str(PROJECT_ROOT / "config" / "default_config.yaml"), 'config'),
-    (str(PROJECT_ROOT / ".env.example"), '.'),
-]
+SPEC_FILE = PROJECT_ROOT / f"{APP_NAME}.spec"
 
 
-def build_exe():
-    """构建exe文件"""
+def build_exe(force_clean: bool = False, onefile: bool = False, with_model: str = None):
+    """
+    构建exe文件
+    
+    Args:
+        force_clean: 是否清理 PyInstaller 缓存后完全重新构建
+        onefile: 是否打包为单文件（默认 onedir，启动更快）
+        with_model: 随程序打包的 Whisper 模型大小（如 base），None 则不打包
+    """
     print(f"开始打包 {APP_NAME}...")
     print(f"项目根目录: {PROJECT_ROOT}")
     
@@ -50,53 +54,50 @@ def build_exe():
     # 构建命令
     cmd_parts = [
         "pyinstaller",
-        "--name", APP_NAME,
-        "--onefile",  # 单文件模式
-        "--console",  # 控制台应用
-        "--clean",    # 清理临时文件
-    ]
-    
-    # 添加图标
-    if ICON_FILE and Path(ICON_FILE).exists():
-        cmd_parts.extend(["--icon", ICON_FILE])
-    
-    # 添加数据文件
-    for src, dest in DATA_FILES:
-        if Path(src).exists():
-            cmd_parts.extend(["--add-data", f"{src};{dest}"])
-    
-    # 添加隐藏导入（解决一些动态导入问题）
-    hidden_imports = [
-        "yaml",
-        "dotenv",
-        "openai",
-        "edge_tts",
-        "faster_whisper",
-        "rich",
-        "click",
+        str(SPEC_FILE),
+        "--noconfirm",  # 覆盖输出目录时不询问
     ]
-    for module in hidden_imports:
-        cmd_parts.extend(["--hidden-import", module])
-    
-    # 主脚本
-    cmd_parts.append(MAIN_SCRIPT)
     
-    # 执行打包命令
-    cmd = " ".join(cmd_parts)
-    print(f"执行命令: {cmd}")
+    if force_clean:
+        cmd_parts.append("--clean")  # 清理缓存，完全重新分析
+    
+    # spec 文件自身的参数放在 "--" 之后
+    spec_args = []
+    if onefile:
+        spec_args.append("--onefile")
+    if with_model:
+        model_dir = PROJECT_ROOT / "models" / f"whisper-{with_model}"
+        if not model_dir.exists():
+            print(f"错误: 模型目录不存在: {model_dir}")
+            print("请先运行: python scripts/download_whisper_model.py")
+            os.chdir(original_dir)
+            sys.exit(1)
+        spec_args.extend(["--with-model", with_model])
+    if spec_args:
+        cmd_parts.append("--")
+        cmd_parts.extend(spec_args)
+    
+    # 执行打包命令（列表形式直接调用，不经过 shell，路径含空格也安全）
+    print(f"执行命令: {subprocess.list2cmdline(cmd_parts)}")
     print()
     
-    result = os.system(cmd)
+    result = subprocess.run(cmd_parts, check=False).returncode
     
     # 恢复原目录
     os.chdir(original_dir)
     
     if result == 0:
+        if onefile:
+            exe_path = f"dist/{APP_NAME}.exe"
+            copy_hint = f"将 {exe_path} 复制到任意目录"
+        else:
+            exe_path = f"dist/{APP_NAME}/{APP_NAME}.exe"
+            copy_hint = f"将整个 dist/{APP_NAME}/ 目录复制到任意位置"
         print(f"\n✅ 打包成功!")
-        print(f"可执行文件位置: {PROJECT_ROOT / 'dist' / f'{APP_NAME}.exe'}")
+        print(f"可执行文件位置: {PROJECT_ROOT / exe_path}")
         print(f"\n使用方法:")
-        print(f"  1. 将 dist/{APP_NAME}.exe 复制到任意目录")
-        print(f"  2. 在同一目录创建 .env 文件并配置API密钥")
+        print(f"  1. {copy_hint}")
+        print(f"  2. 在 {APP_NAME}.exe 所在目录创建 .env 文件并配置API密钥")
         print(f"  3. 双击运行 {APP_NAME}.exe")
     else:
         print(f"\n❌ 打包失败，错误码: {result}")
@@ -112,8 +113,8 @@ def clean_build():
     original_dir = Path.cwd()
     os.chdir(PROJECT_ROOT)
     
+    # spec 文件纳入版本管理，不再删除
     dirs_to_remove = ['build', 'dist', '__pycache__']
-    files_to_remove = [f'{APP_NAME}.spec']
     
     for dir_name in dirs_to_remove:
         dir_path = PROJECT_ROOT / dir_name
@@ -121,12 +122,6 @@ def clean_build():
             shutil.rmtree(dir_path)
             print(f"  已删除: {dir_path}")
     
-    for file_name in files_to_remove:
-        file_path = PROJECT_ROOT / file_name
-        if file_path.exists():
-            os.remove(file_path)
-            print(f"  已删除: {file_path}")
-    
     # 恢复原目录
     os.chdir(original_dir)
     print("清理完成")
@@ -137,10 +132,13 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="打包RT-VoiceChat-CLI为exe")
     parser.add_argument('--clean', action='store_true', help='清理构建文件')
+    parser.add_argument('--force-clean', action='store_true', help='清理 PyInstaller 缓存后完全重新构建')
+    parser.add_argument('--onefile', action='store_true', help='打包为单文件exe（默认 onedir 目录模式，启动更快）')
+    parser.add_argument('--with-model', metavar='SIZE', help='同时打包 models/whisper-SIZE 模型（如 base）')
     
     args = parser.parse_args()
     
     if args.clean:
         clean_build()
     else:
-        build_exe()
+        build_exe(force_clean=args.force_clean, onefile=args.onefile, with_model=args.with_model)
@@ -37,6 +37,16 @@ MODELS = {
     }
 }
 
+# faster-whisper (CTranslate2) 实际需要的文件，其余格式的权重不下载
+MODEL_FILE_PATTERNS = [
+    "model.bin",
+    "config.json",
+    "tokenizer.json",
+    "vocabulary.txt",
+    "preprocessor_config.json",
+    "*.safetensors",
+]
+
 
 def download_model(model_name: str, use_mirror: bool = False):
     """
@@ -85,7 +95,9 @@ def download_model(model_name: str, use_mirror: bool = False):
         snapshot_download(
             repo_id=model_info['repo_id'],
             local_dir=str(target_dir),
-            local_dir_use_symlinks=False
+            local_dir_use_symlinks=False,
+            max_workers=8,  # 并行下载多个文件
+            allow_patterns=MODEL_FILE_PATTERNS
         )
         
         console.print(f"\n[bold green]✓ 模型下载成功！[/bold green]")
@@ -22,7 +22,10 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/rt-voicechat-cli",
-    packages=find_packages(),
+    packages=find_packages(
+        include=['src', 'src.*'],
+        exclude=['tests*', 'scripts*', 'build*', 'dist*', '*.tests', '*.tests.*']
+    ),
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",
@@ -1,6 +1,7 @@
 """语音识别模块"""
 from .base_asr import BaseASR
 from .asr_manager import ASRManager
+from .realtime_asr import RealtimeASR
 
 # 可选导入具体实现
 try:
@@ -8,4 +9,4 @@ try:
 except ImportError:
     WhisperASR = None
 
-__all__ = ['BaseASR', 'ASRManager', 'WhisperASR']
+__all__ = ['BaseASR', 'ASRManager', 'RealtimeASR', 'WhisperASR']
@@ -1,5 +1,6 @@
 """ASR管理器"""
-from typing import Optional, Dict, Any
+import json
+from typing import Optional, Dict, Any, Tuple, Iterator
 from .base_asr import BaseASR
 from ..utils import get_logger
 
@@ -21,6 +22,9 @@ class ASRManager:
         self.current_engine_name: Optional[str] = None
         self.available_engines: Dict[str, type] = {}
         
+        # 已创建的引擎实例缓存，避免切换时重复加载模型
+        self._engine_cache: Dict[Tuple[str, str], BaseASR] = {}
+        
         # 注册可用的ASR引擎
         self._register_engines()
         
@@ -60,16 +64,31 @@ class ASRManager:
         # 获取引擎配置
         engine_config = self.config.get(engine_name, {})
         
+        # 命中缓存则直接复用
+        key = self._cache_key(engine_name, engine_config)
+        cached = self._engine_cache.get(key)
+        if cached is not None:
+            self.current_engine = cached
+            self.current_engine_name = engine_name
+            logger.info(f"已切换到 ASR 引擎: {engine_name}（缓存）")
+            return
+        
         # 创建引擎实例
         try:
             engine_class = self.available_engines[engine_name]
             self.current_engine = engine_class(**engine_config)
             self.current_engine_name = engine_name
+            self._engine_cache[key] = self.current_engine
             logger.info(f"已切换到 ASR 引擎: {engine_name}")
         except Exception as e:
             logger.error(f"切换 ASR 引擎失败: {e}")
             raise
     
+    @staticmethod
+    def _cache_key(engine_name: str, engine_config: Dict[str, Any]) -> Tuple[str, str]:
+        """生成引擎缓存键（配置值可能不可哈希，统一序列化为 JSON）"""
+        return engine_name, json.dumps(engine_config, sort_keys=True, default=str)
+    
     def transcribe(self, audio_data: bytes) -> Optional[str]:
         """
         转录音频
@@ -86,6 +105,30 @@ class ASRManager:
         
         return self.current_engine.transcribe(audio_data)
     
+    def warmup(self):
+        """预热当前引擎（可重复调用，已预热时立即返回）"""
+        if self.current_engine is None:
+            logger.error("没有可用的ASR引擎")
+            return
+        
+        self.current_engine.warmup()
+    
+    def transcribe_stream(self, audio_data: bytes) -> Iterator[str]:
+        """
+        流式转录音频
+        
+        Args:
+            audio_data: 音频数据
+        
+        Yields:
+            识别文本片段
+        """
+        if self.current_engine is None:
+            logger.error("没有可用的ASR引擎")
+            return
+        
+        yield from self.current_engine.transcribe_stream(audio_data)
+    
     def list_available_engines(self) -> list:
         """
         列出所有可用的ASR引擎
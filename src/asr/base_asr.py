@@ -1,6 +1,6 @@
 """ASR基类"""
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Optional, Iterator
 
 
 class BaseASR(ABC):
@@ -29,3 +29,26 @@ class BaseASR(ABC):
             识别文本
         """
         pass
+    
+    def transcribe_stream(self, audio_data: bytes) -> Iterator[str]:
+        """
+        流式转录音频（生成器，逐段返回识别文本）
+        
+        Args:
+            audio_data: 音频数据
+        
+        Yields:
+            识别文本片段
+        """
+        # 默认实现：将完整结果一次返回
+        text = self.transcribe(audio_data)
+        if text:
+            yield text
+    
+    def warmup(self):
+        """
+        预热引擎，把首次识别的初始化开销（模型懒加载、内核编译等）移到启动阶段
+        
+        默认不做任何事；可重复调用，已预热时应立即返回
+        """
+        pass
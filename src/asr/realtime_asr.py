@@ -0,0 +1,329 @@
+"""实时流式语音识别流水线"""
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+from .asr_manager import ASRManager
+from ..audio.vad_detector import VADDetector
+from ..utils import get_logger, rms_pcm16, PCMRing, SPSCRing
+from ..utils import audio_utils
+
+logger = get_logger("realtime_asr")
+
+# 最多保留的识别结果/延迟样本数（长时间运行时限制内存占用）
+MAX_RESULTS = 10000
+
+# 电平按 1/LEVEL_STEPS 量化，量化值变化时才通知界面重绘
+LEVEL_STEPS = 50
+
+
+class LatencyStats:
+    """识别延迟统计：记录每段语音的 (排队等待 ns, 识别耗时 ns)"""
+    
+    def __init__(self, max_samples: int = MAX_RESULTS):
+        """
+        Args:
+            max_samples: 最多保留的样本数，超出时丢弃最早的样本
+        """
+        self._samples: deque = deque(maxlen=max_samples)
+    
+    def add(self, wait_ns: int, elapsed_ns: int):
+        """记录一段语音的排队等待时间和识别耗时（纳秒）"""
+        self._samples.append((wait_ns, elapsed_ns))
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        统计延迟分布（毫秒）
+        
+        Returns:
+            {'排队': {...}, '识别': {...}}，每项包含 avg/p50/p90/p95/p99；样本不足 2 个时为空字典
+        """
+        if len(self._samples) < 2:
+            return {}
+        stats = {}
+        for name, values in zip(("排队", "识别"), zip(*self._samples)):
+            ms = [v / 1e6 for v in values]
+            q = statistics.quantiles(ms, n=100, method='inclusive')
+            stats[name] = {
+                'avg': statistics.fmean(ms),
+                'p50': q[49],
+                'p90': q[89],
+                'p95': q[94],
+                'p99': q[98],
+            }
+        return stats
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class RealtimeASR:
+    """
+    实时语音识别
+    
+    音频回调只把数据块放入接收队列；接收线程计算电平、运行 VAD，把完整语音段交给识别线程，
+    说话过程中定期把当前语音段的快照交给中间结果线程。显示内容有变化时置位 state_dirty。
+    """
+    
+    def __init__(
+        self,
+        asr_manager: ASRManager,
+        sample_rate: int = 16000,
+        vad_batch_size: int = 1,
+        interim_interval_frames: int = 10,
+        min_segment_ms: int = 200,
+        min_segment_rms: float = 0.005,
+        recent_seconds: float = 3.0
+    ):
+        """
+        初始化实时 ASR
+        
+        Args:
+            asr_manager: ASR 管理器
+            sample_rate: 采样率
+            vad_batch_size: 攒够多少个 VAD 帧再一起检测（越大调用越少，但延迟越高）
+            interim_interval_frames: 说话过程中每新增多少个 VAD 帧识别一次中间结果，0 为关闭
+            min_segment_ms: 短于该时长的语音段不送去识别
+            min_segment_rms: 整段 RMS 低于该值的语音段不送去识别
+            recent_seconds: recent_audio() 最多能取回的音频时长（秒）
+        """
+        self.asr_manager = asr_manager
+        self.sample_rate = sample_rate
+        self.vad_batch_size = vad_batch_size
+        
+        # 最近一段音频（预分配的 int16 环形缓冲区，只由接收线程写入）
+        self._audio_ring = PCMRing(int(sample_rate * recent_seconds))
+        self.is_running = False
+        
+        # VAD 检测器
+        self.vad = VADDetector(
+            sample_rate=sample_rate,
+            aggressiveness=2,  # 降低激进度，避免截断语音
+            frame_duration_ms=30,
+            silence_duration_ms=800,  # 较长的静音等待，避免句子被截断
+            padding_duration_ms=400,  # 较长的前后填充，保留完整语音
+            min_segment_ms=min_segment_ms,
+            min_segment_rms=min_segment_rms
+        )
+        self.skipped_segments = 0
+        # 音频块与 VAD 帧大小无关：先攒到 vad_batch_size 帧，再一次交给 VAD 按帧处理
+        self._vad_batch_bytes = self.vad.frame_size * 2 * vad_batch_size
+        self._vad_staging = bytearray()
+        
+        # 音频回调只把数据块放入接收队列（约 1 秒容量），电平计算和 VAD 在接收线程中进行
+        self._ingest_queue = SPSCRing(64)
+        self.ingest_thread: Optional[threading.Thread] = None
+        self.dropped_chunks = 0
+        
+        # 识别队列：只有接收线程写入、识别线程读取，元素为 (入队时间 ns, 语音数据)
+        self.recognition_queue = SPSCRing(8)
+        self.recognition_thread: Optional[threading.Thread] = None
+        
+        # 中间结果：接收线程把当前语音段的最新快照放入单槽位（引用赋值在 GIL 下是原子的），
+        # 中间识别线程只识别最新的一份；两个识别线程共用引擎，用锁保证同一时间只有一个在识别
+        self._interim_interval_bytes = self.vad.frame_size * 2 * interim_interval_frames
+        self._interim_audio = None
+        self._interim_ready = threading.Event()
+        self._interim_sent = 0
+        self._asr_lock = threading.Lock()
+        self.interim_thread: Optional[threading.Thread] = None
+        self.interim_text = ""
+        
+        # 结果存储：只保留最近 MAX_RESULTS 条，total_results 为累计条数
+        self.results: deque = deque(maxlen=MAX_RESULTS)
+        self.total_results = 0
+        self.latencies = LatencyStats()
+        self.current_audio_level = 0.0
+        self.level_bars = 0
+        self.is_speech_active = False
+        
+        # 显示内容有变化时置位，界面只在变化时重绘
+        self.state_dirty = threading.Event()
+    
+    def start(self):
+        """开始实时识别"""
+        # 预热电平计算内核，避免第一个音频块触发 JIT 编译、接收队列积压
+        audio_utils.warmup()
+        # 预热 ASR 引擎，第一段语音的识别不再包含模型初始化开销
+        self.asr_manager.warmup()
+        
+        self.is_running = True
+        
+        self.ingest_thread = threading.Thread(target=self._ingest_worker, daemon=True)
+        self.ingest_thread.start()
+        
+        self.recognition_thread = threading.Thread(target=self._recognition_worker, daemon=True)
+        self.recognition_thread.start()
+        
+        if self._interim_interval_bytes:
+            self.interim_thread = threading.Thread(target=self._interim_worker, daemon=True)
+            self.interim_thread.start()
+        
+        logger.info("实时 ASR 已启动")
+    
+    def stop(self):
+        """停止实时识别"""
+        self.is_running = False
+        
+        if self.ingest_thread:
+            self.ingest_thread.join(timeout=2.0)
+        if self.recognition_thread:
+            self.recognition_thread.join(timeout=2.0)
+        if self.interim_thread:
+            self._interim_ready.set()
+            self.interim_thread.join(timeout=2.0)
+        
+        logger.info("实时 ASR 已停止")
+    
+    def process_audio_chunk(self, audio_chunk: bytes):
+        """
+        处理音频块（在音频回调线程中调用，只做入队，尽快返回）
+        
+        Args:
+            audio_chunk: 音频数据块
+        """
+        if not self.is_running:
+            return
+        
+        # 不能阻塞音频回调：接收线程跟不上、队列满时丢弃该块
+        if not self._ingest_queue.push(audio_chunk, timeout=0):
+            self.dropped_chunks += 1
+    
+    def recent_audio(self, seconds: float = 3.0) -> np.ndarray:
+        """
+        获取最近的音频（按时间顺序的副本）
+        
+        Args:
+            seconds: 时长（秒），最多为构造时的 recent_seconds
+        
+        Returns:
+            int16 样本数组
+        """
+        return self._audio_ring.recent(int(seconds * self.sample_rate))
+    
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """统计识别延迟分布（毫秒），见 LatencyStats.summary()"""
+        return self.latencies.summary()
+    
+    def _on_result(self, result: Dict):
+        """得到一条最终识别结果后调用（在识别线程中），子类可覆盖以更新显示"""
+        pass
+    
+    def _ingest_worker(self):
+        """接收线程：计算电平、运行 VAD，把完整语音段交给识别线程"""
+        while self.is_running:
+            audio_chunk = self._ingest_queue.wait_pop(timeout=0.5)
+            if audio_chunk is not None:
+                try:
+                    self._analyze_chunk(audio_chunk)
+                except Exception as e:
+                    logger.error("音频处理错误: %s", e)
+    
+    def _analyze_chunk(self, audio_chunk: bytes):
+        """计算电平并进行 VAD 检测"""
+        # frombuffer 只是视图，不复制数据；电平计算和环形缓冲区共用
+        samples = np.frombuffer(audio_chunk, dtype=np.int16)
+        self._audio_ring.write(samples)
+        
+        # 计算音频电平（0.0 - 1.0）
+        level = rms_pcm16(samples)
+        self.current_audio_level = level
+        level_bars = int(level * LEVEL_STEPS)
+        if level_bars != self.level_bars:
+            self.level_bars = level_bars
+            self.state_dirty.set()
+        
+        # VAD 检测
+        staging = self._vad_staging
+        staging += audio_chunk
+        if len(staging) < self._vad_batch_bytes:
+            return
+        is_speech, utterances = self.vad.process_frames(staging)
+        staging.clear()
+        if is_speech != self.is_speech_active:
+            self.is_speech_active = is_speech
+            self.state_dirty.set()
+        
+        # 说话过程中定期提交当前语音段的快照，用于显示中间结果
+        if self._interim_interval_bytes:
+            utterance_bytes = self.vad.utterance_bytes
+            if utterance_bytes < self._interim_sent:
+                self._interim_sent = 0
+            if utterance_bytes - self._interim_sent >= self._interim_interval_bytes:
+                self._interim_sent = utterance_bytes
+                self._interim_audio = self.vad.partial_utterance()
+                self._interim_ready.set()
+        
+        for complete_audio in utterances:
+            # 过短或几乎无声的误触发不送去识别
+            if self.vad.is_negligible(complete_audio):
+                self.skipped_segments += 1
+                continue
+            logger.debug("检测到完整语音段落，加入识别队列")
+            # 不阻塞接收线程（否则接收队列会积压）：识别队列满时丢弃这段语音
+            if self.recognition_queue.push((time.perf_counter_ns(), complete_audio), timeout=0):
+                self.state_dirty.set()
+            else:
+                logger.warning("识别队列已满，丢弃一段语音")
+    
+    def _recognition_worker(self):
+        """识别线程：识别完整语音段"""
+        while self.is_running:
+            try:
+                # 有数据时立即唤醒，超时只用于检查是否停止
+                item = self.recognition_queue.wait_pop(timeout=0.5)
+                if item is None:
+                    continue
+                enqueued_ns, audio_data = item
+                self.state_dirty.set()
+                
+                logger.debug("开始识别...")
+                # 完整语音段之前的快照已经过时
+                self._interim_audio = None
+                with self._asr_lock:
+                    start_ns = time.perf_counter_ns()
+                    text = self.asr_manager.transcribe(audio_data)
+                    end_ns = time.perf_counter_ns()
+                self.interim_text = ""
+                self.state_dirty.set()
+                self.latencies.add(start_ns - enqueued_ns, end_ns - start_ns)
+                elapsed = (end_ns - start_ns) / 1e9
+                
+                if text and text.strip():
+                    result = {
+                        'text': text.strip(),
+                        'timestamp': time.strftime('%H:%M:%S'),
+                        'elapsed': elapsed
+                    }
+                    self.results.append(result)
+                    self.total_results += 1
+                    self._on_result(result)
+                    self.state_dirty.set()
+                    logger.info("识别结果: %s (耗时: %.2fs)", text, elapsed)
+                else:
+                    logger.debug("未识别到内容")
+            
+            except Exception as e:
+                logger.error("识别错误: %s", e)
+    
+    def _interim_worker(self):
+        """中间结果识别线程：识别说话过程中的语音段快照，结果只用于显示"""
+        while self.is_running:
+            if not self._interim_ready.wait(timeout=0.5):
+                continue
+            self._interim_ready.clear()
+            audio_data, self._interim_audio = self._interim_audio, None
+            # 有完整语音段等待识别时让路，最终结果优先
+            if audio_data is None or len(self.recognition_queue):
+                continue
+            try:
+                with self._asr_lock:
+                    text = self.asr_manager.transcribe(audio_data)
+                # 识别期间语音段已结束时丢弃，避免覆盖最终结果
+                if text and self.vad.triggered:
+                    self.interim_text = text.strip()
+                    self.state_dirty.set()
+            except Exception as e:
+                logger.error("中间结果识别错误: %s", e)
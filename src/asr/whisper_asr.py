@@ -1,8 +1,12 @@
 """Whisper ASR实现"""
+import os
+import sys
 import numpy as np
-from typing import Optional
+from pathlib import Path
+from typing import Optional, Iterator
 from .base_asr import BaseASR
 from ..utils import get_logger
+from ..utils.audio_utils import pcm16_to_float32, warmup as _warmup_kernels
 
 # 尝试导入 faster-whisper
 try:
@@ -15,6 +19,31 @@ except ImportError:
 logger = get_logger("whisper")
 
 
+def _resolve_compute_type(device: str, compute_type: str) -> str:
+    """
+    根据设备选择更合适的计算类型
+    
+    - CUDA 上 int8 自动升级为 int8_float16（INT8 权重 + FP16 激活，GPU 上约快 2 倍）
+    - CPU 不支持 int8 指令时回退到 float32
+    """
+    if compute_type != "int8":
+        return compute_type
+    
+    if device == "cuda":
+        return "int8_float16"
+    
+    try:
+        import ctranslate2
+        supported = ctranslate2.get_supported_compute_types(device)
+    except Exception:
+        return compute_type
+    
+    if "int8" not in supported:
+        logger.info("当前CPU不支持 int8 计算，回退到 float32")
+        return "float32"
+    return compute_type
+
+
 class WhisperASR(BaseASR):
     """Whisper语音识别"""
     
@@ -25,6 +54,9 @@ class WhisperASR(BaseASR):
         device: str = "cpu",
         compute_type: str = "int8",
         local_model_path: str = None,
+        beam_size: int = 1,
+        best_of: Optional[int] = None,
+        silence_threshold: int = 200,
         **kwargs
     ):
         """
@@ -34,8 +66,12 @@ class WhisperASR(BaseASR):
             model: 模型大小 (tiny, base, small, medium, large) 或本地路径
             language: 识别语言
             device: 设备 (cpu, cuda)
-            compute_type: 计算类型 (int8, float16, float32)
+            compute_type: 计算类型 (int8, int8_float16, float16, float32)，
+                int8 会按设备自动调整（CUDA 上使用 int8_float16）
             local_model_path: 本地模型路径（优先使用）
+            beam_size: 束搜索宽度，1 为贪心解码（实时场景延迟最低）
+            best_of: 采样候选数，仅在 temperature > 0 时生效
+            silence_threshold: 平均幅度低于该值（int16）的音频视为静音，直接跳过识别
         """
         super().__init__(language, **kwargs)
         
@@ -46,19 +82,44 @@ class WhisperASR(BaseASR):
         
         self.model_name = model
         self.device = device
-        self.compute_type = compute_type
+        self.compute_type = _resolve_compute_type(device, compute_type)
+        self.beam_size = beam_size
+        self.best_of = best_of
+        self.silence_threshold = silence_threshold
         
-        # 确定模型路径
-        import os
-        from pathlib import Path
+        # 解码参数每次调用都相同，初始化时构建一次
+        self._lang = None if language == "auto" else language
+        self._vad_params = {
+            "threshold": 0.5,
+            "min_speech_duration_ms": 250,
+            "min_silence_duration_ms": 500,
+        }
+        self._decode_kwargs = dict(
+            language=self._lang,
+            beam_size=beam_size,
+            temperature=0.0,  # 使用贪心解码，提高稳定性
+            condition_on_previous_text=True,  # 利用上下文
+            vad_filter=True,  # 启用VAD过滤
+            vad_parameters=self._vad_params,
+        )
+        # 采样候选数仅在 temperature > 0 时有意义，贪心解码下不传入
+        if best_of:
+            self._decode_kwargs["best_of"] = best_of
+        
+        # int16 -> float32 转换缓冲区（跨调用复用，避免每次分配）
+        self._float_buf: Optional[np.ndarray] = None
+        self._warmed_up = False
+        _warmup_kernels()
         
+        # 确定模型路径
         # 优先使用 local_model_path
         if local_model_path and os.path.exists(local_model_path):
             model_path = local_model_path
             logger.info(f"使用本地模型: {model_path}")
         else:
-            # 检查项目 models 目录
-            project_model_dir = Path(__file__).parent.parent.parent / "models" / f"whisper-{model}"
+            # 检查项目 models 目录（打包后为 PyInstaller 的解压根目录）
+            base_dir = getattr(sys, '_MEIPASS', str(Path(__file__).parent.parent.parent))
+            project_model_dir = Path(base_dir) / "models" / f"whisper-{model}"
             if project_model_dir.exists():
                 model_path = str(project_model_dir)
                 logger.info(f"使用项目本地模型: {model_path}")
@@ -75,7 +136,7 @@ class WhisperASR(BaseASR):
             self.model = WhisperModel(
                 model_path,
                 device=device,
-                compute_type=compute_type
+                compute_type=self.compute_type
             )
             logger.info("✓ Whisper模型加载完成")
         except Exception as e:
@@ -85,37 +146,80 @@ class WhisperASR(BaseASR):
                 logger.error("  1. 设置镜像: set HF_ENDPOINT=https://hf-mirror.com")
                 logger.error("  2. 手动下载模型: python scripts/download_whisper_model.py")
             raise
+        
+        self.warmup()
+    
+    def warmup(self):
+        """
+        用 1 秒静音预热解码器和 VAD 过滤器，把首次推理的初始化开销移到启动阶段
+        
+        解码器需要关闭 VAD 过滤才会真正运行；VAD 过滤器的模型在第一次
+        vad_filter=True 的调用时才加载，因此再按实际解码参数调用一次
+        """
+        if self._warmed_up:
+            return
+        silence = np.zeros(16000, dtype=np.float32)
+        try:
+            segments, _ = self.model.transcribe(
+                silence,
+                language=self._lang,
+                beam_size=1,
+                vad_filter=False
+            )
+            list(segments)  # segments 是惰性生成器，需要消费才会真正解码
+            segments, _ = self.model.transcribe(silence, **self._decode_kwargs)
+            list(segments)
+            self._warmed_up = True
+            logger.debug("Whisper解码器预热完成")
+        except Exception as e:
+            logger.warning(f"Whisper预热失败（不影响使用）: {e}")
     
     def transcribe(self, audio_data: bytes) -> Optional[str]:
         """转录音频"""
         try:
-            # 将bytes转换为numpy数组
-            # 假设音频是16bit PCM
-            audio_np = np.frombuffer(audio_data, dtype=np.int16)
-            audio_float = audio_np.astype(np.float32) / 32768.0
-            
-            # 转录
-            segments, info = self.model.transcribe(
-                audio_float,
-                language=self.language if self.language != "auto" else None,
-                beam_size=5,
-                best_of=5,  # 增加候选数量
-                temperature=0.0,  # 使用贪心解码，提高稳定性
-                condition_on_previous_text=True,  # 利用上下文
-                vad_filter=True,  # 启用VAD过滤
-                vad_parameters=dict(
-                    threshold=0.5,
-                    min_speech_duration_ms=250,
-                    min_silence_duration_ms=500
-                )
-            )
-            
-            # 合并所有段落
-            text = " ".join([segment.text for segment in segments])
-            
+            text = " ".join(self._iter_segments(audio_data))
             logger.debug(f"识别结果: {text}")
-            return text.strip()
-            
+            return text
         except Exception as e:
             logger.error(f"Whisper转录错误: {e}")
             return None
+    
+    def transcribe_stream(self, audio_data: bytes) -> Iterator[str]:
+        """
+        流式转录音频，每解码完一个段落立即返回
+        
+        Args:
+            audio_data: 音频数据
+        
+        Yields:
+            段落文本
+        """
+        try:
+            yield from self._iter_segments(audio_data)
+        except Exception as e:
+            logger.error(f"Whisper流式转录错误: {e}")
+    
+    def _iter_segments(self, audio_data: bytes) -> Iterator[str]:
+        """解码音频并逐段产出文本（异常向上抛出，由调用方处理）"""
+        # 将bytes转换为numpy数组
+        # 假设音频是16bit PCM
+        audio_np = np.frombuffer(audio_data, dtype=np.int16)
+        n = audio_np.size
+        
+        # 静音（或空音频）直接返回，跳过 VAD、特征提取和解码
+        if n == 0 or int(np.abs(audio_np, dtype=np.int32).mean()) < self.silence_threshold:
+            logger.debug("音频能量过低，跳过识别")
+            return
+        
+        if self._float_buf is None or self._float_buf.size < n:
+            self._float_buf = np.empty(n, dtype=np.float32)
+        audio_float = self._float_buf[:n]
+        pcm16_to_float32(audio_np, audio_float)
+        
+        # 转录（segments 是惰性生成器，边解码边产出）
+        segments, info = self.model.transcribe(audio_float, **self._decode_kwargs)
+        
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                yield text
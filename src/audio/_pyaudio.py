@@ -0,0 +1,17 @@
+"""pyaudio 的延迟导入（输入/输出处理器共用）"""
+import importlib.util
+
+# pyaudio 在第一次创建处理器时才导入（会加载 PortAudio 动态库），
+# 只用到音频模块其他内容或只检查是否可用时不产生这部分开销
+HAS_PYAUDIO = importlib.util.find_spec('pyaudio') is not None
+
+
+def load_pyaudio():
+    """
+    导入并返回 pyaudio 模块（重复调用直接返回已导入的模块）
+    
+    Raises:
+        ImportError: pyaudio 未安装
+    """
+    import pyaudio
+    return pyaudio
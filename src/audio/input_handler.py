@@ -1,18 +1,11 @@
 """音频输入处理器"""
-import queue
 import threading
+from collections import deque
 from typing import Optional, Callable
 import numpy as np
+from ._pyaudio import HAS_PYAUDIO, load_pyaudio
 from ..utils import get_logger
 
-# 尝试导入 pyaudio
-try:
-    import pyaudio
-    HAS_PYAUDIO = True
-except ImportError:
-    pyaudio = None
-    HAS_PYAUDIO = False
-
 logger = get_logger("audio_input")
 
 
@@ -42,6 +35,7 @@ class AudioInputHandler:
                 "pyaudio 未安装。请运行: pip install pyaudio\n"
                 "Windows 用户可能需要从 https://www.lfd.uci.edu/~gohlke/pythonlibs/ 下载预编译版本"
             )
+        pyaudio = load_pyaudio()
         
         self.sample_rate = sample_rate
         self.channels = channels
@@ -61,9 +55,13 @@ class AudioInputHandler:
         
         # 音频流
         self.stream: Optional[pyaudio.Stream] = None
+        # 音频回调的返回值，预先取出，回调中不再访问 pyaudio 模块
+        self._pa_continue = pyaudio.paContinue
         
-        # 音频队列
-        self.audio_queue = queue.Queue()
+        # 音频队列（单生产者单消费者，deque 的 append/popleft 本身线程安全，
+        # 用 Event 代替 Queue 的锁 + Condition 做阻塞等待）
+        self.audio_queue = deque(maxlen=256)
+        self._data_event = threading.Event()
         
         # 录音线程
         self.is_recording = False
@@ -72,6 +70,9 @@ class AudioInputHandler:
         # 回调函数
         self.callback: Optional[Callable] = None
         
+        # 电平计算的复用缓冲区（chunk_size 为字节数，int16 每样本 2 字节）
+        self._abs_scratch = np.empty(max(chunk_size // 2, 1), dtype=np.int16)
+        
         logger.info(
             f"音频输入处理器初始化: sample_rate={sample_rate}, "
             f"channels={channels}, chunk_size={chunk_size}"
@@ -94,7 +95,7 @@ class AudioInputHandler:
             # 打开音频流
             # frames_per_buffer 需要的是样本数，不是字节数
             # chunk_size 是字节数，需要除以 (样本宽度 * 声道数) 得到样本数
-            sample_width = 2 if self.format == pyaudio.paInt16 else (4 if self.format == pyaudio.paInt32 else 4)
+            sample_width = self.pa.get_sample_size(self.format)
             frames_per_buffer = self.chunk_size // (sample_width * self.channels)
             
             self.stream = self.pa.open(
@@ -107,8 +108,8 @@ class AudioInputHandler:
                 stream_callback=self._audio_callback if callback else None
             )
             
-            logger.debug(f"音频流已打开: frames_per_buffer={frames_per_buffer}样本, "
-                        f"chunk_size={self.chunk_size}字节, sample_width={sample_width}")
+            logger.debug("音频流已打开: frames_per_buffer=%d样本, chunk_size=%d字节, sample_width=%d",
+                         frames_per_buffer, self.chunk_size, sample_width)
             
             self.is_recording = True
             
@@ -151,15 +152,16 @@ class AudioInputHandler:
         expected_size = self.chunk_size
         actual_size = len(in_data)
         if actual_size != expected_size and not hasattr(self, '_size_warning_logged'):
-            logger.warning(f"音频回调数据大小不匹配: 期望={expected_size}字节, 实际={actual_size}字节, "
-                         f"frame_count={frame_count}")
+            logger.warning("音频回调数据大小不匹配: 期望=%d字节, 实际=%d字节, frame_count=%d",
+                           expected_size, actual_size, frame_count)
             self._size_warning_logged = True
         
         if self.callback:
             self.callback(in_data)
         else:
-            self.audio_queue.put(in_data)
-        return (None, pyaudio.paContinue)
+            self.audio_queue.append(in_data)
+            self._data_event.set()
+        return (None, self._pa_continue)
     
     def _record_loop(self):
         """录音循环（非回调模式）"""
@@ -167,9 +169,10 @@ class AudioInputHandler:
             try:
                 if self.stream:
                     data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-                    self.audio_queue.put(data)
+                    self.audio_queue.append(data)
+                    self._data_event.set()
             except Exception as e:
-                logger.error(f"录音循环错误: {e}")
+                logger.error("录音循环错误: %s", e)
                 break
     
     def read(self, timeout: float = None) -> Optional[bytes]:
@@ -183,8 +186,21 @@ class AudioInputHandler:
             音频数据
         """
         try:
-            return self.audio_queue.get(timeout=timeout)
-        except queue.Empty:
+            return self.audio_queue.popleft()
+        except IndexError:
+            pass
+        
+        # 先清除事件再复查一次，避免生产者在两步之间写入导致的唤醒丢失
+        self._data_event.clear()
+        try:
+            return self.audio_queue.popleft()
+        except IndexError:
+            pass
+        
+        self._data_event.wait(timeout)
+        try:
+            return self.audio_queue.popleft()
+        except IndexError:
             return None
     
     def get_audio_level(self, audio_data: bytes) -> float:
@@ -198,7 +214,14 @@ class AudioInputHandler:
             音频电平 (0.0 - 1.0)
         """
         audio_np = np.frombuffer(audio_data, dtype=np.int16)
-        return np.abs(audio_np).mean() / 32768.0
+        n = audio_np.size
+        if n == 0:
+            return 0.0
+        if self._abs_scratch.size < n:
+            self._abs_scratch = np.empty(n, dtype=np.int16)
+        scratch = self._abs_scratch[:n]
+        np.abs(audio_np, out=scratch)
+        return float(scratch.mean()) * 3.0517578125e-5  # 1 / 32768
     
     def list_devices(self) -> list:
         """
@@ -1,20 +1,50 @@
 """音频输出处理器"""
-import queue
 import threading
 from typing import Optional
-from ..utils import get_logger
-
-# 尝试导入 pyaudio
-try:
-    import pyaudio
-    HAS_PYAUDIO = True
-except ImportError:
-    pyaudio = None
-    HAS_PYAUDIO = False
+from ._pyaudio import HAS_PYAUDIO, load_pyaudio
+from ..utils import get_logger, SPSCRing
 
 logger = get_logger("audio_output")
 
 
+class BytesSlabPool:
+    """
+    固定大小 bytearray 缓冲块的复用池
+    
+    生产者 acquire 一块、消费者用完后 release 归还，避免每个 TTS 数据块都新分配
+    bytes；list 的 append/pop 在 GIL 下是原子的，跨线程使用无需加锁。
+    """
+    
+    def __init__(self, slab_size: int = 4096, max_slabs: int = 64):
+        """
+        Args:
+            slab_size: 每个缓冲块的字节数
+            max_slabs: 池中最多保留的空闲缓冲块数
+        """
+        self.slab_size = slab_size
+        self.max_slabs = max_slabs
+        self._free: list = []
+    
+    def acquire(self, size: int) -> Optional[bytearray]:
+        """
+        获取一个能容纳 size 字节的缓冲块
+        
+        Returns:
+            缓冲块；size 超过 slab_size 时返回 None，由调用方直接使用原数据
+        """
+        if size > self.slab_size:
+            return None
+        try:
+            return self._free.pop()
+        except IndexError:
+            return bytearray(self.slab_size)
+    
+    def release(self, slab: bytearray):
+        """归还缓冲块"""
+        if len(self._free) < self.max_slabs:
+            self._free.append(slab)
+
+
 class AudioOutputHandler:
     """音频输出处理器"""
     
@@ -39,6 +69,7 @@ class AudioOutputHandler:
                 "pyaudio 未安装。请运行: pip install pyaudio\n"
                 "Windows 用户可能需要从 https://www.lfd.uci.edu/~gohlke/pythonlibs/ 下载预编译版本"
             )
+        pyaudio = load_pyaudio()
         
         self.sample_rate = sample_rate
         self.channels = channels
@@ -57,13 +88,24 @@ class AudioOutputHandler:
         
         # 音频流
         self.stream: Optional[pyaudio.Stream] = None
+        # 音频回调的返回值，预先取出，回调中不再访问 pyaudio 模块
+        self._pa_continue = pyaudio.paContinue
         
-        # 播放队列
-        self.play_queue = queue.Queue()
+        # 回调每次取 20ms 的音频；TTS 的小数据块在回调里自然合并
+        self._frame_bytes = channels * pyaudio.get_sample_size(self.format)
+        self._frames_per_buffer = int(sample_rate * 0.02)
+        self._pending = bytearray()
+        self._discard_pending = False
+        
+        # 播放队列（只有 play() 写入、音频回调读取）
+        # 队列元素为指向缓冲池中 slab 的 memoryview，超出 slab 大小的数据块直接入队
+        self.play_queue = SPSCRing(64)
+        self._slab_pool = BytesSlabPool()
+        
+        # 队列中的数据全部交给声卡后置位，供 play_sync 等待
+        self._drained = threading.Event()
         
-        # 播放线程
         self.is_playing = False
-        self.play_thread: Optional[threading.Thread] = None
         
         logger.info(
             f"音频输出处理器初始化: sample_rate={sample_rate}, "
@@ -77,22 +119,20 @@ class AudioOutputHandler:
             return
         
         try:
-            # 打开音频流
+            # 打开音频流（回调模式：由 PortAudio 的音频线程按需拉取数据，
+            # 不再需要 Python 播放线程循环调用 stream.write）
             self.stream = self.pa.open(
                 format=self.format,
                 channels=self.channels,
                 rate=self.sample_rate,
                 output=True,
-                output_device_index=self.device_index
+                output_device_index=self.device_index,
+                frames_per_buffer=self._frames_per_buffer,
+                stream_callback=self._audio_callback
             )
             
             self.is_playing = True
             
-            # 启动播放线程
-            self.play_thread = threading.Thread(target=self._play_loop)
-            self.play_thread.daemon = True
-            self.play_thread.start()
-            
             logger.info("音频播放已开始")
             
         except Exception as e:
@@ -106,21 +146,15 @@ class AudioOutputHandler:
         
         self.is_playing = False
         
-        # 清空队列
-        while not self.play_queue.empty():
-            try:
-                self.play_queue.get_nowait()
-            except queue.Empty:
-                break
-        
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
             self.stream = None
         
-        if self.play_thread:
-            self.play_thread.join(timeout=1.0)
-            self.play_thread = None
+        # 清空队列（音频流已关闭，回调不会再读取，可以直接释放队列和回调的缓冲区）
+        self.play_queue.reset()
+        self._pending.clear()
+        self._drained.set()
         
         logger.info("音频播放已停止")
     
@@ -135,7 +169,7 @@ class AudioOutputHandler:
             logger.warning("播放器未启动")
             return
         
-        self.play_queue.put(audio_data)
+        self._enqueue(audio_data)
     
     def play_sync(self, audio_data: bytes):
         """
@@ -144,40 +178,87 @@ class AudioOutputHandler:
         Args:
             audio_data: 音频数据
         """
-        if not self.stream:
+        if not self.is_playing:
             self.start()
         
         try:
-            self.stream.write(audio_data)
+            self._enqueue(audio_data)
+            self._drained.clear()
+            # 最多等待音频时长再加 1 秒
+            duration = len(audio_data) / (self.sample_rate * self._frame_bytes)
+            self._drained.wait(timeout=duration + 1.0)
         except Exception as e:
-            logger.error(f"播放音频失败: {e}")
-    
-    def _play_loop(self):
-        """播放循环"""
-        while self.is_playing:
-            try:
-                # 从队列获取音频数据
-                audio_data = self.play_queue.get(timeout=0.1)
-                
-                if audio_data and self.stream:
-                    self.stream.write(audio_data)
-                    
-            except queue.Empty:
-                continue
-            except Exception as e:
-                logger.error(f"播放循环错误: {e}")
+            logger.error("播放音频失败: %s", e)
+    
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待播放队列中的数据全部交给声卡
+        
+        Args:
+            timeout: 最长等待时间（秒），None 为一直等待
+        
+        Returns:
+            是否在超时前播放完
+        """
+        # 队列为空时回调每个周期都会重新置位，这里先清除再等待不会错过
+        self._drained.clear()
+        return self._drained.wait(timeout)
+    
+    def _audio_callback(self, in_data, frame_count, time_info, status):
+        """PyAudio 输出流回调"""
+        need = frame_count * self._frame_bytes
+        buf = self._pending
+        if self._discard_pending:
+            self._discard_pending = False
+            buf.clear()
+        while len(buf) < need:
+            data = self.play_queue.pop()
+            if data is None:
+                break
+            buf += data
+            self._recycle(data)
+        
+        if len(buf) >= need:
+            out = bytes(buf[:need])
+            del buf[:need]
+        else:
+            # 数据不足，用静音补齐
+            out = bytes(buf) + bytes(need - len(buf))
+            buf.clear()
+        
+        if not buf and self.play_queue.empty():
+            self._drained.set()
+        return (out, self._pa_continue)
+    
+    def _enqueue(self, audio_data: bytes):
+        """把数据复制到缓冲池的 slab 中后入队"""
+        n = len(audio_data)
+        slab = self._slab_pool.acquire(n)
+        if slab is None:
+            self.play_queue.push(audio_data)
+            return
+        slab[:n] = audio_data
+        self.play_queue.push(memoryview(slab)[:n])
+    
+    def _recycle(self, data):
+        """数据块用完后，把其所属的 slab 归还缓冲池"""
+        if isinstance(data, memoryview):
+            slab = data.obj
+            data.release()
+            self._slab_pool.release(slab)
+    
+    def _drop_queued(self):
+        """丢弃队列中尚未播放的数据（被丢弃的 slab 不归还缓冲池，直接由 GC 回收）"""
+        self.play_queue.clear()
+        self._discard_pending = True
     
     def is_queue_empty(self) -> bool:
         """检查播放队列是否为空"""
-        return self.play_queue.empty()
+        return self.play_queue.empty() and not self._pending
     
     def clear_queue(self):
         """清空播放队列"""
-        while not self.play_queue.empty():
-            try:
-                self.play_queue.get_nowait()
-            except queue.Empty:
-                break
+        self._drop_queued()
         logger.debug("播放队列已清空")
     
     def list_devices(self) -> list:
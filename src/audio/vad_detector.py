@@ -1,7 +1,9 @@
 """语音活动检测(VAD)模块"""
+import math
 import numpy as np
-from typing import Optional
-from ..utils import get_logger, calculate_rms
+from collections import deque
+from typing import List, Optional, Tuple
+from ..utils import get_logger, calculate_rms, rms_pcm16
 
 # 尝试导入 webrtcvad，如果不可用则设为 None
 try:
@@ -14,6 +16,11 @@ except ImportError:
 logger = get_logger("vad")
 
 
+def _ignore_size_mismatch(actual_size: int):
+    """已记录过帧大小警告后使用的空操作"""
+    pass
+
+
 class VADDetector:
     """语音活动检测器"""
     
@@ -23,7 +30,9 @@ class VADDetector:
         aggressiveness: int = 3,
         frame_duration_ms: int = 30,
         padding_duration_ms: int = 300,
-        silence_duration_ms: int = 700
+        silence_duration_ms: int = 700,
+        min_segment_ms: int = 0,
+        min_segment_rms: float = 0.0
     ):
         """
         初始化VAD检测器
@@ -34,12 +43,16 @@ class VADDetector:
             frame_duration_ms: 帧长度(毫秒) (10, 20, 30)
             padding_duration_ms: 语音前后填充时长(毫秒)
             silence_duration_ms: 认定为静音的时长(毫秒)
+            min_segment_ms: 短于该时长的语音段视为误触发，0 为不限制
+            min_segment_rms: 整段 RMS（0.0 - 1.0）低于该值的语音段视为误触发，0 为不限制
         """
         self.sample_rate = sample_rate
         self.aggressiveness = aggressiveness
         self.frame_duration_ms = frame_duration_ms
         self.padding_duration_ms = padding_duration_ms
         self.silence_duration_ms = silence_duration_ms
+        self.min_segment_ms = min_segment_ms
+        self.min_segment_rms = min_segment_rms
         
         # 初始化 WebRTC VAD
         if not HAS_WEBRTCVAD:
@@ -51,17 +64,82 @@ class VADDetector:
         # 计算帧大小（样本数）
         self.frame_size = int(sample_rate * frame_duration_ms / 1000)
         
+        # 误触发过滤的字节数下限（int16 = 2 bytes）
+        self._min_segment_bytes = int(sample_rate * min_segment_ms / 1000) * 2
+        
+        # 每帧都要用到的不变量，预先计算/绑定
+        self._expected_size = self.frame_size * 2  # int16 = 2 bytes
+        self._is_speech_fn = self.vad.is_speech if self.vad is not None else None
+        # 帧大小不匹配的处理：第一次记录警告后换成空操作，之后不再检查是否已警告
+        self._on_size_mismatch = self._warn_size_mismatch
+        
         # 状态变量
         self.is_speech = False
         self.triggered = False
-        self.num_padding_frames = int(padding_duration_ms / frame_duration_ms)
+        # 窗口至少一帧：deque(maxlen=0) 不保存任何帧，语音帧计数却会一直增长
+        self.num_padding_frames = max(1, int(padding_duration_ms / frame_duration_ms))
         self.num_silence_frames = int(silence_duration_ms / frame_duration_ms)
-        self.ring_buffer = []
+        # 未触发时的滑动窗口 (frame, is_speech)，满后自动淘汰最旧的帧
+        self.ring_buffer = deque(maxlen=self.num_padding_frames)
+        # 窗口内语音帧数，随帧进出增减，避免每帧重新扫描窗口
+        self.voiced_count = 0
+        # 已触发后收集的语音数据（原地追加，结束时只拷贝一次）
+        self._utter_buf = bytearray()
         self.silence_counter = 0
+        # process_frames 中不足一帧、留到下次的数据
+        self._pending = bytearray()
         
         logger.info(f"VAD检测器已初始化: aggressiveness={aggressiveness}, "
                    f"frame_duration={frame_duration_ms}ms")
     
+    def _warn_size_mismatch(self, actual_size: int):
+        """记录帧大小不匹配警告（只在第一次不匹配时记录，避免日志过多）"""
+        logger.warning("VAD帧大小不匹配: 期望=%d字节, 实际=%d字节, frame_size=%d, sample_rate=%d",
+                       self._expected_size, actual_size, self.frame_size, self.sample_rate)
+        self._on_size_mismatch = _ignore_size_mismatch
+    
+    @property
+    def voiced_ratio(self) -> float:
+        """未触发时滑动窗口内语音帧的比例（超过 50% 即触发）"""
+        n = len(self.ring_buffer)
+        return self.voiced_count / n if n else 0.0
+    
+    def is_negligible(self, audio_data: bytes) -> bool:
+        """
+        判断一段完整语音是否为误触发（过短或整体能量过低），这样的语音段不必送去识别
+        
+        Args:
+            audio_data: process_frame/process_frames 返回的完整语音数据
+        
+        Returns:
+            是否可以丢弃
+        """
+        if len(audio_data) < self._min_segment_bytes:
+            logger.debug("语音段过短（%d 字节），跳过识别", len(audio_data))
+            return True
+        if self.min_segment_rms > 0:
+            rms = rms_pcm16(np.frombuffer(audio_data, dtype=np.int16))
+            if rms < self.min_segment_rms:
+                logger.debug("语音段能量过低（RMS=%.4f），跳过识别", rms)
+                return True
+        return False
+    
+    @property
+    def utterance_bytes(self) -> int:
+        """当前未结束语音段已累积的字节数（未触发时为 0）"""
+        return len(self._utter_buf)
+    
+    def partial_utterance(self) -> Optional[bytes]:
+        """
+        获取当前未结束语音段的副本（用于中间识别结果）
+        
+        Returns:
+            已累积的语音数据，未处于语音中时返回 None
+        """
+        if not self.triggered:
+            return None
+        return bytes(self._utter_buf)
+    
     def process_frame(self, frame: bytes) -> tuple[bool, Optional[bytes]]:
         """
         处理单帧音频
@@ -72,40 +150,49 @@ class VADDetector:
         Returns:
             (is_speech, audio_data): 是否检测到语音，以及完整语音数据（如果有）
         """
+        # 热路径：把属性访问换成局部变量
+        expected_size = self._expected_size
+        is_speech_fn = self._is_speech_fn
+        
         # 确保帧长度正确
-        expected_size = self.frame_size * 2  # int16 = 2 bytes
-        if len(frame) != expected_size:
-            # 只在第一次不匹配时记录警告，避免日志过多
-            if not hasattr(self, '_size_warning_logged'):
-                logger.warning(f"VAD帧大小不匹配: 期望={expected_size}字节, 实际={len(frame)}字节, "
-                           f"frame_size={self.frame_size}, sample_rate={self.sample_rate}")
-                self._size_warning_logged = True
+        frame_len = len(frame)
+        if frame_len != expected_size:
+            self._on_size_mismatch(frame_len)
             return self.is_speech, None
         
         # VAD检测
+        if is_speech_fn is None:
+            return self.is_speech, None
         try:
-            is_speech = self.vad.is_speech(frame, self.sample_rate)
+            is_speech = is_speech_fn(frame, self.sample_rate)
         except Exception as e:
-            logger.error(f"VAD检测错误: {e}")
+            logger.error("VAD检测错误: %s", e)
             return self.is_speech, None
         
         # 状态机逻辑
         if not self.triggered:
             # 未触发状态：等待语音开始
-            self.ring_buffer.append((frame, is_speech))
-            if len(self.ring_buffer) > self.num_padding_frames:
-                self.ring_buffer.pop(0)
+            ring_buffer = self.ring_buffer
+            if len(ring_buffer) == ring_buffer.maxlen:
+                # 最旧的帧即将被淘汰
+                self.voiced_count -= ring_buffer[0][1]
+            ring_buffer.append((frame, is_speech))
+            self.voiced_count += is_speech
             
             # 检查是否有足够的语音帧来触发
-            num_voiced = sum(1 for _, speech in self.ring_buffer if speech)
-            if num_voiced > 0.5 * len(self.ring_buffer):
+            if self.voiced_count > 0.5 * len(ring_buffer):
                 self.triggered = True
                 self.is_speech = True
                 self.silence_counter = 0
+                # 窗口内的帧作为语音开头保留
+                for f, _ in ring_buffer:
+                    self._utter_buf.extend(f)
+                ring_buffer.clear()
+                self.voiced_count = 0
                 logger.debug("检测到语音开始")
         else:
             # 已触发状态：等待语音结束
-            self.ring_buffer.append((frame, is_speech))
+            self._utter_buf.extend(frame)
             
             if is_speech:
                 self.silence_counter = 0
@@ -119,17 +206,49 @@ class VADDetector:
                 logger.debug("检测到语音结束")
                 
                 # 返回完整语音数据
-                audio_data = b''.join(f for f, _ in self.ring_buffer)
-                self.ring_buffer = []
+                audio_data = bytes(self._utter_buf)
+                self._utter_buf.clear()
                 return False, audio_data
         
         return self.is_speech, None
     
+    def process_frames(self, data: bytes) -> Tuple[bool, List[bytes]]:
+        """
+        处理任意长度的音频：按帧切分后依次处理，不足一帧的部分留到下次
+        
+        一次调用处理多帧，音频块大小与 VAD 帧大小不一致时也能使用
+        
+        Args:
+            data: 音频数据（bytes格式）
+        
+        Returns:
+            (is_speech, utterances): 最后一帧后的语音状态，以及本次结束的完整语音段
+        """
+        pending = self._pending
+        pending += data
+        frame_bytes = self._expected_size
+        end = len(pending) - len(pending) % frame_bytes
+        
+        is_speech = self.is_speech
+        utterances = []
+        if end:
+            process = self.process_frame
+            with memoryview(pending) as view:
+                for offset in range(0, end, frame_bytes):
+                    is_speech, audio_data = process(bytes(view[offset:offset + frame_bytes]))
+                    if audio_data is not None:
+                        utterances.append(audio_data)
+            del pending[:end]
+        return is_speech, utterances
+    
     def reset(self):
         """重置VAD状态"""
         self.is_speech = False
         self.triggered = False
-        self.ring_buffer = []
+        self.ring_buffer.clear()
+        self.voiced_count = 0
+        self._utter_buf.clear()
+        self._pending.clear()
         self.silence_counter = 0
         logger.debug("VAD状态已重置")
     
@@ -139,11 +258,20 @@ class VADDetector:
         简单的基于能量的VAD
         
         Args:
-            audio_data: 音频数据
+            audio_data: 音频数据（int16 会先归一化到 [-1, 1) 再与阈值比较）
             threshold: 能量阈值
         
         Returns:
             是否包含语音
         """
-        rms = calculate_rms(audio_data)
+        n = audio_data.size
+        if n == 0:
+            return False
+        
+        if audio_data.dtype == np.int16:
+            rms = rms_pcm16(audio_data)
+        elif audio_data.dtype == np.float32:
+            rms = math.sqrt(float(np.dot(audio_data, audio_data)) / n)
+        else:
+            rms = calculate_rms(audio_data)
         return rms > threshold
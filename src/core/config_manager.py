@@ -1,13 +1,27 @@
 """配置管理器"""
+import copy
 import os
 import yaml
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 from ..utils import get_logger
 
+# 优先使用 libyaml 的 C 实现，不可用时退回纯 Python 实现
+try:
+    from yaml import CSafeLoader as _Loader, CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeLoader as _Loader, SafeDumper as _Dumper
+
 logger = get_logger("config")
 
+# 环境变量 -> 配置键路径
+_ENV_MAPPINGS = (
+    ('DEEPSEEK_API_KEY', ('models', 'deepseek', 'api_key')),
+    ('OPENAI_API_KEY', ('models', 'openai', 'api_key')),
+    ('ZHIPU_API_KEY', ('models', 'zhipu', 'api_key')),
+)
+
 
 class ConfigManager:
     """配置管理器"""
@@ -29,21 +43,28 @@ class ConfigManager:
             config_path = project_root / "config" / "default_config.yaml"
         
         self.config_path = Path(config_path)
+        # 完整配置树（只读；修改请使用 set()，否则 get() 的索引不会同步更新）
         self.config: Dict[str, Any] = {}
         
+        # 叶子节点的键路径元组 -> 配置值，get() 读取单个配置项只需一次字典查找
+        self._flat: Dict[Tuple[str, ...], Any] = {}
+        
         # 加载配置
         self._load_config()
         
         # 使用环境变量覆盖API密钥
         self._override_from_env()
         
+        self._build_flat()
+        
         logger.info(f"配置已加载: {self.config_path}")
     
     def _load_config(self):
         """从文件加载配置"""
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
+                # 空文件或只有注释时 yaml.load 返回 None
+                self.config = yaml.load(f, Loader=_Loader) or {}
             logger.debug(f"配置文件加载成功: {self.config_path}")
         except FileNotFoundError:
             logger.error(f"配置文件不存在: {self.config_path}")
@@ -54,19 +75,13 @@ class ConfigManager:
     
     def _override_from_env(self):
         """使用环境变量覆盖配置"""
-        env_mappings = {
-            'DEEPSEEK_API_KEY': ['models', 'deepseek', 'api_key'],
-            'OPENAI_API_KEY': ['models', 'openai', 'api_key'],
-            'ZHIPU_API_KEY': ['models', 'zhipu', 'api_key'],
-        }
-        
-        for env_var, config_path in env_mappings.items():
+        for env_var, config_path in _ENV_MAPPINGS:
             value = os.getenv(env_var)
             if value:
                 self._set_nested_config(config_path, value)
                 logger.debug(f"从环境变量覆盖配置: {env_var}")
     
-    def _set_nested_config(self, path: list, value: Any):
+    def _set_nested_config(self, path: Tuple[str, ...], value: Any):
         """设置嵌套配置值"""
         current = self.config
         for key in path[:-1]:
@@ -75,10 +90,25 @@ class ConfigManager:
             current = current[key]
         current[path[-1]] = value
     
+    def _build_flat(self):
+        """展开配置树，记录每个叶子节点的键路径和值（中间层的字典不放入索引）"""
+        self._flat = dict(self._iter_paths(self.config, ()))
+    
+    @classmethod
+    def _iter_paths(cls, node: Any, prefix: Tuple[str, ...]) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        for key, value in node.items():
+            path = prefix + (key,)
+            if isinstance(value, dict):
+                yield from cls._iter_paths(value, path)
+            else:
+                yield path, value
+    
     def get(self, *keys, default=None) -> Any:
         """
         获取配置值
         
+        读取子树（字典）时返回副本，修改返回值不会影响配置本身，修改配置请使用 set()
+        
         Args:
             *keys: 配置键路径
             default: 默认值
@@ -89,13 +119,17 @@ class ConfigManager:
         Example:
             config.get('models', 'deepseek', 'api_key')
         """
-        current = self.config
+        try:
+            return self._flat[keys]
+        except KeyError:
+            pass
+        
+        node = self.config
         for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
+            if not isinstance(node, dict) or key not in node:
                 return default
-        return current
+            node = node[key]
+        return copy.deepcopy(node)
     
     def set(self, *keys, value: Any):
         """
@@ -118,6 +152,7 @@ class ConfigManager:
             current = current[key]
         
         current[keys[-1]] = value
+        self._build_flat()
         logger.debug(f"配置已更新: {'.'.join(keys)} = {value}")
     
     def save(self, path: Optional[str] = None):
@@ -131,7 +166,7 @@ class ConfigManager:
         
         try:
             with open(save_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config, f, allow_unicode=True, default_flow_style=False)
+                yaml.dump(self.config, f, Dumper=_Dumper, allow_unicode=True, default_flow_style=False)
             logger.info(f"配置已保存: {save_path}")
         except Exception as e:
             logger.error(f"保存配置失败: {e}")
@@ -1,13 +1,57 @@
 """对话管理器"""
+import itertools
 import json
+import os
+import queue
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
 from ..utils import get_logger
+from ..utils.token_counter import count_message_tokens
+
+# 尝试导入 orjson（更快的 JSON 序列化），不可用时使用标准库
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
 
 logger = get_logger("conversation")
 
 
+def _dumps(obj) -> str:
+    """序列化为单行 JSON（保留中文字符）"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _to_record(message: Dict) -> Dict:
+    """内存中的消息 -> 文件记录（ts 纳秒时间戳在写入时才格式化为 ISO 字符串）"""
+    record = {"role": message["role"], "content": message["content"]}
+    ts = message.get("ts")
+    if ts is not None:
+        record["timestamp"] = datetime.fromtimestamp(ts / 1e9).isoformat()
+    return record
+
+
+def _from_record(record: Dict) -> Dict:
+    """文件记录 -> 内存中的消息"""
+    message = {"role": record["role"], "content": record["content"]}
+    if "ts" in record:
+        message["ts"] = record["ts"]
+    elif "timestamp" in record:
+        try:
+            message["ts"] = int(datetime.fromisoformat(record["timestamp"]).timestamp() * 1e9)
+        except (TypeError, ValueError):
+            pass
+    return message
+
+
 class ConversationManager:
     """对话管理器，负责维护对话历史和上下文"""
     
@@ -16,35 +60,71 @@ class ConversationManager:
         system_prompt: str = "你是一个友好、专业的AI助手。请用简洁、口语化的方式回答问题。使用纯文本的形式回答问题",
         max_history: int = 10,
         save_history: bool = True,
-        history_file: str = "conversation_history.json"
+        history_file: str = "conversation_history.jsonl",
+        max_prompt_tokens: Optional[int] = None
     ):
         """
         初始化对话管理器
         
         Args:
             system_prompt: 系统提示词
-            max_history: 最大保留对话轮数
+            max_history: 最大保留对话轮数；为 0 时只保留当前一轮（请求中不带之前的对话），也不写历史文件
             save_history: 是否保存对话历史
-            history_file: 历史文件路径
+            history_file: 历史文件路径（JSON Lines 格式）
+            max_prompt_tokens: 发给 API 的消息总 token 上限，超出时从最早的对话开始省略；None 不限制
         """
         self.system_prompt = system_prompt
-        self.max_history = max_history
+        self.max_history = max(0, max_history)
+        self.max_prompt_tokens = max_prompt_tokens
+        
+        # 不保留历史时没有需要写入或恢复的内容
+        if self.max_history == 0 and save_history:
+            logger.info("max_history 为 0，不保存对话历史")
+            save_history = False
         self.save_history = save_history
         self.history_file = Path(history_file)
         
-        # 对话历史 [{"role": "user/assistant/system", "content": "..."}]
-        self.messages: List[Dict[str, str]] = []
+        # 历史文件为 JSON Lines 格式：首行记录系统提示词，之后每行一条消息
+        # 文件读写都在后台线程中进行，不阻塞对话流程
+        self._hf = None
+        self._lines_written = 0
+        self._history_synced = False
+        self._io_q: Optional[queue.SimpleQueue] = None
+        self._io_thread: Optional[threading.Thread] = None
+        self._io_system_prompt = system_prompt
+        self._io_messages: deque = deque(maxlen=self.max_history * 2)
+        
+        # 对话历史 [{"role": "user/assistant", "content": "..."}]，不含系统提示词
+        # 超过 max_history 轮时 deque 自动丢弃最早的消息；max_history 为 0 时仍要容纳当前一轮
+        # （deque(maxlen=0) 会把刚添加的用户消息也丢掉），由 _append_message 在新一轮开始时清空
+        history_len = max(self.max_history, 1) * 2  # 每轮对话2条消息
+        self._history: deque = deque(maxlen=history_len)
+        
+        # 发给 API 的消息：固定的系统提示词前缀 + 只追加的历史消息
+        # 已提交的消息不再改写，请求前缀保持稳定，可以命中服务端的提示词缓存
+        self._static_prefix: Tuple[Dict[str, str], ...] = self._make_prefix(system_prompt)
+        self._api_messages: deque = deque(maxlen=history_len)
+        
+        # 已提交的消息内容不会再变，token 数在追加时算一次，与 _api_messages 一一对应
+        self._token_counts: deque = deque(maxlen=history_len)
+        self._prefix_tokens = self._count_prefix_tokens()
+        
+        # 用户/助手消息计数，随增删消息同步更新
+        self._user_count = 0
+        self._assistant_count = 0
         
-        # 添加系统提示词
-        if system_prompt:
-            self.messages.append({
-                "role": "system",
-                "content": system_prompt
-            })
+        # 尝试加载历史对话（新文件还不存在时，读取旧版同名 .json 文件）
+        if save_history:
+            history_path = self.history_file
+            if not history_path.exists() and history_path.suffix == '.jsonl':
+                history_path = history_path.with_suffix('.json')
+            if history_path.exists():
+                self._load_history(history_path)
         
-        # 尝试加载历史对话
-        if save_history and self.history_file.exists():
-            self._load_history()
+        if save_history:
+            self._io_q = queue.SimpleQueue()
+            self._io_thread = threading.Thread(target=self._io_loop, daemon=True)
+            self._io_thread.start()
         
         logger.info("对话管理器已初始化")
     
@@ -55,13 +135,16 @@ class ConversationManager:
         Args:
             content: 用户消息内容
         """
-        self.messages.append({
+        message = {
             "role": "user",
             "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        self._trim_history()
+            "ts": time.time_ns()
+        }
+        self._append_message(message)
         logger.debug(f"添加用户消息: {content[:50]}...")
+        
+        if self.save_history:
+            self._save_history(message)
     
     def add_assistant_message(self, content: str):
         """
@@ -70,17 +153,44 @@ class ConversationManager:
         Args:
             content: 助手回复内容
         """
-        self.messages.append({
+        message = {
             "role": "assistant",
             "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        self._trim_history()
+            "ts": time.time_ns()
+        }
+        self._append_message(message)
         logger.debug(f"添加助手回复: {content[:50]}...")
         
         # 自动保存
         if self.save_history:
-            self._save_history()
+            self._save_history(message)
+    
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        全部消息（系统提示词在最前，之后为对话历史）
+        
+        返回新建的列表，修改它不会影响对话状态；添加消息请使用 add_user_message()/add_assistant_message()
+        """
+        messages = list(self._static_prefix)
+        messages.extend(self._history)
+        return messages
+    
+    @staticmethod
+    def _make_prefix(system_prompt: Optional[str]) -> Tuple[Dict[str, str], ...]:
+        """构建系统提示词前缀"""
+        if not system_prompt:
+            return ()
+        return ({
+            "role": "system",
+            "content": system_prompt
+        },)
+    
+    def _count_prefix_tokens(self) -> int:
+        """系统提示词前缀的 token 数（只在设置了 token 上限时计算）"""
+        if not self.max_prompt_tokens:
+            return 0
+        return sum(count_message_tokens(m) for m in self._static_prefix)
     
     def get_messages(self) -> List[Dict[str, str]]:
         """
@@ -89,11 +199,34 @@ class ConversationManager:
         Returns:
             消息列表
         """
-        # 只返回 role 和 content 字段（去除 timestamp）
-        return [
-            {"role": msg["role"], "content": msg["content"]}
-            for msg in self.messages
-        ]
+        # 只包含 role 和 content 字段（去除 ts），消息字典在添加时已构建好
+        messages = list(self._static_prefix)
+        history = self._api_messages
+        if self.max_prompt_tokens:
+            start = self._budget_start()
+            if start:
+                history = list(history)[start:]
+        messages.extend(history)
+        return messages
+    
+    def _budget_start(self) -> int:
+        """在 token 预算内能保留的最早一条历史消息的下标（系统提示词始终保留）"""
+        budget = self.max_prompt_tokens - self._prefix_tokens
+        history = self._api_messages
+        token_counts = self._token_counts
+        
+        start = len(history)
+        for i in range(len(history) - 1, -1, -1):
+            budget -= token_counts[i]
+            if budget < 0:
+                break
+            start = i
+        
+        # 至少保留最新一条消息；从用户消息开始，保持问答成对
+        start = min(start, len(history) - 1)
+        while 0 < start < len(history) - 1 and history[start]["role"] != "user":
+            start += 1
+        return max(start, 0)
     
     def get_last_n_messages(self, n: int) -> List[Dict[str, str]]:
         """
@@ -114,68 +247,185 @@ class ConversationManager:
         Args:
             keep_system_prompt: 是否保留系统提示词
         """
-        if keep_system_prompt and self.messages and self.messages[0]["role"] == "system":
-            self.messages = [self.messages[0]]
-        else:
-            self.messages = []
+        if not keep_system_prompt:
+            self._static_prefix = ()
+            self._prefix_tokens = 0
+        self._history.clear()
+        self._api_messages.clear()
+        self._token_counts.clear()
+        self._user_count = 0
+        self._assistant_count = 0
         
         logger.info("对话历史已清空")
         
         if self.save_history:
             self._save_history()
     
-    def _trim_history(self):
-        """修剪对话历史，保持在最大长度内"""
-        # 保留系统提示词
-        system_msg = None
-        if self.messages and self.messages[0]["role"] == "system":
-            system_msg = self.messages[0]
-            messages = self.messages[1:]
-        else:
-            messages = self.messages
+    def _append_message(self, message: Dict[str, str]):
+        """追加一条消息并更新计数（deque 已满时最早的消息被自动丢弃）"""
+        messages = self._history
+        if not self.max_history and message["role"] == "user":
+            # 不保留历史：新一轮开始时丢弃上一轮
+            messages.clear()
+            self._api_messages.clear()
+            self._token_counts.clear()
+            self._user_count = 0
+            self._assistant_count = 0
+        elif len(messages) == messages.maxlen:
+            evicted = messages[0]["role"]
+            if evicted == "user":
+                self._user_count -= 1
+            elif evicted == "assistant":
+                self._assistant_count -= 1
+        messages.append(message)
+        api_message = {"role": message["role"], "content": message["content"]}
+        self._api_messages.append(api_message)
+        if self.max_prompt_tokens:
+            self._token_counts.append(count_message_tokens(api_message))
         
-        # 如果超过最大历史，删除最早的对话
-        if len(messages) > self.max_history * 2:  # 每轮对话2条消息
-            messages = messages[-(self.max_history * 2):]
+        if message["role"] == "user":
+            self._user_count += 1
+        else:
+            self._assistant_count += 1
+    
+    def _save_history(self, message: Optional[Dict[str, str]] = None):
+        """
+        保存对话历史到文件（交给后台线程写入）
         
-        # 重新组合
-        if system_msg:
-            self.messages = [system_msg] + messages
+        Args:
+            message: 新增的消息，只追加这一行；None 则重写整个文件
+        """
+        # 每次启动后第一次写入时重写一次，同时兼容旧的整体 JSON 格式
+        if message is None or not self._history_synced:
+            snapshot = list(self._history)
+            self._io_q.put(("rewrite", (self.system_prompt, snapshot)))
+            self._history_synced = True
         else:
-            self.messages = messages
+            self._io_q.put(("append", message))
     
-    def _save_history(self):
-        """保存对话历史到文件"""
-        try:
-            # 创建目录
-            self.history_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # 保存
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "system_prompt": self.system_prompt,
-                    "messages": self.messages,
-                    "saved_at": datetime.now().isoformat()
-                }, f, ensure_ascii=False, indent=2)
+    def _io_loop(self):
+        """后台写入线程"""
+        while True:
+            op, payload = self._io_q.get()
+            if op == "stop":
+                break
+            if op == "flush":
+                payload.set()
+                continue
             
-            logger.debug(f"对话历史已保存: {self.history_file}")
-        except Exception as e:
-            logger.error(f"保存对话历史失败: {e}")
+            try:
+                if op == "append":
+                    self._append_history(payload)
+                else:
+                    self._rewrite_history(*payload)
+                logger.debug(f"对话历史已保存: {self.history_file}")
+            except Exception as e:
+                logger.error(f"保存对话历史失败: {e}")
+        
+        self._close_file()
+    
+    def _append_history(self, message: Dict[str, str]):
+        """向历史文件追加一条消息"""
+        if self._hf is None:
+            # 之前的重写失败（如暂时的磁盘错误），文件没有打开：带上这条消息重写整个文件
+            self._rewrite_history(self._io_system_prompt, list(self._io_messages) + [message])
+            return
+        self._hf.write(_dumps(_to_record(message)) + "\n")
+        os.fsync(self._hf.fileno())
+        self._io_messages.append(message)
+        self._lines_written += 1
+        
+        # 内存中的历史已被修剪，文件过长时压缩一次
+        if self._lines_written > self.max_history * 8:
+            self._rewrite_history(self._io_system_prompt, list(self._io_messages))
+    
+    def _rewrite_history(self, system_prompt: str, messages: List[Dict[str, str]]):
+        """将对话完整写入历史文件（写临时文件后原子替换），之后以追加模式打开"""
+        self._close_file()
+        self._io_system_prompt = system_prompt
+        self._io_messages = deque(messages, maxlen=self.max_history * 2)
+        
+        # 创建目录
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        lines = [_dumps({"system_prompt": system_prompt})]
+        lines.extend(_dumps(_to_record(msg)) for msg in messages)
+        
+        tmp_file = self.history_file.with_name(self.history_file.name + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.history_file)
+        
+        self._hf = open(self.history_file, 'a', encoding='utf-8', buffering=1)
+        self._lines_written = len(lines)
     
-    def _load_history(self):
+    def _close_file(self):
+        if self._hf is not None:
+            self._hf.close()
+            self._hf = None
+    
+    def _load_history(self, path: Path):
         """从文件加载对话历史"""
         try:
-            with open(self.history_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(path, 'r', encoding='utf-8') as f:
+                # 恢复对话历史（系统提示词以当前配置为准），deque 只保留最近的消息
+                self._history.extend(
+                    msg for msg in self._read_history(f) if msg.get("role") != "system"
+                )
             
-            # 恢复对话历史
-            if "messages" in data:
-                self.messages = data["messages"]
-                logger.info(f"已加载对话历史: {len(self.messages)} 条消息")
+            history = self._history
+            if history:
+                self._api_messages.extend(
+                    {"role": msg["role"], "content": msg["content"]} for msg in history
+                )
+                if self.max_prompt_tokens:
+                    self._token_counts.extend(count_message_tokens(m) for m in self._api_messages)
+                self._user_count = sum(1 for msg in history if msg["role"] == "user")
+                self._assistant_count = sum(1 for msg in history if msg["role"] == "assistant")
+                logger.info(f"已加载对话历史: {len(history)} 条消息")
             
         except Exception as e:
             logger.warning(f"加载对话历史失败: {e}")
     
+    @staticmethod
+    def _read_history(f) -> Iterator[Dict[str, str]]:
+        """逐行读取历史文件，支持 JSON Lines 和旧的整体 JSON 格式"""
+        first = f.readline()
+        if first.strip() == "{":
+            # 旧格式：indent=2 的整体 JSON
+            data = json.loads(first + f.read())
+            for record in data.get("messages", []):
+                yield _from_record(record)
+            return
+        
+        for line in itertools.chain((first,), f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 跳过异常退出时写了一半的行
+                continue
+            if "role" in record:
+                yield _from_record(record)
+    
+    def flush(self):
+        """等待后台线程写完已提交的对话历史"""
+        if self._io_thread is not None and self._io_thread.is_alive():
+            done = threading.Event()
+            self._io_q.put(("flush", done))
+            done.wait()
+    
+    def close(self):
+        """写完剩余的对话历史并停止后台线程"""
+        if self._io_thread is not None:
+            self._io_q.put(("stop", None))
+            self._io_thread.join()
+            self._io_thread = None
+    
     def update_system_prompt(self, prompt: str):
         """
         更新系统提示词
@@ -186,13 +436,8 @@ class ConversationManager:
         self.system_prompt = prompt
         
         # 更新或添加系统消息
-        if self.messages and self.messages[0]["role"] == "system":
-            self.messages[0]["content"] = prompt
-        else:
-            self.messages.insert(0, {
-                "role": "system",
-                "content": prompt
-            })
+        self._static_prefix = self._make_prefix(prompt)
+        self._prefix_tokens = self._count_prefix_tokens()
         
         logger.info("系统提示词已更新")
     
@@ -203,12 +448,11 @@ class ConversationManager:
         Returns:
             对话摘要文本
         """
-        # 统计消息数量
-        user_count = sum(1 for msg in self.messages if msg["role"] == "user")
-        assistant_count = sum(1 for msg in self.messages if msg["role"] == "assistant")
+        user_count = self._user_count
+        assistant_count = self._assistant_count
         
         return f"对话轮数: {min(user_count, assistant_count)}, " \
                f"用户消息: {user_count}, 助手回复: {assistant_count}"
     
     def __repr__(self) -> str:
-        return f"ConversationManager(messages={len(self.messages)}, max_history={self.max_history})"
+        return f"ConversationManager(messages={len(self._static_prefix) + len(self._history)}, max_history={self.max_history})"
@@ -1,7 +1,21 @@
 """大语言模型模块"""
+import importlib
+
 from .base_llm import BaseLLM
-from .deepseek_llm import DeepSeekLLM
-from .openai_llm import OpenAILLM
 from .llm_manager import LLMManager
 
+# 具体实现按需导入（PEP 562），只使用一个后端时不加载其他后端的依赖
+_LAZY_CLASSES = {
+    'DeepSeekLLM': '.deepseek_llm',
+    'OpenAILLM': '.openai_llm',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_CLASSES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
 __all__ = ['BaseLLM', 'DeepSeekLLM', 'OpenAILLM', 'LLMManager']
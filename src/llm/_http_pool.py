@@ -0,0 +1,45 @@
+"""LLM 客户端共享的 HTTP 连接池"""
+import atexit
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+# 请求超时：读取 60 秒，建立连接 5 秒
+TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# base_url -> httpx.Client，同一服务的所有 LLM 实例共用一个连接池（保持 keep-alive）
+_clients: Dict[Optional[str], httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def get_client(base_url: Optional[str]) -> httpx.Client:
+    """
+    获取指定服务地址的共享 HTTP 客户端
+    
+    Args:
+        base_url: API 服务地址
+    
+    Returns:
+        httpx.Client 实例
+    """
+    with _lock:
+        client = _clients.get(base_url)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+                timeout=TIMEOUT,
+            )
+            _clients[base_url] = client
+        return client
+
+
+def close_all():
+    """关闭所有共享的 HTTP 客户端（进程退出时自动调用）"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+atexit.register(close_all)
@@ -1,6 +1,7 @@
 """LLM基类"""
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Generator, List, Dict
+from typing import AsyncGenerator, Generator, List, Dict
 
 
 class BaseLLM(ABC):
@@ -26,17 +27,53 @@ class BaseLLM(ABC):
         stream: bool = True
     ) -> Generator[str, None, None]:
         """
-        生成响应
+        生成响应（流式）
         
         Args:
             messages: 对话消息列表
-            stream: 是否流式输出
+            stream: 兼容参数，实现应始终以流式方式输出；需要完整文本时使用 collect()
         
         Yields:
             响应文本片段
         """
         pass
     
+    def collect(self, messages: List[Dict[str, str]]) -> str:
+        """
+        生成完整响应文本
+        
+        Args:
+            messages: 对话消息列表
+        
+        Returns:
+            拼接后的完整响应
+        """
+        return "".join(self.generate(messages))
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]]
+    ) -> AsyncGenerator[str, None]:
+        """
+        异步流式生成响应
+        
+        默认实现在线程池中逐个取同步 generate() 的输出，子类可以用原生异步客户端覆盖
+        
+        Args:
+            messages: 对话消息列表
+        
+        Yields:
+            响应文本片段
+        """
+        loop = asyncio.get_running_loop()
+        tokens = iter(self.generate(messages, stream=True))
+        done = object()
+        while True:
+            token = await loop.run_in_executor(None, next, tokens, done)
+            if token is done:
+                break
+            yield token
+    
     @abstractmethod
     def check_connection(self) -> bool:
         """
@@ -46,3 +83,9 @@ class BaseLLM(ABC):
             是否连接成功
         """
         pass
+    
+    def close(self):
+        """关闭底层 HTTP 客户端，释放连接池"""
+        client = getattr(self, 'client', None)
+        if client is not None and hasattr(client, 'close'):
+            client.close()
@@ -1,35 +1,46 @@
 """LLM管理器"""
-from typing import Optional, Dict, Any
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Optional, Dict, Any, Iterable, List
 from .base_llm import BaseLLM
-from .deepseek_llm import DeepSeekLLM
-from .openai_llm import OpenAILLM
+from .response_cache import MAX_CACHEABLE_TEMPERATURE
 from ..utils import get_logger
 
 logger = get_logger("llm_manager")
 
+# 各 LLM 实现出错时输出的文本前缀（以 token 形式返回，而不是抛出异常）
+_ERROR_PREFIX = "[错误:"
+
 
 class LLMManager:
     """LLM管理器，负责创建和切换不同的LLM"""
     
-    # 支持的LLM类型
+    # 支持的LLM类型：模型名 -> (模块, 类名)，创建时才导入对应模块
     LLM_CLASSES = {
-        'deepseek': DeepSeekLLM,
-        'openai': OpenAILLM,
-        'zhipu': OpenAILLM,  # 使用OpenAI兼容接口
-        'kimi': OpenAILLM,   # 使用OpenAI兼容接口
-        'ollama': OpenAILLM  # 使用OpenAI兼容接口
+        'deepseek': ('.deepseek_llm', 'DeepSeekLLM'),
+        'openai': ('.openai_llm', 'OpenAILLM'),
+        'zhipu': ('.openai_llm', 'OpenAILLM'),  # 使用OpenAI兼容接口
+        'kimi': ('.openai_llm', 'OpenAILLM'),   # 使用OpenAI兼容接口
+        'ollama': ('.openai_llm', 'OpenAILLM')  # 使用OpenAI兼容接口
     }
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], race_models: Optional[List[str]] = None):
         """
         初始化LLM管理器
         
         Args:
             config: 配置字典
+            race_models: 与当前模型同时请求的备用模型，采用最先返回的结果；None 不启用
         """
         self.config = config
+        self.race_models = list(race_models or [])
         self.current_llm: Optional[BaseLLM] = None
         self.current_model_name: Optional[str] = None
+        self.last_race_winner: Optional[str] = None
+        
+        # 已创建的LLM实例，切换回来时复用其中已建立的连接
+        self._llms: Dict[str, BaseLLM] = {}
     
     def create_llm(self, model_name: str) -> BaseLLM:
         """
@@ -52,9 +63,11 @@ class LLMManager:
             raise ValueError(f"模型 {model_name} 缺少API Key")
         
         # 获取LLM类
-        llm_class = self.LLM_CLASSES.get(model_name)
-        if not llm_class:
+        entry = self.LLM_CLASSES.get(model_name)
+        if not entry:
             raise ValueError(f"不支持的模型类型: {model_name}")
+        module_name, class_name = entry
+        llm_class = getattr(importlib.import_module(module_name, __package__), class_name)
         
         # 创建实例
         try:
@@ -63,12 +76,13 @@ class LLMManager:
                 model=model_config.get('model', model_name),
                 base_url=model_config.get('base_url'),
                 temperature=model_config.get('temperature', 0.7),
-                max_tokens=model_config.get('max_tokens', 2000)
+                max_tokens=model_config.get('max_tokens', 2000),
+                cache_max_temperature=model_config.get('cache_max_temperature', MAX_CACHEABLE_TEMPERATURE)
             )
-            logger.info(f"已创建LLM: {model_name}")
+            logger.info("已创建LLM: %s", model_name)
             return llm
         except Exception as e:
-            logger.error(f"创建LLM失败: {e}")
+            logger.error("创建LLM失败: %s", e)
             raise
     
     def switch_model(self, model_name: str):
@@ -78,10 +92,18 @@ class LLMManager:
         Args:
             model_name: 模型名称
         """
-        logger.info(f"切换模型: {self.current_model_name} -> {model_name}")
-        self.current_llm = self.create_llm(model_name)
+        logger.info("切换模型: %s -> %s", self.current_model_name, model_name)
+        self.current_llm = self._get_llm(model_name)
         self.current_model_name = model_name
     
+    def _get_llm(self, model_name: str) -> BaseLLM:
+        """获取模型实例，没有创建过时创建并缓存"""
+        llm = self._llms.get(model_name)
+        if llm is None:
+            llm = self.create_llm(model_name)
+            self._llms[model_name] = llm
+        return llm
+    
     def get_current_llm(self) -> Optional[BaseLLM]:
         """获取当前LLM"""
         return self.current_llm
@@ -89,3 +111,123 @@ class LLMManager:
     def list_available_models(self) -> list:
         """列出可用的模型"""
         return list(self.config.keys())
+    
+    def check_connections(self, model_names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """
+        并行检查各模型的连接，检查用的实例会被缓存，之后切换时直接复用
+        
+        Args:
+            model_names: 要检查的模型，默认检查所有已配置的模型
+        
+        Returns:
+            模型名 -> 是否连接成功
+        """
+        names = list(self.config.keys() if model_names is None else model_names)
+        llms = {}
+        results: Dict[str, bool] = {}
+        for name in names:
+            try:
+                llms[name] = self._get_llm(name)
+            except Exception as e:
+                logger.warning("无法创建LLM (%s): %s", name, e)
+                results[name] = False
+        
+        if llms:
+            with ThreadPoolExecutor(max_workers=len(llms)) as executor:
+                ok = executor.map(lambda llm: llm.check_connection(), llms.values())
+                results.update(zip(llms.keys(), ok))
+        return {name: results[name] for name in names}
+    
+    def agenerate(self, messages: List[Dict[str, str]]) -> AsyncGenerator[str, None]:
+        """
+        用当前模型异步流式生成；配置了竞速模型时同时请求，采用最先返回的
+        
+        Args:
+            messages: 对话消息列表
+        
+        Returns:
+            响应文本片段的异步生成器
+        """
+        names = [self.current_model_name]
+        names.extend(m for m in self.race_models if m != self.current_model_name)
+        if len(names) > 1:
+            return self.agenerate_raced(messages, names)
+        return self.current_llm.agenerate(messages)
+    
+    async def agenerate_raced(
+        self,
+        messages: List[Dict[str, str]],
+        model_names: List[str]
+    ) -> AsyncGenerator[str, None]:
+        """
+        同时向多个模型发起流式请求，采用最先返回首个 token 的模型，其余请求取消
+        
+        Args:
+            messages: 对话消息列表
+            model_names: 参与竞速的模型
+        
+        Yields:
+            获胜模型的响应文本片段
+        """
+        streams = {}
+        for name in model_names:
+            try:
+                streams[name] = self._get_llm(name).agenerate(messages)
+            except Exception as e:
+                logger.warning("竞速模型不可用 (%s): %s", name, e)
+        
+        pending = {asyncio.ensure_future(stream.__anext__()): name for name, stream in streams.items()}
+        winner = None
+        first = None
+        fallback = None
+        try:
+            while pending and winner is None:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        token = task.result()
+                    except StopAsyncIteration:
+                        continue
+                    except Exception as e:
+                        logger.warning("竞速模型请求失败 (%s): %s", name, e)
+                        continue
+                    if token.startswith(_ERROR_PREFIX):
+                        # 出错的模型不参与竞速，全部出错时输出其中一条错误
+                        fallback = fallback or token
+                        continue
+                    if winner is None:
+                        winner, first = name, token
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for name, stream in streams.items():
+                if name != winner:
+                    await stream.aclose()
+        
+        if winner is None:
+            if fallback:
+                yield fallback
+            return
+        
+        self.last_race_winner = winner
+        logger.info("竞速结果: %s", winner)
+        stream = streams[winner]
+        try:
+            yield first
+            async for token in stream:
+                yield token
+        finally:
+            await stream.aclose()
+    
+    def close_all(self):
+        """关闭所有已创建的LLM实例"""
+        for name, llm in self._llms.items():
+            try:
+                llm.close()
+            except Exception as e:
+                logger.warning("关闭LLM失败 (%s): %s", name, e)
+        self._llms.clear()
+        self.current_llm = None
+        self.current_model_name = None
@@ -0,0 +1,184 @@
+"""OpenAI 兼容接口的 LLM 公共实现"""
+from typing import AsyncGenerator, Generator, List, Dict, Optional
+from openai import (
+    APIStatusError, AsyncOpenAI, AuthenticationError, OpenAI, PermissionDeniedError
+)
+from .base_llm import BaseLLM
+from . import _http_pool, response_cache
+from ..utils import get_logger
+
+
+class OpenAICompatibleLLM(BaseLLM):
+    """
+    使用 OpenAI 兼容接口（chat.completions）的大模型
+    
+    子类只需提供服务商名称和默认的模型、服务地址
+    """
+    
+    # 服务商名称（用于日志）和日志记录器名称，由子类覆盖
+    PROVIDER = "OpenAI"
+    LOGGER_NAME = "openai"
+    
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        cache_max_temperature: float = response_cache.MAX_CACHEABLE_TEMPERATURE,
+        **kwargs
+    ):
+        """
+        初始化 LLM
+        
+        Args:
+            api_key: API密钥
+            model: 模型名称
+            base_url: API 服务地址
+            temperature: 采样温度
+            max_tokens: 最大生成 token 数
+            cache_max_temperature: 温度不高于该值时才使用响应缓存（输出随机时缓存没有意义）
+        """
+        super().__init__(api_key, model, **kwargs)
+        
+        self.base_url = base_url
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.cache_max_temperature = cache_max_temperature
+        self.logger = get_logger(self.LOGGER_NAME)
+        
+        # 每次请求都相同的参数，预先构建好
+        self._base_params = {
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        
+        # 初始化客户端（HTTP 连接池按 base_url 共享，重建实例时无需重新握手）
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=_http_pool.get_client(base_url)
+        )
+        
+        # 异步客户端的连接绑定在事件循环上，首次调用 agenerate() 时再创建
+        self._async_client: Optional[AsyncOpenAI] = None
+        
+        self.logger.info("%s LLM已初始化: model=%s", self.PROVIDER, model)
+    
+    def generate(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = True
+    ) -> Generator[str, None, None]:
+        """生成响应（始终流式请求，stream 参数仅为兼容保留）"""
+        cache_key = self._cache_key(messages)
+        if cache_key is not None:
+            cached = response_cache.default_cache.get(cache_key)
+            if cached is not None:
+                yield from response_cache.iter_chunks(cached)
+                return
+        
+        try:
+            response = self.client.chat.completions.create(
+                **self._base_params,
+                messages=messages,
+                stream=True
+            )
+            
+            parts = []
+            append = parts.append
+            for chunk in response:
+                # 每个 token 只取一次属性；部分服务会发送 choices 为空的块（如用量统计）
+                choices = chunk.choices
+                if not choices:
+                    continue
+                content = choices[0].delta.content
+                if content:
+                    append(content)
+                    yield content
+            
+            if cache_key is not None and parts:
+                response_cache.default_cache.put(cache_key, "".join(parts))
+        
+        except Exception as e:
+            self.logger.error("%s生成错误: %s", self.PROVIDER, e)
+            yield f"[错误: {str(e)}]"
+    
+    async def agenerate(
+        self,
+        messages: List[Dict[str, str]]
+    ) -> AsyncGenerator[str, None]:
+        """异步流式生成响应"""
+        cache_key = self._cache_key(messages)
+        if cache_key is not None:
+            cached = response_cache.default_cache.get(cache_key)
+            if cached is not None:
+                for piece in response_cache.iter_chunks(cached):
+                    yield piece
+                return
+        
+        try:
+            if self._async_client is None:
+                self._async_client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    timeout=_http_pool.TIMEOUT
+                )
+            
+            response = await self._async_client.chat.completions.create(
+                **self._base_params,
+                messages=messages,
+                stream=True
+            )
+            
+            parts = []
+            append = parts.append
+            async for chunk in response:
+                choices = chunk.choices
+                if not choices:
+                    continue
+                content = choices[0].delta.content
+                if content:
+                    append(content)
+                    yield content
+            
+            if cache_key is not None and parts:
+                response_cache.default_cache.put(cache_key, "".join(parts))
+        
+        except Exception as e:
+            self.logger.error("%s生成错误: %s", self.PROVIDER, e)
+            yield f"[错误: {str(e)}]"
+    
+    def _cache_key(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """计算响应缓存键，温度高于 cache_max_temperature 时返回 None 表示不使用缓存"""
+        if self.temperature > self.cache_max_temperature:
+            return None
+        return response_cache.ResponseCache.make_key(
+            self.model, messages, self.temperature, self.max_tokens
+        )
+    
+    def check_connection(self) -> bool:
+        """检查连接（查询模型信息，不消耗 token）"""
+        try:
+            try:
+                self.client.models.retrieve(self.model)
+            except (AuthenticationError, PermissionDeniedError):
+                raise
+            except APIStatusError:
+                # 部分兼容服务/代理没有 models 接口或不支持按模型查询（返回 404/405/400 等），
+                # 退回最小的对话请求；密钥无效时上面直接判定失败，不再多发一次请求
+                self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": "Hi"}],
+                    max_tokens=1
+                )
+            return True
+        except Exception as e:
+            self.logger.error("%s连接检查失败: %s", self.PROVIDER, e)
+            return False
+    
+    def close(self):
+        """HTTP 连接池与其他实例共享，在进程退出时统一关闭，这里不关闭"""
+        pass
@@ -0,0 +1,79 @@
+"""LLM 响应缓存"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 温度高于此值时输出本身就是随机的，不使用缓存（各模型可用 cache_max_temperature 配置覆盖）
+MAX_CACHEABLE_TEMPERATURE = 0.3
+
+
+class ResponseCache:
+    """按请求内容精确匹配的 LRU 响应缓存（带过期时间）"""
+    
+    def __init__(self, max_size: int = 1000, ttl: float = 24 * 3600):
+        """
+        Args:
+            max_size: 最多缓存的响应数
+            ttl: 缓存有效期（秒）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """根据请求参数计算缓存键"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temp": temperature, "max": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """获取缓存的响应，不存在或已过期时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+    
+    def put(self, key: str, text: str):
+        """缓存一条响应"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def iter_chunks(text: str, size: int = 20) -> Iterator[str]:
+    """把缓存的完整响应切成小段，保持与流式输出相同的调用方式"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+# 所有 LLM 实例共用的缓存（缓存键包含模型名）
+default_cache = ResponseCache()
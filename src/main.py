@@ -1,22 +1,90 @@
 """RT-VoiceChat-CLI 主程序"""
+import asyncio
+import io
+import logging
+import queue
+import signal
 import sys
+import threading
+import time
 import click
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional
 from rich.console import Console
 from rich.panel import Panel
-from rich.live import Live
-from rich.text import Text
 
 from .core import ConfigManager, ConversationManager
-from .llm import LLMManager
-from .asr import ASRManager
-from .tts import TTSManager
 from .audio import AudioInputHandler, AudioOutputHandler, VADDetector
-from .utils import setup_logger, get_logger
+from .utils import setup_logger, get_logger, SentenceSplitter, mean_abs_pcm16
+
+# uvloop（libuv 实现的事件循环）不支持 Windows，其他平台可选使用
+try:
+    if sys.platform == 'win32':
+        raise ImportError
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    uvloop = None
+    HAS_UVLOOP = False
+
+# miniaudio 在进程内解码 MP3，不可用时退回 pydub（需要调用 ffmpeg 子进程）
+try:
+    import miniaudio
+    HAS_MINIAUDIO = True
+except ImportError:
+    miniaudio = None
+    HAS_MINIAUDIO = False
+
+if HAS_MINIAUDIO:
+    class _ChunkSource(miniaudio.StreamableSource):
+        """把流式合成的 MP3 数据块包装成 miniaudio 可以边读边解码的数据源"""
+        
+        def __init__(self, chunks: Iterator[bytes]):
+            self._chunks = iter(chunks)
+            self._buf = b""
+        
+        def read(self, num_bytes: int) -> bytes:
+            buf = self._buf
+            while len(buf) < num_bytes:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                buf += chunk
+            self._buf = buf[num_bytes:]
+            return buf[:num_bytes]
+
+# Edge TTS 固定输出 24kHz 单声道 MP3
+_EDGE_TTS_SAMPLE_RATE = 24000
+
+# pydub 导入时会探测 ffmpeg，第一次需要转换时才导入，之后复用
+_AudioSegment = None
+
+
+def _get_audio_segment():
+    """导入并缓存 pydub.AudioSegment（未安装时抛出 ImportError）"""
+    global _AudioSegment
+    if _AudioSegment is None:
+        from pydub import AudioSegment
+        _AudioSegment = AudioSegment
+    return _AudioSegment
+
 
 console = Console()
 
+# 语音模式下同时进行的 TTS 合成请求数（句子按顺序播放，合成可以提前进行）
+_TTS_WORKERS = 2
+
+# 语音模式主线程每隔多久检查一次音频状态（秒）
+_STATUS_INTERVAL = 5.0
+# Windows 上 Event.wait 不会被 Ctrl+C 打断，信号处理函数要等主线程醒来才执行，因此分段等待
+_WAIT_SLICE = 0.5 if sys.platform == 'win32' else _STATUS_INTERVAL
+
+# 流式输出时遇到这些字符（或攒够若干 token）才刷新到终端，减少 flush 次数
+_FLUSH_CHARS = frozenset("\n .,!?;:，。！？")
+_FLUSH_TOKENS = 8
+
 
 class VoiceChatCLI:
     """语音聊天CLI应用"""
@@ -31,7 +99,9 @@ class VoiceChatCLI:
         setup_logger(
             level=log_config.get('level', 'INFO'),
             log_file=log_config.get('file'),
-            console=log_config.get('console', True)
+            console=log_config.get('console', True),
+            json_format=log_config.get('format') == 'json',
+            async_write=log_config.get('async_write', False)
         )
         
         self.logger = get_logger("main")
@@ -43,27 +113,32 @@ class VoiceChatCLI:
     
     def _init_components(self):
         """初始化各个组件"""
+        # LLM/ASR/TTS 在这里才导入，--help 等不需要它们的路径不必加载这些依赖
+        from .llm import LLMManager
+        
         # 对话管理器
         conv_config = self.config_manager.get_conversation_config()
         self.conversation = ConversationManager(
             system_prompt=conv_config.get('system_prompt'),
             max_history=conv_config.get('max_history', 10),
             save_history=conv_config.get('save_history', True),
-            history_file=conv_config.get('history_file', 'conversation_history.json')
+            history_file=conv_config.get('history_file', 'conversation_history.jsonl'),
+            max_prompt_tokens=conv_config.get('context_window')
         )
         
         # LLM管理器
-        models_config = self.config_manager.get('models', default={})
+        models_config = dict(self.config_manager.get('models', default={}))
         active_model = models_config.pop('active', 'deepseek')
+        race_models = models_config.pop('race', None)
         
-        self.llm_manager = LLMManager(models_config)
+        self.llm_manager = LLMManager(models_config, race_models=race_models)
         
         # 切换到活动模型
         try:
             self.llm_manager.switch_model(active_model)
-            self.logger.info(f"已激活模型: {active_model}")
+            self.logger.info("已激活模型: %s", active_model)
         except Exception as e:
-            self.logger.error(f"激活模型失败: {e}")
+            self.logger.error("激活模型失败: %s", e)
             console.print(f"[red]错误: 无法激活模型 {active_model}[/red]")
             console.print("[yellow]请检查配置文件中的API Key是否正确[/yellow]")
             sys.exit(1)
@@ -71,19 +146,21 @@ class VoiceChatCLI:
         # ASR管理器（语音识别）
         asr_config = self.config_manager.get('asr', default={})
         try:
+            from .asr import ASRManager
             self.asr_manager = ASRManager(asr_config)
             self.logger.info("ASR管理器初始化成功")
         except Exception as e:
-            self.logger.warning(f"ASR管理器初始化失败: {e}")
+            self.logger.warning("ASR管理器初始化失败: %s", e)
             self.asr_manager = None
         
         # TTS管理器（语音合成）
         tts_config = self.config_manager.get('tts', default={})
         try:
+            from .tts import TTSManager
             self.tts_manager = TTSManager(tts_config)
             self.logger.info("TTS管理器初始化成功")
         except Exception as e:
-            self.logger.warning(f"TTS管理器初始化失败: {e}")
+            self.logger.warning("TTS管理器初始化失败: %s", e)
             self.tts_manager = None
         
         # 音频配置
@@ -110,6 +187,39 @@ class VoiceChatCLI:
         console.print("  - 输入 /model 切换模型")
         console.print()
         
+        loop, loop_thread = self._start_event_loop()
+        try:
+            self._text_loop(loop)
+        finally:
+            self._stop_event_loop(loop, loop_thread)
+    
+    @staticmethod
+    def _start_event_loop():
+        """
+        启动后台事件循环线程
+        
+        整个会话复用同一个事件循环，异步客户端的连接池可以跨轮次保持；
+        事件循环在后台线程中运行，网络读取与主线程的终端输出、语音合成互相重叠
+        """
+        loop = uvloop.new_event_loop() if HAS_UVLOOP else asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        return loop, loop_thread
+    
+    @staticmethod
+    def _stop_event_loop(loop: asyncio.AbstractEventLoop, loop_thread: threading.Thread):
+        """停止后台事件循环线程"""
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join(timeout=1.0)
+        if loop_thread.is_alive():
+            # 还有回调没有返回，循环仍在运行；此时 close() 会抛出 RuntimeError，
+            # 线程是守护线程，交给进程退出时回收
+            get_logger("main").warning("事件循环线程未能在 1 秒内停止，跳过关闭")
+            return
+        loop.close()
+    
+    def _text_loop(self, loop: asyncio.AbstractEventLoop):
+        """文本模式主循环"""
         while True:
             try:
                 # 获取用户输入
@@ -143,14 +253,10 @@ class VoiceChatCLI:
                 # 生成AI响应
                 console.print("[bold green]AI:[/bold green] ", end="")
                 
-                response_text = ""
                 try:
-                    llm = self.llm_manager.get_current_llm()
                     messages = self.conversation.get_messages()
                     
-                    for token in llm.generate(messages, stream=True):
-                        console.print(token, end="")
-                        response_text += token
+                    response_text = self._chat_turn(loop, messages)
                     
                     console.print()  # 换行
                     
@@ -160,7 +266,7 @@ class VoiceChatCLI:
                     
                 except Exception as e:
                     console.print(f"\n[red]生成响应时出错: {e}[/red]")
-                    self.logger.error(f"生成响应错误: {e}", exc_info=True)
+                    self.logger.error("生成响应错误: %s", e, exc_info=True)
                 
             except KeyboardInterrupt:
                 console.print("\n[yellow]检测到中断，退出程序[/yellow]")
@@ -172,7 +278,69 @@ class VoiceChatCLI:
                 break
             except Exception as e:
                 console.print(f"[red]发生错误: {e}[/red]")
-                self.logger.error(f"主循环错误: {e}", exc_info=True)
+                self.logger.error("主循环错误: %s", e, exc_info=True)
+    
+    def _chat_turn(self, loop: asyncio.AbstractEventLoop, messages: list) -> str:
+        """流式生成一轮回复并输出到终端，返回完整回复文本"""
+        # token 是纯文本，不经过 Rich 的 markup 解析，直接写 stdout，只在边界处 flush
+        stdout_write = sys.stdout.write
+        stdout_flush = sys.stdout.flush
+        response_text = ""
+        pending = 0
+        for token in self._stream_tokens(loop, messages):
+            stdout_write(token)
+            response_text += token
+            pending += 1
+            if pending >= _FLUSH_TOKENS or not _FLUSH_CHARS.isdisjoint(token):
+                stdout_flush()
+                pending = 0
+        stdout_flush()
+        return response_text
+    
+    def _stream_tokens(self, loop: asyncio.AbstractEventLoop, messages: list) -> Iterator[str]:
+        """在事件循环线程中流式生成回复，在调用线程中逐个取出 token"""
+        tokens: queue.SimpleQueue = queue.SimpleQueue()
+        future = asyncio.run_coroutine_threadsafe(
+            self._produce_tokens(self.llm_manager.agenerate(messages), tokens), loop
+        )
+        try:
+            while True:
+                token = tokens.get()
+                if token is None:
+                    break
+                yield token
+            # 生成过程中的异常在这里抛出
+            future.result()
+        finally:
+            if not future.done():
+                future.cancel()
+    
+    @staticmethod
+    async def _produce_tokens(stream, tokens: queue.SimpleQueue):
+        """在事件循环线程中读取流式响应，逐个放入队列，结束时放入 None"""
+        try:
+            async for token in stream:
+                tokens.put(token)
+        finally:
+            tokens.put(None)
+    
+    def check_llm_connections(self, model_names: Optional[List[str]] = None):
+        """
+        并行检查模型连接，失败时只给出提示（网络可能只是暂时不可用），不阻止继续使用
+        
+        Args:
+            model_names: 要检查的模型，默认为当前模型和竞速模型
+        """
+        llm_manager = self.llm_manager
+        if model_names is None:
+            model_names = [llm_manager.current_model_name]
+            model_names.extend(m for m in llm_manager.race_models if m not in model_names)
+        
+        with console.status("[cyan]检查模型连接...[/cyan]"):
+            results = llm_manager.check_connections(model_names)
+        for name, ok in results.items():
+            if not ok:
+                console.print(f"[yellow]警告: 模型 {name} 连接检查失败，请检查 API Key 和网络[/yellow]")
     
     def _switch_model_interactive(self):
         """交互式切换模型"""
@@ -200,6 +368,7 @@ class VoiceChatCLI:
             # 切换模型
             self.llm_manager.switch_model(model_name)
             console.print(f"[green]已切换到模型: {model_name}[/green]")
+            self.check_llm_connections([model_name])
             
         except Exception as e:
             console.print(f"[red]切换模型失败: {e}[/red]")
@@ -281,7 +450,9 @@ class VoiceChatCLI:
                         aggressiveness=self.vad_config.get('aggressiveness', 3),
                         frame_duration_ms=self.vad_config.get('frame_duration_ms', 30),
                         padding_duration_ms=self.vad_config.get('padding_duration_ms', 300),
-                        silence_duration_ms=self.vad_config.get('silence_duration_ms', 700)
+                        silence_duration_ms=self.vad_config.get('silence_duration_ms', 700),
+                        min_segment_ms=self.vad_config.get('min_segment_ms', 200),
+                        min_segment_rms=self.vad_config.get('min_segment_rms', 0.005)
                     )
                     if vad.vad is None:
                         console.print("[yellow]警告: webrtcvad未安装，VAD功能受限[/yellow]")
@@ -300,22 +471,42 @@ class VoiceChatCLI:
             # 启动音频输出
             audio_output.start()
             
-            # 音频缓冲区
-            audio_buffer = []
+            # 逐句合成语音的线程池，LLM 还在生成时前面的句子已经开始合成、播放
+            self._tts_executor = ThreadPoolExecutor(max_workers=_TTS_WORKERS, thread_name_prefix="tts")
+            loop, loop_thread = self._start_event_loop()
+            
             is_listening = False
             silence_counter = 0  # 用于简单能量检测的静音计数器
             listening_start_time = None  # 开始监听的时间
             max_listening_duration = 10.0  # 最大监听时长（秒），防止无限等待
             
+            # 音频缓冲区：按最大监听时长预分配，写指针之前的部分为当前语音段
+            audio_buffer = bytearray(int(max_listening_duration * sample_rate * 2))  # int16 = 2 bytes
+            buffered = 0
+            
+            def buffer_chunk(audio_chunk: bytes):
+                nonlocal buffered
+                end = buffered + len(audio_chunk)
+                if end > len(audio_buffer):
+                    # 能量检测模式没有时长上限，超出预分配大小时扩容
+                    audio_buffer.extend(bytes(end - len(audio_buffer)))
+                audio_buffer[buffered:end] = audio_chunk
+                buffered = end
+            
+            def take_buffered() -> bytes:
+                """复制出当前语音段并清空缓冲区（缓冲区会被继续复用）"""
+                nonlocal buffered
+                audio_data = bytes(memoryview(audio_buffer)[:buffered])
+                buffered = 0
+                return audio_data
+            
             # VAD降级机制：如果VAD长时间未触发但检测到能量，自动切换到能量检测
-            vad_fallback_enabled = True  # 是否启用VAD降级
             vad_fallback_trigger_count = 0  # VAD未触发但能量高的次数
             vad_fallback_threshold = 10  # 连续10次（约0.3秒）能量高但VAD未触发，则降级
-            use_energy_fallback = False  # 是否已切换到能量检测
             
             console.print("[green]✓ 音频系统已就绪，开始监听...[/green]")
             console.print(f"[dim]采样率: {sample_rate}Hz, Chunk大小: {chunk_size}字节[/dim]")
-            if vad and hasattr(vad, 'vad') and vad.vad:
+            if vad is not None and vad.vad is not None:
                 console.print(f"[dim]VAD: 已启用 (aggressiveness={vad.aggressiveness})[/dim]")
                 console.print(f"[dim]VAD参数: 静音时长={self.vad_config.get('silence_duration_ms', 700)}ms[/dim]")
             else:
@@ -323,152 +514,168 @@ class VoiceChatCLI:
             console.print("[yellow]提示: 请对着麦克风说话，系统会自动检测语音[/yellow]")
             console.print()
             
+            # 完整的语音段交给处理线程，音频回调不再被 ASR/LLM/TTS 阻塞
+            utterances: queue.Queue = queue.Queue(maxsize=2)
+            self._speaking = threading.Event()
+            
+            def submit_utterance(audio_data: bytes):
+                try:
+                    utterances.put_nowait(audio_data)
+                except queue.Full:
+                    self.logger.warning("语音处理积压，丢弃一段语音")
+            
+            voice_worker = threading.Thread(
+                target=self._voice_worker,
+                args=(loop, utterances, audio_output, audio_input),
+                daemon=True
+            )
+            voice_worker.start()
+            
+            # 预热能量计算内核，避免第一个音频块触发 JIT 编译
+            from .utils import audio_utils
+            audio_utils.warmup()
+            
             # 添加调试计数器
             callback_count = [0]  # 使用列表以便在闭包中修改
-            last_energy_log = [0]  # 上次打印能量的时间
             
-            def audio_callback(audio_chunk: bytes):
-                """音频输入回调"""
-                nonlocal audio_buffer, is_listening, silence_counter, listening_start_time
-                nonlocal use_energy_fallback, vad_fallback_trigger_count
-                import time
-                import numpy as np
-                
-                callback_count[0] += 1
-                
-                # 计算音频能量
-                audio_np = np.frombuffer(audio_chunk, dtype=np.int16)
-                energy = np.abs(audio_np).mean()
-                
-                # 每100次回调打印一次调试信息（约每3秒）
-                if callback_count[0] % 100 == 0:
-                    self.logger.debug(f"音频回调 #{callback_count[0]}, 能量: {energy:.1f}, 监听状态: {is_listening}, 缓冲区: {len(audio_buffer)}")
-                
-                # 能量阈值和静音阈值
-                energy_threshold = 300  # 能量阈值
-                energy_silence_threshold = 20  # 能量检测的静音帧数（约0.6秒）
-                
-                # 检查是否使用VAD
-                has_vad = vad and hasattr(vad, 'vad') and vad.vad is not None
+            # 回调中每帧都要用到的对象和常量，开始录音前绑定好（之后不会再变）
+            has_vad = vad is not None and vad.vad is not None
+            expected_frame_size = vad.frame_size * 2 if has_vad else None  # int16 = 2 bytes
+            vad_process = vad.process_frame if has_vad else None
+            speaking = self._speaking
+            logger = self.logger
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            frombuffer = np.frombuffer
+            int16 = np.int16
+            mean_abs = mean_abs_pcm16
+            monotonic = time.monotonic
+            energy_threshold = 300  # 能量阈值
+            energy_silence_threshold = 20  # 能量检测的静音帧数（约0.6秒）
+            
+            if has_vad and chunk_size != expected_frame_size:
+                console.print(f"[red]⚠ VAD帧大小不匹配: 期望={expected_frame_size}字节, 实际={chunk_size}字节[/red]")
+                console.print(f"[red]   这会导致VAD无法工作！请检查chunk_size配置[/red]")
+            
+            def vad_step(audio_chunk: bytes, energy: float):
+                """使用VAD检测（含降级检查）"""
+                nonlocal buffered, is_listening, listening_start_time, vad_fallback_trigger_count, step
                 
                 # VAD降级检查：如果能量高但VAD长时间未触发，切换到能量检测
-                # VAD降级检查：如果能量高但VAD长时间未触发，切换到能量检测
-                if has_vad and vad_fallback_enabled and not use_energy_fallback and not is_listening:
+                if not is_listening:
                     if energy > energy_threshold:
                         vad_fallback_trigger_count += 1
                         # 每10次打印一次调试信息
-                        if vad_fallback_trigger_count % 10 == 0:
-                            console.print(f"[yellow]检测到音频能量: {energy:.0f}，VAD未触发 (计数: {vad_fallback_trigger_count}/{vad_fallback_threshold})[/yellow]")
+                        if debug_enabled and vad_fallback_trigger_count % 10 == 0:
+                            logger.debug("检测到音频能量: %.0f，VAD未触发 (计数: %s/%s)",
+                                         energy, vad_fallback_trigger_count, vad_fallback_threshold)
                         if vad_fallback_trigger_count >= vad_fallback_threshold:
-                            use_energy_fallback = True
+                            # 之后的帧都直接交给能量检测
+                            step = energy_step
                             console.print(f"[yellow]⚠ VAD未响应，自动切换到能量检测模式（能量: {energy:.0f}）[/yellow]")
+                            energy_step(audio_chunk, energy)
+                            return
                     else:
                         vad_fallback_trigger_count = 0
                 
-                if has_vad and not use_energy_fallback:
-                    # 使用VAD检测
-                    # 检查帧大小是否匹配
-                    expected_frame_size = vad.frame_size * 2  # int16 = 2 bytes
-                    actual_frame_size = len(audio_chunk)
-                    
-                    # 每50次回调检查一次VAD状态（用于调试）
-                    if callback_count[0] % 50 == 0 and not is_listening:
-                        if actual_frame_size != expected_frame_size:
-                            console.print(f"[red]⚠ VAD帧大小不匹配: 期望={expected_frame_size}字节, 实际={actual_frame_size}字节[/red]")
-                            console.print(f"[red]   这会导致VAD无法工作！请检查chunk_size配置[/red]")
-                    
-                    is_speech, complete_audio = vad.process_frame(audio_chunk)
+                is_speech, complete_audio = vad_process(audio_chunk)
+                
+                # 每50次回调检查一次VAD状态（只在 DEBUG 日志级别下进行）
+                if debug_enabled and callback_count[0] % 50 == 0 and not is_listening:
+                    if energy > energy_threshold and not vad.triggered:
+                        # ring_buffer中语音帧的比例（VAD 内部随帧进出维护计数，无需扫描）
+                        if vad.ring_buffer:
+                            logger.debug("能量高但VAD未触发: 能量=%.0f, 语音帧比例=%.2f%% (需要>50%%才能触发)",
+                                         energy, vad.voiced_ratio * 100)
+                        else:
+                            logger.debug("检测到音频能量: %.0f，但VAD未触发（可能需要调整VAD参数）", energy)
+                
+                if is_speech:
+                    if not is_listening:
+                        is_listening = True
+                        listening_start_time = monotonic()
+                        console.print(f"[cyan]🎤 检测到语音（VAD）... (能量: {energy:.0f})[/cyan]")
+                        buffered = 0
                     
-                    # 每50次回调检查一次VAD状态（用于调试）
-                    if callback_count[0] % 50 == 0 and not is_listening:
-                        # 显示VAD状态和音频能量
-                        vad_triggered = hasattr(vad, 'triggered') and vad.triggered
-                        vad_is_speech = hasattr(vad, 'is_speech') and vad.is_speech
-                        ring_buffer_len = len(vad.ring_buffer) if hasattr(vad, 'ring_buffer') else 0
-                        silence_counter = vad.silence_counter if hasattr(vad, 'silence_counter') else 0
-                        
-                        # console.print(f"[dim]VAD调试: triggered={vad_triggered}, is_speech={vad_is_speech}, "
-                        #             f"ring_buffer={ring_buffer_len}, silence={silence_counter}, 能量={energy:.0f}[/dim]")
-                        
-                        if energy > energy_threshold and not vad_triggered:
-                            # 计算ring_buffer中语音帧的比例
-                            if hasattr(vad, 'ring_buffer') and len(vad.ring_buffer) > 0:
-                                num_voiced = sum(1 for _, speech in vad.ring_buffer if speech)
-                                voiced_ratio = num_voiced / len(vad.ring_buffer)
-                                console.print(f"[yellow]能量高但VAD未触发: 能量={energy:.0f}, "
-                                            f"语音帧比例={voiced_ratio:.2%} (需要>50%才能触发)[/yellow]")
-                            else:
-                                console.print(f"[yellow]检测到音频能量: {energy:.0f}，但VAD未触发（可能需要调整VAD参数）[/yellow]")
+                    # 持续收集音频
+                    buffer_chunk(audio_chunk)
                     
-                    if is_speech:
-                        if not is_listening:
-                            is_listening = True
-                            listening_start_time = time.time()
-                            console.print(f"[cyan]🎤 检测到语音（VAD）... (能量: {energy:.0f})[/cyan]")
-                            audio_buffer = []
-                        
-                        # 持续收集音频
-                        audio_buffer.append(audio_chunk)
-                        
-                        # 检查超时（防止无限等待）
-                        if listening_start_time:
-                            elapsed = time.time() - listening_start_time
-                            if elapsed > max_listening_duration:
-                                console.print(f"[yellow]⚠ 监听超时（{max_listening_duration}秒），强制处理...[/yellow]")
-                                is_listening = False
-                                listening_start_time = None
-                                if len(audio_buffer) > 0:
-                                    self._process_voice_input(
-                                        b''.join(audio_buffer),
-                                        audio_output,
-                                        audio_input
-                                    )
-                                    audio_buffer = []
-                    else:
-                        # 如果检测到完整语音段（语音结束）
-                        if complete_audio:
+                    # 检查超时（防止无限等待）
+                    if listening_start_time:
+                        elapsed = monotonic() - listening_start_time
+                        if elapsed > max_listening_duration:
+                            console.print(f"[yellow]⚠ 监听超时（{max_listening_duration}秒），强制处理...[/yellow]")
                             is_listening = False
                             listening_start_time = None
-                            audio_length = len(complete_audio)
-                            duration_ms = (audio_length / 2 / sample_rate) * 1000  # int16 = 2 bytes
-                            console.print(f"[cyan]✓ 语音结束（VAD），开始处理... (长度: {audio_length}字节, 约{duration_ms:.0f}ms)[/cyan]")
-                            self._process_voice_input(
-                                complete_audio,
-                                audio_output,
-                                audio_input
-                            )
-                            audio_buffer = []
-                        elif is_listening and len(audio_buffer) > 0:
-                            # 静音但之前有语音，继续收集（等待VAD确认结束）
-                            audio_buffer.append(audio_chunk)
-                else:
-                    # VAD不可用或已降级，使用能量检测
-                    if energy > energy_threshold:
-                        if not is_listening:
-                            is_listening = True
-                            listening_start_time = time.time()
-                            silence_counter = 0
-                            console.print(f"[cyan]🎤 检测到语音（能量检测）... (能量: {energy:.0f})[/cyan]")
-                            audio_buffer = []
-                        audio_buffer.append(audio_chunk)
+                            if buffered > 0:
+                                submit_utterance(take_buffered())
+                elif complete_audio:
+                    # 检测到完整语音段（语音结束）
+                    is_listening = False
+                    listening_start_time = None
+                    audio_length = len(complete_audio)
+                    duration_ms = (audio_length / 2 / sample_rate) * 1000  # int16 = 2 bytes
+                    buffered = 0
+                    if vad.is_negligible(complete_audio):
+                        # 过短或几乎无声的误触发，不送去识别
+                        console.print(f"[dim]忽略误触发语音段 (约{duration_ms:.0f}ms)[/dim]")
+                        return
+                    console.print(f"[cyan]✓ 语音结束（VAD），开始处理... (长度: {audio_length}字节, 约{duration_ms:.0f}ms)[/cyan]")
+                    submit_utterance(complete_audio)
+                elif is_listening and buffered > 0:
+                    # 静音但之前有语音，继续收集（等待VAD确认结束）
+                    buffer_chunk(audio_chunk)
+            
+            def energy_step(audio_chunk: bytes, energy: float):
+                """VAD不可用或已降级，使用能量检测"""
+                nonlocal buffered, is_listening, silence_counter, listening_start_time
+                
+                if energy > energy_threshold:
+                    if not is_listening:
+                        is_listening = True
+                        listening_start_time = monotonic()
                         silence_counter = 0
-                    else:
-                        if is_listening:
-                            silence_counter += 1
-                            audio_buffer.append(audio_chunk)  # 继续收集，可能还有尾音
-                            
-                            # 静音一段时间后处理
-                            if silence_counter >= energy_silence_threshold and len(audio_buffer) > 0:
-                                is_listening = False
-                                listening_start_time = None
-                                silence_counter = 0
-                                console.print(f"[cyan]✓ 语音结束（能量检测），开始处理... (收集了 {len(audio_buffer)} 个音频块)[/cyan]")
-                                self._process_voice_input(
-                                    b''.join(audio_buffer),
-                                    audio_output,
-                                    audio_input
-                                )
-                                audio_buffer = []
+                        console.print(f"[cyan]🎤 检测到语音（能量检测）... (能量: {energy:.0f})[/cyan]")
+                        buffered = 0
+                    buffer_chunk(audio_chunk)
+                    silence_counter = 0
+                elif is_listening:
+                    silence_counter += 1
+                    buffer_chunk(audio_chunk)  # 继续收集，可能还有尾音
+                    
+                    # 静音一段时间后处理
+                    if silence_counter >= energy_silence_threshold and buffered > 0:
+                        is_listening = False
+                        listening_start_time = None
+                        silence_counter = 0
+                        duration_ms = (buffered / 2 / sample_rate) * 1000  # int16 = 2 bytes
+                        console.print(f"[cyan]✓ 语音结束（能量检测），开始处理... (长度: {buffered}字节, 约{duration_ms:.0f}ms)[/cyan]")
+                        submit_utterance(take_buffered())
+            
+            # 当前使用的检测方式，VAD 降级时切换为能量检测，回调中不再逐帧判断
+            step = vad_step if has_vad else energy_step
+            
+            def audio_callback(audio_chunk: bytes):
+                """音频输入回调"""
+                nonlocal buffered, is_listening, listening_start_time
+                
+                callback_count[0] += 1
+                
+                # 正在播放回复时不采集，避免把扬声器里的声音当成用户语音
+                if speaking.is_set():
+                    if is_listening:
+                        is_listening = False
+                        listening_start_time = None
+                        buffered = 0
+                    return
+                
+                # 计算音频能量（frombuffer 不复制数据，单次遍历求平均绝对值）
+                energy = mean_abs(frombuffer(audio_chunk, dtype=int16))
+                
+                # 每100次回调打印一次调试信息（约每3秒）
+                if debug_enabled and callback_count[0] % 100 == 0:
+                    logger.debug("音频回调 #%s, 能量: %.1f, 监听状态: %s, 缓冲区: %s字节", callback_count[0], energy, is_listening, buffered)
+                
+                step(audio_chunk, energy)
             
             # 开始录音
             audio_input.start(callback=audio_callback)
@@ -477,34 +684,41 @@ class VoiceChatCLI:
             console.print("[dim]提示: 如果长时间没有响应，可以尝试：[/dim]")
             console.print("[dim]  1. 检查麦克风是否正常工作[/dim]")
             console.print("[dim]  2. 调整系统音量设置[/dim]")
-            if vad and hasattr(vad, 'aggressiveness') and vad.aggressiveness >= 3:
+            if has_vad and vad.aggressiveness >= 3:
                 console.print(f"[yellow]  3. 当前VAD aggressiveness={vad.aggressiveness}（很激进），建议降低到1-2[/yellow]")
                 console.print("[yellow]     编辑 config/default_config.yaml，将 vad.aggressiveness 改为 1 或 2[/yellow]")
             console.print()
             
-            # 主循环
+            # 主线程等待退出事件，Ctrl+C 时由信号处理函数置位
+            stop_event = threading.Event()
+            previous_sigint = signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
             try:
-                import time
-                last_debug_time = time.time()
-                while True:
-                    time.sleep(0.1)
-                    
+                next_status = time.monotonic() + _STATUS_INTERVAL
+                while not stop_event.wait(_WAIT_SLICE):
                     # 每5秒打印一次状态（如果没有任何活动）
-                    current_time = time.time()
-                    if current_time - last_debug_time > 5:
-                        if callback_count[0] == 0:
-                            console.print("[yellow]⚠ 警告: 音频回调似乎没有被调用，请检查麦克风连接[/yellow]")
-                        elif not is_listening and len(audio_buffer) == 0:
-                            # 显示当前音频能量（用于调试）
-                            if callback_count[0] > 0:
-                                console.print(f"[dim]状态: 监听中... (已接收 {callback_count[0]} 个音频块)[/dim]")
-                        last_debug_time = current_time
+                    now = time.monotonic()
+                    if now < next_status:
+                        continue
+                    next_status = now + _STATUS_INTERVAL
+                    if callback_count[0] == 0:
+                        console.print("[yellow]⚠ 警告: 音频回调似乎没有被调用，请检查麦克风连接[/yellow]")
+                    elif not is_listening and buffered == 0:
+                        # 显示当前音频能量（用于调试）
+                        console.print(f"[dim]状态: 监听中... (已接收 {callback_count[0]} 个音频块)[/dim]")
+                console.print("\n[yellow]正在退出...[/yellow]")
             except KeyboardInterrupt:
                 console.print("\n[yellow]正在退出...[/yellow]")
             finally:
+                signal.signal(signal.SIGINT, previous_sigint)
                 # 清理资源
                 audio_input.stop()
+                try:
+                    utterances.put_nowait(None)
+                except queue.Full:
+                    pass
                 audio_output.stop()
+                self._tts_executor.shutdown(wait=False)
+                self._stop_event_loop(loop, loop_thread)
                 console.print("[green]✓ 已退出语音模式[/green]")
                 
         except ImportError as e:
@@ -512,9 +726,29 @@ class VoiceChatCLI:
             console.print("[yellow]请安装: pip install pyaudio[/yellow]")
         except Exception as e:
             console.print(f"[red]启动语音模式失败: {e}[/red]")
-            self.logger.error(f"语音模式错误: {e}", exc_info=True)
+            self.logger.error("语音模式错误: %s", e, exc_info=True)
     
-    def _process_voice_input(self, audio_data: bytes, audio_output: AudioOutputHandler, audio_input: AudioInputHandler):
+    def _voice_worker(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        utterances: queue.Queue,
+        audio_output: AudioOutputHandler,
+        audio_input: AudioInputHandler
+    ):
+        """逐段处理音频回调送来的完整语音，取到 None 时结束"""
+        while True:
+            audio_data = utterances.get()
+            if audio_data is None:
+                break
+            self._process_voice_input(loop, audio_data, audio_output, audio_input)
+    
+    def _process_voice_input(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        audio_data: bytes,
+        audio_output: AudioOutputHandler,
+        audio_input: AudioInputHandler
+    ):
         """处理语音输入"""
         try:
             # 1. ASR识别
@@ -530,58 +764,124 @@ class VoiceChatCLI:
             # 2. 添加到对话历史
             self.conversation.add_user_message(text)
             
-            # 3. LLM生成回复
+            # 3. LLM生成回复，每生成完一句就提交 TTS 合成，由播放线程按顺序播放
             console.print("[yellow]🤔 AI正在思考...[/yellow]")
-            llm = self.llm_manager.get_current_llm()
             messages = self.conversation.get_messages()
             
+            pending: queue.Queue = queue.Queue()
+            player = threading.Thread(
+                target=self._play_sentences,
+                args=(pending, audio_output),
+                daemon=True
+            )
+            player.start()
+            
+            splitter = SentenceSplitter()
+            synthesize = self._start_synthesis
+            sample_rate = audio_output.sample_rate
+            stdout_write = sys.stdout.write
             response_text = ""
             try:
-                for token in llm.generate(messages, stream=True):
+                console.print("[bold green]AI:[/bold green] ", end="")
+                for token in self._stream_tokens(loop, messages):
+                    stdout_write(token)
                     response_text += token
-                    # 可以在这里显示流式输出（可选）
+                    for sentence in splitter.feed(token):
+                        sys.stdout.flush()
+                        pending.put(synthesize(sentence, sample_rate))
+                rest = splitter.flush()
+                if rest:
+                    pending.put(synthesize(rest, sample_rate))
+                stdout_write("\n")
+                sys.stdout.flush()
                 
                 if not response_text:
                     console.print("[red]AI未生成回复[/red]\n")
                     return
                 
-                console.print(f"[bold green]AI:[/bold green] {response_text}")
-                
                 # 保存回复
                 self.conversation.add_assistant_message(response_text)
                 
             except Exception as e:
-                console.print(f"[red]生成回复失败: {e}[/red]")
-                self.logger.error(f"LLM生成错误: {e}", exc_info=True)
+                console.print(f"\n[red]生成回复失败: {e}[/red]")
+                self.logger.error("LLM生成错误: %s", e, exc_info=True)
                 return
+            finally:
+                # 等已提交的句子播放完
+                pending.put(None)
+                player.join()
+                self._speaking.clear()
+            
+            console.print("[green]✓ 完成\n[/green]")
             
-            # 4. TTS合成（直接使用原始文本）
-            console.print("[yellow]🔊 正在合成语音...[/yellow]")
-            try:
-                audio_data = self.tts_manager.synthesize(response_text)
-                
-                if audio_data:
-                    # 转换音频格式（Edge TTS返回MP3，需要转换为PCM）
-                    pcm_data = self._convert_audio_to_pcm(audio_data, audio_output.sample_rate)
-                    
-                    if pcm_data:
-                        # 5. 播放音频（同步播放，等待完成）
-                        console.print("[yellow]🔊 正在播放...[/yellow]")
-                        audio_output.play_sync(pcm_data)
-                        console.print("[green]✓ 完成\n[/green]")
-                    else:
-                        console.print("[red]音频格式转换失败[/red]\n")
-                else:
-                    console.print("[red]TTS合成失败[/red]\n")
-                    
-            except Exception as e:
-                console.print(f"[red]TTS合成失败: {e}[/red]")
-                self.logger.error(f"TTS错误: {e}", exc_info=True)
-                
         except Exception as e:
             console.print(f"[red]处理语音输入失败: {e}[/red]")
-            self.logger.error(f"处理语音输入错误: {e}", exc_info=True)
+            self.logger.error("处理语音输入错误: %s", e, exc_info=True)
       
+    def _play_sentences(self, pending: queue.Queue, audio_output: AudioOutputHandler):
+        """按提交顺序播放逐句合成的 PCM（每句边合成边播放），取到 None 时结束"""
+        played = 0
+        while True:
+            blocks = pending.get()
+            if blocks is None:
+                break
+            while True:
+                pcm_data = blocks.get()
+                if pcm_data is None:
+                    break
+                self._speaking.set()
+                audio_output.play(pcm_data)
+                played += len(pcm_data)
+        
+        if played:
+            # 等播放队列中的音频全部播放完，最多等待音频时长再加 1 秒
+            duration = played / (audio_output.sample_rate * audio_output.channels * 2)  # int16 = 2 bytes
+            audio_output.wait_drained(timeout=duration + 1.0)
+    
+    def _start_synthesis(self, text: str, sample_rate: int) -> queue.SimpleQueue:
+        """提交一句话的合成任务，返回逐块输出 PCM 的队列（以 None 结束）"""
+        blocks: queue.SimpleQueue = queue.SimpleQueue()
+        self._tts_executor.submit(self._synthesize_pcm, text, sample_rate, blocks)
+        return blocks
+    
+    def _synthesize_pcm(self, text: str, sample_rate: int, blocks: queue.SimpleQueue):
+        """
+        合成一句话，解码出的 PCM 逐块放入 blocks，结束时放入 None
+        
+        重复的句子由 TTSManager 的合成缓存直接返回 MP3（只缓存完整合成的结果）；
+        有 miniaudio 时边接收 MP3 数据边解码，播放不必等整句合成完
+        """
+        try:
+            if HAS_MINIAUDIO:
+                source = _ChunkSource(self.tts_manager.synthesize_stream(text))
+                for samples in miniaudio.stream_any(
+                    source,
+                    source_format=miniaudio.FileFormat.MP3,
+                    output_format=miniaudio.SampleFormat.SIGNED16,
+                    nchannels=1,
+                    sample_rate=sample_rate
+                ):
+                    blocks.put(samples.tobytes())
+                # miniaudio 会吞掉读数据回调中的异常（只是提前结束解码），这里重新抛出以便记录
+                if source.error_in_readcallback is not None:
+                    raise source.error_in_readcallback
+            else:
+                audio_data = self.tts_manager.synthesize(text)
+                if not audio_data:
+                    self.logger.error("TTS合成失败")
+                    return
+                
+                # 转换音频格式（Edge TTS返回MP3，需要转换为PCM）
+                pcm_data = self._convert_audio_to_pcm(audio_data, sample_rate)
+                if not pcm_data:
+                    self.logger.error("音频格式转换失败")
+                    return
+                blocks.put(pcm_data)
+        except Exception as e:
+            self.logger.error("TTS错误: %s", e, exc_info=True)
+        finally:
+            blocks.put(None)
+    
     def _convert_audio_to_pcm(self, audio_data: bytes, target_sample_rate: int) -> Optional[bytes]:
         """
         将音频数据转换为PCM格式
@@ -594,10 +894,27 @@ class VoiceChatCLI:
             PCM格式的音频数据
         """
         try:
+            # 优先在进程内解码，同时完成重采样和单声道、16位转换
+            if HAS_MINIAUDIO:
+                try:
+                    if target_sample_rate == _EDGE_TTS_SAMPLE_RATE:
+                        # 输出采样率与 Edge TTS 相同：直接用 MP3 解码器，不探测格式、不经过重采样
+                        decoded = miniaudio.mp3_read_s16(audio_data)
+                        if decoded.sample_rate == target_sample_rate and decoded.nchannels == 1:
+                            return decoded.samples.tobytes()
+                    decoded = miniaudio.decode(
+                        audio_data,
+                        output_format=miniaudio.SampleFormat.SIGNED16,
+                        nchannels=1,
+                        sample_rate=target_sample_rate
+                    )
+                    return decoded.samples.tobytes()
+                except miniaudio.DecodeError as e:
+                    self.logger.warning("miniaudio 解码失败，改用 pydub: %s", e)
+            
             # 尝试使用 pydub 转换
             try:
-                from pydub import AudioSegment
-                import io
+                AudioSegment = _get_audio_segment()
                 
                 # 从字节流加载音频
                 audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
@@ -617,21 +934,21 @@ class VoiceChatCLI:
                 return pcm_data
                 
             except ImportError:
-                self.logger.warning("pydub 未安装，无法转换音频格式")
-                console.print("[yellow]警告: 需要安装 pydub 来播放音频[/yellow]")
-                console.print("[yellow]安装: pip install pydub[/yellow]")
+                self.logger.warning("miniaudio 和 pydub 均未安装，无法转换音频格式")
+                console.print("[yellow]警告: 需要安装 miniaudio 或 pydub 来播放音频[/yellow]")
+                console.print("[yellow]安装: pip install miniaudio[/yellow]")
                 return None
             except Exception as e:
-                self.logger.error(f"音频转换失败: {e}")
+                self.logger.error("音频转换失败: %s", e)
                 return None
                 
         except Exception as e:
-            self.logger.error(f"音频转换错误: {e}", exc_info=True)
+            self.logger.error("音频转换错误: %s", e, exc_info=True)
             return None
                 
         except Exception as e:
             console.print(f"[red]处理语音输入失败: {e}[/red]")
-            self.logger.error(f"处理语音输入错误: {e}", exc_info=True)
+            self.logger.error("处理语音输入错误: %s", e, exc_info=True)
 
 
 @click.command()
@@ -654,11 +971,21 @@ def main(config, model, voice, text_mode):
                 console.print(f"[red]切换模型失败: {e}[/red]")
                 sys.exit(1)
         
+        # 启动时检查当前模型（及竞速模型）能否连通，尽早提示 API Key 或网络问题
+        app.check_llm_connections()
+        
         # 运行模式
-        if text_mode:
-            app.run_text_mode()
-        else:
-            app.run_voice_mode()
+        try:
+            if text_mode:
+                app.run_text_mode()
+            else:
+                app.run_voice_mode()
+        finally:
+            # 等待后台线程写完对话历史
+            app.conversation.close()
+            app.llm_manager.close_all()
+            if app.tts_manager is not None:
+                app.tts_manager.close()
             
     except Exception as e:
         console.print(f"[red]程序启动失败: {e}[/red]")
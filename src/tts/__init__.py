@@ -1,6 +1,20 @@
 """语音合成模块"""
+import importlib
+
 from .base_tts import BaseTTS
-from .edge_tts_engine import EdgeTTSEngine
 from .tts_manager import TTSManager
 
+# 具体引擎按需导入（PEP 562），导入本模块时不加载 edge_tts、aiohttp 等依赖
+_LAZY_CLASSES = {
+    'EdgeTTSEngine': '.edge_tts_engine',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_CLASSES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+
 __all__ = ['BaseTTS', 'EdgeTTSEngine', 'TTSManager']
@@ -1,6 +1,6 @@
 """TTS基类"""
 from abc import ABC, abstractmethod
-from typing import Optional, Iterator, AsyncIterator
+from typing import Optional, Iterator, AsyncIterator, List
 
 
 class BaseTTS(ABC):
@@ -30,6 +30,19 @@ class BaseTTS(ABC):
         """
         pass
     
+    def synthesize_batch(self, texts: List[str]) -> List[Optional[bytes]]:
+        """
+        批量合成语音
+        
+        Args:
+            texts: 文本列表
+        
+        Returns:
+            与 texts 一一对应的音频数据，合成失败的位置为 None
+        """
+        # 默认实现：逐条合成
+        return [self.synthesize(text) for text in texts]
+    
     def synthesize_stream(self, text: str) -> Iterator[bytes]:
         """
         流式合成语音（生成器，逐块返回音频数据）
@@ -39,6 +52,10 @@ class BaseTTS(ABC):
         
         Yields:
             音频数据块(bytes)
+        
+        Raises:
+            Exception: 合成中途失败时应抛出异常，而不是提前正常结束，
+                调用方（例如缓存）据此判断收到的音频是否完整
         """
         # 默认实现：将完整音频一次返回
         audio = self.synthesize(text)
@@ -58,3 +75,7 @@ class BaseTTS(ABC):
             是否成功
         """
         pass
+    
+    def close(self):
+        """释放引擎占用的资源（默认无需处理）"""
+        pass
@@ -1,12 +1,16 @@
 """Edge TTS引擎"""
 import asyncio
+import threading
 import edge_tts
-from typing import Optional, Iterator
+from typing import AsyncIterator, Optional, Iterator, List
 from .base_tts import BaseTTS
 from ..utils import get_logger
 
 logger = get_logger("edge_tts")
 
+# 批量合成时同时进行的请求数上限，避免一次打开过多 WebSocket 连接
+_MAX_CONCURRENT_REQUESTS = 8
+
 
 class EdgeTTSEngine(BaseTTS):
     """Edge TTS引擎"""
@@ -29,14 +33,51 @@ class EdgeTTSEngine(BaseTTS):
         super().__init__(voice, **kwargs)
         self.rate = rate
         self.pitch = pitch
+        # 所有调用共用一个后台事件循环（首次合成时启动），
+        # 不再每次新建事件循环，连接和 TLS 会话可以跨请求复用
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
         logger.info(f"Edge TTS已初始化: voice={voice}")
     
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """获取后台事件循环，未启动时启动"""
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="edge-tts-loop", daemon=True
+                )
+                thread.start()
+                self._loop_thread = thread
+                self._loop = loop
+            return self._loop
+    
+    def _run(self, coro):
+        """在后台事件循环中运行协程并等待结果（可从多个线程同时调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+    
+    def close(self):
+        """停止后台事件循环"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=1.0)
+        if not thread.is_alive():
+            loop.close()
+    
     def synthesize(self, text: str) -> Optional[bytes]:
         """同步合成语音"""
         try:
-            return asyncio.run(self._synthesize_async(text))
+            return self._run(self._synthesize_async(text))
         except Exception as e:
-            logger.error(f"Edge TTS合成错误: {e}")
+            logger.error("Edge TTS合成错误: %s", e)
             return None
     
     async def _synthesize_async(self, text: str) -> Optional[bytes]:
@@ -49,23 +90,44 @@ class EdgeTTSEngine(BaseTTS):
                 pitch=self.pitch
             )
             
-            audio_data = b""
+            # 收集到列表里最后一次拼接，避免 bytes += 每块都重新分配并复制
+            chunks = []
             async for chunk in communicate.stream():
                 if chunk["type"] == "audio":
-                    audio_data += chunk["data"]
+                    chunks.append(chunk["data"])
             
-            return audio_data
+            return b"".join(chunks)
         except Exception as e:
-            logger.error(f"Edge TTS异步合成错误: {e}")
+            logger.error("Edge TTS异步合成错误: %s", e)
             return None
     
+    def synthesize_batch(self, texts: List[str]) -> List[Optional[bytes]]:
+        """批量合成语音，各条文本的请求并发进行"""
+        if not texts:
+            return []
+        try:
+            return self._run(self._synthesize_many_async(texts))
+        except Exception as e:
+            logger.error("Edge TTS批量合成错误: %s", e)
+            return [None] * len(texts)
+    
+    async def _synthesize_many_async(self, texts: List[str]) -> List[Optional[bytes]]:
+        """并发合成多条文本，同时进行的请求数不超过 _MAX_CONCURRENT_REQUESTS"""
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        
+        async def limited(text: str) -> Optional[bytes]:
+            async with semaphore:
+                return await self._synthesize_async(text)
+        
+        return await asyncio.gather(*(limited(text) for text in texts))
+    
     def synthesize_to_file(self, text: str, output_path: str) -> bool:
         """合成语音并保存到文件"""
         try:
-            asyncio.run(self._synthesize_to_file_async(text, output_path))
+            self._run(self._synthesize_to_file_async(text, output_path))
             return True
         except Exception as e:
-            logger.error(f"Edge TTS保存文件错误: {e}")
+            logger.error("Edge TTS保存文件错误: %s", e)
             return False
     
     async def _synthesize_to_file_async(self, text: str, output_path: str):
@@ -86,36 +148,38 @@ class EdgeTTSEngine(BaseTTS):
             text: 文本内容
         
         Yields:
-            音频数据块(bytes)
+            音频数据块(bytes)，收到一块就返回一块
+        
+        Raises:
+            Exception: 合成中途失败时记录日志后重新抛出，调用方不会把残缺的音频当作完整结果
         """
+        stream = self._stream_async(text)
         try:
-            # 使用asyncio运行异步流式合成
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                for chunk in loop.run_until_complete(self._stream_async(text)):
-                    yield chunk
-            finally:
-                loop.close()
+            # 在后台事件循环中逐步驱动异步生成器，连接在两次取数据之间保持打开
+            while True:
+                try:
+                    chunk = self._run(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield chunk
         except Exception as e:
-            logger.error(f"Edge TTS流式合成错误: {e}")
+            logger.error("Edge TTS流式合成错误: %s", e)
+            raise
+        finally:
+            try:
+                self._run(stream.aclose())
+            except Exception:
+                pass
     
-    async def _stream_async(self, text: str):
-        """异步流式合成"""
-        chunks = []
-        try:
-            communicate = edge_tts.Communicate(
-                text=text,
-                voice=self.voice,
-                rate=self.rate,
-                pitch=self.pitch
-            )
-            
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    chunks.append(chunk["data"])
-            
-            return chunks
-        except Exception as e:
-            logger.error(f"Edge TTS异步流式合成错误: {e}")
-            return []
+    async def _stream_async(self, text: str) -> AsyncIterator[bytes]:
+        """异步流式合成（异常向上抛出，由 synthesize_stream 处理）"""
+        communicate = edge_tts.Communicate(
+            text=text,
+            voice=self.voice,
+            rate=self.rate,
+            pitch=self.pitch
+        )
+        
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
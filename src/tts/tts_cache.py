@@ -0,0 +1,155 @@
+"""TTS 合成结果缓存"""
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+class TTSCache:
+    """
+    按 (引擎, 语音, 语速, 音调, 文本) 精确匹配的合成音频缓存
+    
+    内存中为按字节数限额的 LRU；设置了 cache_dir 时同时写入磁盘
+    （<cache_dir>/<sha1>.mp3），以文件修改时间判断是否过期，重启后仍可命中。
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int = 10 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+        ttl: float = 7 * 24 * 3600
+    ):
+        """
+        Args:
+            max_bytes: 内存缓存最多占用的字节数
+            cache_dir: 磁盘缓存目录，None 为只缓存在内存
+            ttl: 缓存有效期（秒）
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(engine: str, voice: str, rate: str, pitch: str, text: str) -> str:
+        """根据合成参数计算缓存键"""
+        payload = f"{engine}|{voice}|{rate}|{pitch}|{text}"
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """获取缓存的音频，依次查内存和磁盘，不存在或已过期时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, data = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    return data
+                self._total -= len(data)
+                del self._entries[key]
+        
+        data = self._read_disk(key)
+        if data is not None:
+            self._put_memory(key, data)
+        return data
+    
+    def put(self, key: str, data: bytes):
+        """缓存一段音频"""
+        if not data:
+            return
+        self._put_memory(key, data)
+        self._write_disk(key, data)
+    
+    def copy_to(self, key: str, output_path: str) -> bool:
+        """
+        把磁盘缓存文件复制到 output_path
+        
+        复制而不是硬链接：输出文件交给用户后可能被原地修改，不能影响缓存内容
+        （shutil.copyfile 在支持的平台上使用 copy_file_range/sendfile 等内核复制）
+        
+        Returns:
+            是否成功；未启用磁盘缓存、未命中或复制失败时返回 False
+        """
+        path = self._disk_path(key)
+        if path is None:
+            return False
+        tmp = f"{output_path}.{threading.get_ident()}.tmp"
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return False
+            if os.path.exists(output_path) and os.path.samefile(path, output_path):
+                # 输出路径就是缓存文件本身
+                return True
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, output_path)
+            return True
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return False
+    
+    def clear(self):
+        """清空内存缓存（磁盘文件保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _put_memory(self, key: str, data: bytes):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= len(old[1])
+            self._entries[key] = (time.monotonic() + self.ttl, data)
+            self._total += size
+            while self._total > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+    
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{key}.mp3"
+    
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._disk_path(key)
+        if path is None:
+            return None
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            return path.read_bytes()
+        except OSError:
+            return None
+    
+    def _write_disk(self, key: str, data: bytes):
+        path = self._disk_path(key)
+        if path is None:
+            return
+        # 先写临时文件再改名，其他线程不会读到写了一半的文件
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
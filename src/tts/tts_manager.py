@@ -1,6 +1,10 @@
 """TTS管理器"""
-from typing import Optional, Dict, Any, Iterator
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, List
 from .base_tts import BaseTTS
+from .tts_cache import TTSCache
 from ..utils import get_logger
 
 logger = get_logger("tts_manager")
@@ -21,6 +25,19 @@ class TTSManager:
         self.current_engine_name: Optional[str] = None
         self.available_engines: Dict[str, type] = {}
         
+        # 合成结果缓存：重复的问候语、提示语直接返回，不再请求 TTS 服务
+        cache_size_mb = config.get('cache_size_mb', 10)
+        self.cache: Optional[TTSCache] = None
+        if cache_size_mb:
+            self.cache = TTSCache(
+                max_bytes=int(cache_size_mb * 1024 * 1024),
+                cache_dir=config.get('cache_dir'),
+                ttl=config.get('cache_ttl', 7 * 24 * 3600)
+            )
+        # 正在合成的请求（缓存键 -> Future），相同文本同时请求时只调用一次引擎
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
         # 注册可用的TTS引擎
         self._register_engines()
         
@@ -84,11 +101,14 @@ class TTSManager:
         # 创建引擎实例
         try:
             engine_class = self.available_engines[engine_name]
+            previous = self.current_engine
             self.current_engine = engine_class(**engine_config)
+            if previous is not None:
+                previous.close()
             self.current_engine_name = engine_name
-            logger.info(f"已切换到 TTS 引擎: {engine_name}")
+            logger.info("已切换到 TTS 引擎: %s", engine_name)
         except Exception as e:
-            logger.error(f"切换 TTS 引擎失败: {e}")
+            logger.error("切换 TTS 引擎失败: %s", e)
             raise
     
     def synthesize(self, text: str) -> Optional[bytes]:
@@ -105,7 +125,74 @@ class TTSManager:
             logger.error("没有可用的TTS引擎")
             return None
         
-        return self.current_engine.synthesize(text)
+        key = self._cache_key(text)
+        if key is None:
+            return self.current_engine.synthesize(text)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # 缓存未命中：已有线程在合成同一文本时等待它的结果
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        
+        try:
+            audio_data = self.current_engine.synthesize(text)
+            if audio_data:
+                # 先写入缓存再移除登记，之后的请求直接命中缓存
+                self.cache.put(key, audio_data)
+            future.set_result(audio_data)
+            return audio_data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def synthesize_batch(self, texts: List[str]) -> List[Optional[bytes]]:
+        """
+        批量合成语音（引擎支持时并发请求）
+        
+        Args:
+            texts: 文本列表
+        
+        Returns:
+            与 texts 一一对应的音频数据，合成失败的位置为 None
+        """
+        if self.current_engine is None:
+            logger.error("没有可用的TTS引擎")
+            return [None] * len(texts)
+        
+        results: List[Optional[bytes]] = [None] * len(texts)
+        keys: List[Optional[str]] = [self._cache_key(text) for text in texts]
+        
+        # 先查缓存，只把未命中的文本（相同文本只请求一次）交给引擎
+        pending: Dict[str, List[int]] = {}
+        for i, (text, key) in enumerate(zip(texts, keys)):
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.setdefault(text, []).append(i)
+        
+        if pending:
+            unique = list(pending)
+            for text, audio_data in zip(unique, self.current_engine.synthesize_batch(unique)):
+                indices = pending[text]
+                for i in indices:
+                    results[i] = audio_data
+                key = keys[indices[0]]
+                if key is not None and audio_data:
+                    self.cache.put(key, audio_data)
+        return results
     
     def synthesize_stream(self, text: str) -> Iterator[bytes]:
         """
@@ -116,12 +203,32 @@ class TTSManager:
         
         Yields:
             音频数据块
+        
+        Raises:
+            Exception: 引擎合成中途失败（此时不写入缓存）
         """
         if self.current_engine is None:
             logger.error("没有可用的TTS引擎")
             return
         
-        yield from self.current_engine.synthesize_stream(text)
+        key = self._cache_key(text)
+        if key is None:
+            yield from self.current_engine.synthesize_stream(text)
+            return
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        # 边转发边收集，引擎正常结束后才写入缓存：引擎出错时异常直接传给调用方、
+        # 调用方中途停止时生成器被关闭，这两种情况都不会执行到写缓存
+        chunks = []
+        for chunk in self.current_engine.synthesize_stream(text):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            self.cache.put(key, b"".join(chunks))
     
     def synthesize_to_file(self, text: str, output_path: str) -> bool:
         """
@@ -138,7 +245,45 @@ class TTSManager:
             logger.error("没有可用的TTS引擎")
             return False
         
-        return self.current_engine.synthesize_to_file(text, output_path)
+        key = self._cache_key(text)
+        if key is not None:
+            # 命中磁盘缓存时直接复制文件，不经过内存
+            if self.cache.copy_to(key, output_path):
+                return True
+            cached = self.cache.get(key)
+            if cached is not None:
+                try:
+                    Path(output_path).write_bytes(cached)
+                    return True
+                except OSError as e:
+                    logger.error("写入缓存音频失败: %s", e)
+                    return False
+        
+        ok = self.current_engine.synthesize_to_file(text, output_path)
+        if ok and key is not None:
+            try:
+                self.cache.put(key, Path(output_path).read_bytes())
+            except OSError:
+                pass
+        return ok
+    
+    def _cache_key(self, text: str) -> Optional[str]:
+        """计算当前引擎和参数下的缓存键，未启用缓存时返回 None"""
+        if self.cache is None:
+            return None
+        engine = self.current_engine
+        return TTSCache.make_key(
+            self.current_engine_name,
+            engine.voice,
+            getattr(engine, 'rate', ''),
+            getattr(engine, 'pitch', ''),
+            text
+        )
+    
+    def close(self):
+        """释放当前引擎占用的资源"""
+        if self.current_engine is not None:
+            self.current_engine.close()
     
     def list_available_engines(self) -> list:
         """
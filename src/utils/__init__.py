@@ -1,5 +1,8 @@
 """工具模块"""
 from .logger import setup_logger, get_logger
-from .audio_utils import AudioBuffer, calculate_rms
+from .audio_utils import AudioBuffer, PCMRing, calculate_rms, mean_abs_pcm16, rms_pcm16
+from .sentence_splitter import SentenceSplitter
+from .spsc_ring import SPSCRing
 
-__all__ = ['setup_logger', 'get_logger', 'AudioBuffer', 'calculate_rms']
+__all__ = ['setup_logger', 'get_logger', 'AudioBuffer', 'PCMRing', 'calculate_rms', 'mean_abs_pcm16', 'rms_pcm16',
+           'SentenceSplitter', 'SPSCRing']
@@ -3,6 +3,137 @@ import numpy as np
 from collections import deque
 from typing import Optional
 
+# 尝试导入 numba，不可用时退回 NumPy 实现
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    njit = None
+    HAS_NUMBA = False
+
+
+def _mean_abs_pcm16_numpy(samples: np.ndarray) -> float:
+    """NumPy 实现：int32 取绝对值（-32768 不会溢出）后求和"""
+    if samples.size == 0:
+        return 0.0
+    return float(np.add.reduce(np.abs(samples, dtype=np.int32), dtype=np.int64)) / samples.size
+
+
+if HAS_NUMBA:
+    @njit(fastmath=True, cache=True)
+    def _mean_abs_pcm16_jit(samples: np.ndarray) -> float:
+        n = samples.shape[0]
+        if n == 0:
+            return 0.0
+        acc = 0
+        for i in range(n):
+            acc += abs(np.int32(samples[i]))
+        return acc / n
+    
+    def mean_abs_pcm16(samples: np.ndarray) -> float:
+        """
+        计算 int16 音频样本的平均绝对值（音频能量），单次遍历、不分配临时数组
+        
+        Args:
+            samples: int16 音频样本
+        
+        Returns:
+            平均绝对值（0 - 32768）
+        """
+        return float(_mean_abs_pcm16_jit(samples))
+else:
+    mean_abs_pcm16 = _mean_abs_pcm16_numpy
+
+
+def _rms_pcm16_numpy(samples: np.ndarray) -> float:
+    """NumPy 实现：转为 float32 后用 dot 求平方和"""
+    if samples.size == 0:
+        return 0.0
+    x = samples.astype(np.float32)
+    return float(np.sqrt(np.dot(x, x) / x.size)) / 32768.0
+
+
+if HAS_NUMBA:
+    @njit(fastmath=True, cache=True)
+    def _rms_pcm16_jit(samples: np.ndarray) -> float:
+        n = samples.shape[0]
+        if n == 0:
+            return 0.0
+        acc = 0.0
+        for i in range(n):
+            v = np.float64(samples[i])
+            acc += v * v
+        return np.sqrt(acc / n) / 32768.0
+    
+    def rms_pcm16(samples: np.ndarray) -> float:
+        """
+        计算 int16 音频样本归一化后的 RMS（音频电平），单次遍历、不分配临时数组
+        
+        Args:
+            samples: int16 音频样本
+        
+        Returns:
+            RMS 值（0.0 - 1.0）
+        """
+        return float(_rms_pcm16_jit(samples))
+else:
+    rms_pcm16 = _rms_pcm16_numpy
+
+
+def _rms_f32_numpy(x: np.ndarray) -> float:
+    """NumPy 实现：dot 一次完成平方和，不生成临时数组"""
+    return float(np.sqrt(np.dot(x, x) / x.size))
+
+
+def _scale_clip_f32_numpy(x: np.ndarray, scale: float) -> np.ndarray:
+    """NumPy 实现：按比例缩放，峰值超过 1.0 时整体再压回 [-1, 1]"""
+    out = np.multiply(x, np.float32(scale), dtype=np.float32)
+    # 用 max/min 求峰值，不生成 abs 临时数组；压缩在 out 上原地进行
+    peak = max(float(out.max()), -float(out.min()))
+    if peak > 1.0:
+        np.divide(out, np.float32(peak), out=out)
+    return out
+
+
+if HAS_NUMBA:
+    @njit(fastmath=True, cache=True)
+    def _rms_f32(x: np.ndarray) -> float:
+        n = x.shape[0]
+        acc = 0.0
+        for i in range(n):
+            acc += x[i] * x[i]
+        return np.sqrt(acc / n)
+    
+    @njit(fastmath=True, cache=True)
+    def _scale_clip_f32(x: np.ndarray, scale: float) -> np.ndarray:
+        n = x.shape[0]
+        out = np.empty(n, dtype=np.float32)
+        peak = 0.0
+        for i in range(n):
+            v = x[i] * scale
+            out[i] = v
+            a = abs(v)
+            if a > peak:
+                peak = a
+        if peak > 1.0:
+            inv = 1.0 / peak
+            for i in range(n):
+                out[i] *= inv
+        return out
+else:
+    _rms_f32 = _rms_f32_numpy
+    _scale_clip_f32 = _scale_clip_f32_numpy
+
+
+def warmup() -> None:
+    """预热内核，避免首次调用时的 JIT 编译延迟"""
+    mean_abs_pcm16(np.zeros(1, dtype=np.int16))
+    pcm16_to_float32(np.zeros(1, dtype=np.int16), np.empty(1, dtype=np.float32))
+    rms_pcm16(np.zeros(1, dtype=np.int16))
+    normalize_audio(np.ones(1, dtype=np.float32))
+    convert_audio_format(np.zeros(1, dtype=np.int16), 'int16', 'float32')
+    convert_audio_format(np.zeros(1, dtype=np.float32), 'float32', 'int16')
+
 
 def calculate_rms(audio_data: np.ndarray) -> float:
     """
@@ -14,9 +145,11 @@ def calculate_rms(audio_data: np.ndarray) -> float:
     Returns:
         RMS值
     """
-    if len(audio_data) == 0:
+    # 只转换一次为 float32 连续数组（已是 float32 时不复制），平方和在单次遍历中完成
+    x = np.ascontiguousarray(audio_data, dtype=np.float32).ravel()
+    if x.size == 0:
         return 0.0
-    return np.sqrt(np.mean(audio_data.astype(float) ** 2))
+    return float(_rms_f32(x))
 
 
 def normalize_audio(audio_data: np.ndarray, target_rms: float = 0.1) -> np.ndarray:
@@ -28,72 +161,305 @@ def normalize_audio(audio_data: np.ndarray, target_rms: float = 0.1) -> np.ndarr
         target_rms: 目标RMS值
     
     Returns:
-        归一化后的音频数据
+        归一化后的音频数据（float32）
     """
-    current_rms = calculate_rms(audio_data)
+    x = np.ascontiguousarray(audio_data, dtype=np.float32)
+    flat = x.ravel()
+    # 空数组/全静音无法缩放，原样返回（同样是 float32，输出类型不随内容变化）
+    if flat.size == 0:
+        return x
+    current_rms = float(_rms_f32(flat))
     if current_rms == 0:
-        return audio_data
-    
-    scaling_factor = target_rms / current_rms
-    normalized = audio_data * scaling_factor
+        return x
     
-    # 防止削波
-    max_val = np.abs(normalized).max()
-    if max_val > 1.0:
-        normalized = normalized / max_val
-    
-    return normalized
+    # 缩放与防削波在同一个内核中完成
+    normalized = _scale_clip_f32(flat, target_rms / current_rms)
+    return normalized.reshape(x.shape)
 
 
 class AudioBuffer:
-    """音频缓冲区"""
+    """
+    音频缓冲区
     
-    def __init__(self, max_size: int = 100):
+    所有帧写入同一块预分配的环形数组，记录每帧长度，取数据时不再逐帧拼接。
+    数组在第一次 add 时按 max_size × 帧长分配，之后出现更长的帧时才扩容。
+    数据类型由构造参数或第一帧决定；之后的帧只接受能无损转换为该类型的数据
+    （例如 int16 帧可以写入 float32 缓冲区），否则抛出 TypeError。
+    """
+    
+    def __init__(self, max_size: int = 100, frame_size: Optional[int] = None, dtype=None):
         """
         初始化音频缓冲区
         
         Args:
             max_size: 最大缓冲帧数
+            frame_size: 每帧样本数，None 为按第一帧的长度
+            dtype: 数据类型，None 为按第一帧的类型
         """
-        self.buffer = deque(maxlen=max_size)
         self.max_size = max_size
+        self.frame_size = frame_size
+        self.dtype = dtype
+        self._buf: Optional[np.ndarray] = None
+        self._lengths: deque = deque()
+        self._start = 0   # 最旧样本在环形数组中的位置
+        self._count = 0   # 已缓冲的样本数
     
     def add(self, data: np.ndarray):
-        """添加音频数据到缓冲区"""
-        self.buffer.append(data)
+        """
+        添加音频数据到缓冲区（空帧直接忽略）
+        
+        Raises:
+            TypeError: 数据类型不能无损转换为缓冲区的类型
+        """
+        data = np.asarray(data).ravel()
+        n = data.size
+        if n == 0:
+            return
+        if self.dtype is not None and not np.can_cast(data.dtype, self.dtype, casting='safe'):
+            raise TypeError(f"音频数据类型 {data.dtype} 不能无损转换为缓冲区类型 {np.dtype(self.dtype)}")
+        if self._buf is None:
+            self._allocate(data, n)
+        elif n * self.max_size > self._buf.size:
+            self._grow(n * self.max_size)
+        
+        # 淘汰最旧的帧，直到帧数和空间都足够
+        capacity = self._buf.size
+        lengths = self._lengths
+        while lengths and (len(lengths) >= self.max_size or self._count + n > capacity):
+            old = lengths.popleft()
+            self._start = (self._start + old) % capacity
+            self._count -= old
+        
+        end = (self._start + self._count) % capacity
+        first = min(n, capacity - end)
+        self._buf[end:end + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        lengths.append(n)
+        self._count += n
     
     def get_all(self) -> Optional[np.ndarray]:
         """获取所有缓冲数据并清空"""
-        if not self.buffer:
+        if not self._lengths:
             return None
         
-        data = np.concatenate(list(self.buffer))
-        self.buffer.clear()
+        buf, start, count = self._buf, self._start, self._count
+        if start + count <= buf.size:
+            # 数据没有绕回：直接返回视图，数组交给调用方，下次 add 时再分配新数组
+            data = buf[start:start + count]
+            self._buf = None
+        else:
+            data = np.concatenate((buf[start:], buf[:start + count - buf.size]))
+        self.clear()
         return data
     
     def get_last_n_frames(self, n: int) -> Optional[np.ndarray]:
-        """获取最后n帧数据"""
-        if not self.buffer:
+        """获取最后n帧数据（返回副本）"""
+        if not self._lengths or n <= 0:
             return None
         
-        frames = list(self.buffer)[-n:]
-        if not frames:
-            return None
-        
-        return np.concatenate(frames)
+        lengths = self._lengths
+        if n >= len(lengths):
+            count = self._count
+        else:
+            count = sum(lengths[i] for i in range(len(lengths) - n, len(lengths)))
+        buf = self._buf
+        begin = (self._start + self._count - count) % buf.size
+        if begin + count <= buf.size:
+            return buf[begin:begin + count].copy()
+        return np.concatenate((buf[begin:], buf[:begin + count - buf.size]))
     
     def clear(self):
         """清空缓冲区"""
-        self.buffer.clear()
+        self._lengths.clear()
+        self._start = 0
+        self._count = 0
     
     def __len__(self):
         """返回缓冲区中的帧数"""
-        return len(self.buffer)
+        return len(self._lengths)
     
     @property
     def is_empty(self) -> bool:
         """检查缓冲区是否为空"""
-        return len(self.buffer) == 0
+        return not self._lengths
+    
+    def _allocate(self, data: np.ndarray, n: int):
+        """按第一帧（或构造参数）确定帧长和类型，分配环形数组"""
+        if self.frame_size is None:
+            self.frame_size = n
+        if self.dtype is None:
+            self.dtype = data.dtype
+        self._buf = np.empty(max(self.frame_size, n) * self.max_size, dtype=self.dtype)
+    
+    def _grow(self, capacity: int):
+        """扩容并把已有数据按顺序搬到新数组开头"""
+        old, start, count = self._buf, self._start, self._count
+        new = np.empty(capacity, dtype=old.dtype)
+        first = min(count, old.size - start)
+        new[:first] = old[start:start + first]
+        new[first:count] = old[:count - first]
+        self._buf = new
+        self._start = 0
+
+
+class PCMRing:
+    """
+    保存最近一段 int16 音频的环形缓冲区
+    
+    数组预先分配，写入时原地复制，不为每个音频块分配对象；
+    只应由一个线程写入，读取得到的是按时间顺序的副本。
+    """
+    
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: 最多保存的样本数
+        """
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._written = 0  # 累计写入的样本数
+    
+    @property
+    def capacity(self) -> int:
+        return self._buf.size
+    
+    def write(self, samples: np.ndarray):
+        """写入样本，超出容量时覆盖最旧的数据"""
+        buf = self._buf
+        capacity = buf.size
+        n = samples.size
+        if n >= capacity:
+            samples = samples[-capacity:]
+            n = capacity
+        start = self._written % capacity
+        first = min(n, capacity - start)
+        buf[start:start + first] = samples[:first]
+        buf[:n - first] = samples[first:]
+        self._written += n
+    
+    def recent(self, n: int) -> np.ndarray:
+        """
+        获取最近的 n 个样本（不足时返回全部已写入的样本）
+        
+        Returns:
+            int16 样本数组（副本）
+        """
+        buf = self._buf
+        capacity = buf.size
+        written = self._written
+        n = max(0, min(n, capacity, written))
+        end = written % capacity
+        if n <= end:
+            return buf[end - n:end].copy()
+        return np.concatenate((buf[capacity - (n - end):], buf[:end]))
+
+
+# 支持的音频数据类型：(numpy 类型, 满幅值)
+_AUDIO_DTYPES = {
+    'int16': (np.int16, 32768.0),
+    'int32': (np.int32, 2147483648.0),
+    'float32': (np.float32, 1.0),
+    'float64': (np.float64, 1.0),
+}
+
+
+def _make_converter(from_dtype: str, to_dtype: str):
+    """生成一对类型之间的转换函数：缩放系数与中间精度预先算好，缩放一次完成"""
+    from_type, from_scale = _AUDIO_DTYPES[from_dtype]
+    to_type, to_scale = _AUDIO_DTYPES[to_dtype]
+    scale = to_scale / from_scale
+    # int16 与 float32 之间 float32 足够精确（缩放系数是 2 的幂）；涉及 int32/float64 时用 float64
+    work = np.float64 if {from_dtype, to_dtype} & {'int32', 'float64'} else np.float32
+    
+    if scale == 1.0:
+        def convert(audio_data: np.ndarray) -> np.ndarray:
+            return audio_data.astype(to_type)
+    elif to_dtype.startswith('int') and from_dtype.startswith('float'):
+        # 浮点满幅值（如 1.0）缩放后超出整数范围，先限幅再截断（与 numba 内核一致）
+        info = np.iinfo(to_type)
+        lo, hi = work(info.min), work(info.max)
+        
+        def convert(audio_data: np.ndarray) -> np.ndarray:
+            scaled = np.multiply(audio_data, work(scale), dtype=work)
+            return np.clip(scaled, lo, hi, out=scaled).astype(to_type)
+    elif to_dtype.startswith('int'):
+        def convert(audio_data: np.ndarray) -> np.ndarray:
+            return np.multiply(audio_data, work(scale), dtype=work).astype(to_type)
+    else:
+        def convert(audio_data: np.ndarray) -> np.ndarray:
+            return np.multiply(audio_data, work(scale), dtype=work).astype(to_type, copy=False)
+    return convert
+
+
+def _identity(audio_data: np.ndarray) -> np.ndarray:
+    """源类型与目标类型相同：原样返回"""
+    return audio_data
+
+
+# (源类型, 目标类型) -> 转换函数，导入时生成，调用时只需一次字典查找
+_CONVERTERS = {
+    (src, dst): _identity if src == dst else _make_converter(src, dst)
+    for src in _AUDIO_DTYPES
+    for dst in _AUDIO_DTYPES
+}
+
+
+# int16 -> float32 缩放系数 (1 / 32768)
+PCM16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def _pcm16_to_float32_numpy(src: np.ndarray, dst: np.ndarray) -> None:
+    """NumPy 实现：单次 ufunc 完成转换和缩放"""
+    np.multiply(src, PCM16_SCALE, out=dst, casting='unsafe')
+
+
+if HAS_NUMBA:
+    @njit(fastmath=True, cache=True)
+    def pcm16_to_float32(src: np.ndarray, dst: np.ndarray) -> None:
+        """
+        将一维 int16 PCM 转换为 [-1, 1) 区间的 float32，写入 dst（调用方可复用缓冲区）
+        
+        Args:
+            src: int16 音频样本
+            dst: 输出缓冲区（长度与 src 相同）
+        """
+        scale = np.float32(1.0 / 32768.0)
+        for i in range(src.shape[0]):
+            dst[i] = src[i] * scale
+else:
+    pcm16_to_float32 = _pcm16_to_float32_numpy
+
+
+if HAS_NUMBA:
+    # 最常用的 int16 <-> float32 换成专用内核：单次遍历、不生成中间数组
+    def _i16_to_f32(src: np.ndarray) -> np.ndarray:
+        dst = np.empty(src.shape[0], dtype=np.float32)
+        pcm16_to_float32(src, dst)
+        return dst
+    
+    @njit(fastmath=True, cache=True)
+    def _f32_to_i16_jit(src: np.ndarray) -> np.ndarray:
+        n = src.shape[0]
+        dst = np.empty(n, dtype=np.int16)
+        for i in range(n):
+            v = src[i] * np.float32(32768.0)
+            # 限幅后再截断，避免 1.0 这样的满幅值溢出
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            dst[i] = np.int16(v)
+        return dst
+    
+    def _flat_kernel(kernel, src_type):
+        """把一维内核包装成接受任意形状数组的转换函数"""
+        def convert(audio_data: np.ndarray) -> np.ndarray:
+            x = np.ascontiguousarray(audio_data, dtype=src_type)
+            return kernel(x.ravel()).reshape(x.shape)
+        return convert
+    
+    _CONVERTERS[('int16', 'float32')] = _flat_kernel(_i16_to_f32, np.int16)
+    _CONVERTERS[('float32', 'int16')] = _flat_kernel(_f32_to_i16_jit, np.float32)
 
 
 def convert_audio_format(
@@ -112,29 +478,7 @@ def convert_audio_format(
     Returns:
         转换后的音频数据
     """
-    dtype_map = {
-        'int16': (np.int16, 32768.0),
-        'int32': (np.int32, 2147483648.0),
-        'float32': (np.float32, 1.0),
-        'float64': (np.float64, 1.0),
-    }
-    
-    if from_dtype not in dtype_map or to_dtype not in dtype_map:
+    convert = _CONVERTERS.get((from_dtype, to_dtype))
+    if convert is None:
         raise ValueError(f"Unsupported dtype: {from_dtype} or {to_dtype}")
-    
-    from_type, from_scale = dtype_map[from_dtype]
-    to_type, to_scale = dtype_map[to_dtype]
-    
-    # 转换到 float
-    if from_dtype.startswith('int'):
-        audio_float = audio_data.astype(np.float64) / from_scale
-    else:
-        audio_float = audio_data.astype(np.float64)
-    
-    # 转换到目标类型
-    if to_dtype.startswith('int'):
-        converted = (audio_float * to_scale).astype(to_type)
-    else:
-        converted = audio_float.astype(to_type)
-    
-    return converted
+    return convert(audio_data)
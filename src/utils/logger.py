@@ -1,30 +1,143 @@
 """日志模块"""
+import atexit
+import functools
+import json
 import logging
+import os
+import queue
+import re
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
-from colorama import init, Fore, Style
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# 初始化 colorama
-init(autoreset=True)
+# 尝试导入 orjson（更快的 JSON 序列化），不可用时使用标准库
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+# 只在输出到终端时使用颜色（重定向到文件或管道时不输出转义序列）
+_USE_COLOR = getattr(sys.stdout, 'isatty', lambda: False)()
+
+_RESET = '\x1b[0m'
+
+# SetConsoleMode 标志：让 Windows 控制台解释 ANSI 转义序列
+_ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+
+
+@functools.lru_cache(maxsize=None)
+def _init_windows_console():
+    """
+    为 Windows 控制台开启 ANSI 转义序列支持（第一次创建控制台处理器时执行一次），
+    旧版 Windows 不支持该模式时关闭颜色
+    """
+    global _USE_COLOR
+    if not _enable_virtual_terminal():
+        _USE_COLOR = False
+
+
+def _enable_virtual_terminal() -> bool:
+    """对标准输出所在的控制台设置 ENABLE_VIRTUAL_TERMINAL_PROCESSING，返回是否成功"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.windll.kernel32
+    except (ImportError, AttributeError, OSError):
+        return False
+    
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = wintypes.DWORD()
+    if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        return False
+    if mode.value & _ENABLE_VIRTUAL_TERMINAL_PROCESSING:
+        return True
+    return bool(kernel32.SetConsoleMode(handle, mode.value | _ENABLE_VIRTUAL_TERMINAL_PROCESSING))
 
 
 class ColoredFormatter(logging.Formatter):
     """彩色日志格式化器"""
     
     COLORS = {
-        'DEBUG': Fore.BLUE,
-        'INFO': Fore.GREEN,
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.RED + Style.BRIGHT,
+        'DEBUG': '\x1b[34m',
+        'INFO': '\x1b[32m',
+        'WARNING': '\x1b[33m',
+        'ERROR': '\x1b[31m',
+        'CRITICAL': '\x1b[31m\x1b[1m',
     }
     
     def format(self, record):
         levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[levelname]}{levelname}{Style.RESET_ALL}"
-        return super().format(record)
+        color = self.COLORS.get(levelname) if _USE_COLOR else None
+        if color is None:
+            return super().format(record)
+        record.levelname = f"{color}{levelname}{_RESET}"
+        try:
+            return super().format(record)
+        finally:
+            # 还原 levelname，同一条记录交给文件处理器时不带颜色
+            record.levelname = levelname
+
+
+class JsonFormatter(logging.Formatter):
+    """单行 JSON 日志格式化器（用于日志文件，便于程序解析）"""
+    
+    def format(self, record):
+        entry = {
+            'ts': record.created,
+            # 控制台的彩色格式化器会改写 levelname，这里按级别数值重新取名称
+            'lvl': logging.getLevelName(record.levelno),
+            'name': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        if HAS_ORJSON:
+            return orjson.dumps(entry).decode('utf-8')
+        return json.dumps(entry, ensure_ascii=False)
+
+
+# 日志格式
+_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 格式化器无状态，所有处理器共用，重复调用 setup_logger 时不再新建
+_CONSOLE_FORMATTER = ColoredFormatter(_LOG_FORMAT, _DATE_FORMAT)
+_FILE_FORMATTER = logging.Formatter(_LOG_FORMAT, _DATE_FORMAT)
+_JSON_FORMATTER = JsonFormatter()
+
+# 文件大小，例如 "10MB"、"512 KB"；不带单位时按字节
+_SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(KB|MB|GB)?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {None: 1, 'KB': 1024, 'MB': 1024**2, 'GB': 1024**3}
+_DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+
+
+# async_write 模式下每个日志记录器的后台写入线程（按名称，重新设置时先停止旧的）
+_LISTENERS = {}
+
+
+def _stop_listener(name: str):
+    """停止后台写入线程（会先写完队列中剩余的日志）"""
+    listener = _LISTENERS.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+
+@atexit.register
+def _stop_all_listeners():
+    """退出时写完所有队列中的日志"""
+    for name in list(_LISTENERS):
+        _stop_listener(name)
+
+
+def _parse_size(size: str) -> int:
+    """把 "10MB" 这样的大小解析为字节数，无法解析时返回默认的 10MB"""
+    match = _SIZE_PATTERN.match(str(size))
+    if match is None:
+        return _DEFAULT_MAX_BYTES
+    value, unit = match.groups()
+    return int(float(value) * _SIZE_UNITS[unit.upper() if unit else None])
 
 
 def setup_logger(
@@ -33,7 +146,9 @@ def setup_logger(
     log_file: str = None,
     console: bool = True,
     max_size: str = "10MB",
-    backup_count: int = 3
+    backup_count: int = 3,
+    json_format: bool = False,
+    async_write: bool = False
 ) -> logging.Logger:
     """
     设置日志记录器
@@ -45,39 +160,34 @@ def setup_logger(
         console: 是否输出到控制台
         max_size: 日志文件最大大小
         backup_count: 备份文件数量
+        json_format: 日志文件是否使用单行 JSON 格式
+        async_write: 是否由后台线程格式化和写入日志（调用线程只把记录放入队列，
+            不会被终端或磁盘写入阻塞）
     
     Returns:
         配置好的日志记录器
     """
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper()))
+    level_no = getattr(logging, level.upper())
+    logger.setLevel(level_no)
     
     # 清除已有的处理器
+    _stop_listener(name)
     logger.handlers.clear()
-    
-    # 日志格式
-    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    date_format = '%Y-%m-%d %H:%M:%S'
+    handlers = []
     
     # 控制台处理器
     if console:
+        if _USE_COLOR and os.name == 'nt':
+            _init_windows_console()
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(getattr(logging, level.upper()))
-        console_formatter = ColoredFormatter(log_format, date_format)
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        console_handler.setLevel(level_no)
+        console_handler.setFormatter(_CONSOLE_FORMATTER)
+        handlers.append(console_handler)
     
     # 文件处理器
     if log_file:
-        # 解析文件大小
-        size_map = {'KB': 1024, 'MB': 1024**2, 'GB': 1024**3}
-        max_bytes = 10 * 1024 * 1024  # 默认 10MB
-        
-        for unit, multiplier in size_map.items():
-            if unit in max_size.upper():
-                size_value = float(max_size.upper().replace(unit, ''))
-                max_bytes = int(size_value * multiplier)
-                break
+        max_bytes = _parse_size(max_size)
         
         # 创建日志目录
         log_path = Path(log_file)
@@ -89,14 +199,28 @@ def setup_logger(
             backupCount=backup_count,
             encoding='utf-8'
         )
-        file_handler.setLevel(getattr(logging, level.upper()))
-        file_formatter = logging.Formatter(log_format, date_format)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setLevel(level_no)
+        file_handler.setFormatter(_JSON_FORMATTER if json_format else _FILE_FORMATTER)
+        handlers.append(file_handler)
+    
+    if async_write and handlers:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _LISTENERS[name] = listener
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(level_no)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
 
+# logging.getLogger 每次调用都要加锁查表；Logger 对象本身不会变化
+# （setup_logger 只替换其处理器），因此结果可以直接缓存，无需失效
+@functools.lru_cache(maxsize=128)
 def get_logger(name: str = None) -> logging.Logger:
     """
     获取日志记录器
@@ -0,0 +1,73 @@
+"""流式文本分句"""
+import re
+from typing import List, Optional
+
+# 句子边界：中文句末标点、问号/感叹号、换行，以及后面跟空白的英文句号（避免切开 3.14 这类数字）
+_BOUNDARY = re.compile(r'(?:[。！？!?\n]|\.(?=\s))+\s*')
+
+# 可能构成句子边界的字符；新片段不含这些字符时不可能出现新边界，不必运行正则
+_BOUNDARY_CHARS = frozenset("。！？!?\n.")
+
+# 句子过长时优先在这些位置切分
+_SOFT_BREAKS = "，,；;、 "
+
+
+class SentenceSplitter:
+    """把 LLM 流式输出的 token 拼接成完整的句子，供下游 TTS 逐句合成"""
+    
+    def __init__(self, max_chars: int = 200):
+        """
+        Args:
+            max_chars: 单句最大长度，没有标点的长句到达该长度时强制切分
+        """
+        self.max_chars = max_chars
+        self._buf = ""
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        追加一段文本
+        
+        Args:
+            text: 新收到的文本片段
+        
+        Returns:
+            已完整的句子列表（可能为空）
+        """
+        prev = self._buf
+        buf = prev + text
+        sentences = []
+        
+        # 大多数 token 不含标点：只有新片段里有边界字符，或上一段以 "." 结尾
+        # （新片段可能以空白开头）时才需要查找边界
+        if not _BOUNDARY_CHARS.isdisjoint(text) or prev.endswith('.'):
+            pos = 0
+            for match in _BOUNDARY.finditer(buf):
+                sentence = buf[pos:match.end()].strip()
+                if sentence:
+                    sentences.append(sentence)
+                pos = match.end()
+            buf = buf[pos:]
+        
+        while len(buf) >= self.max_chars:
+            window = buf[:self.max_chars]
+            cut = max(window.rfind(ch) for ch in _SOFT_BREAKS) + 1
+            if cut <= 0:
+                cut = self.max_chars
+            sentence = buf[:cut].strip()
+            if sentence:
+                sentences.append(sentence)
+            buf = buf[cut:]
+        
+        self._buf = buf
+        return sentences
+    
+    def flush(self) -> Optional[str]:
+        """
+        取出缓冲区中剩余的文本（生成结束时调用）
+        
+        Returns:
+            剩余文本，没有时返回 None
+        """
+        rest = self._buf.strip()
+        self._buf = ""
+        return rest or None
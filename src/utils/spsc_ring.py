@@ -0,0 +1,107 @@
+"""单生产者/单消费者无锁环形队列"""
+import threading
+from typing import Any, Optional
+
+
+class SPSCRing:
+    """
+    单生产者/单消费者的定长环形队列（元素可以是除 None 以外的任意对象）
+    
+    head 只由消费者修改、tail 和 discard 只由生产者修改，读写 int 在 GIL 下是原子的，
+    因此收发元素不需要加锁；Event 只用于队列空/满时的阻塞等待。
+    clear() 只记录丢弃位置，由消费者在下次 pop 时跳过并释放这些槽位中的引用，清空为 O(1)；
+    在消费者跳过之前，被丢弃的槽位仍计入容量，生产者不会写入，因此两边不会同时访问同一槽位。
+    """
+    
+    def __init__(self, capacity: int = 64):
+        """
+        Args:
+            capacity: 槽位数，向上取整为 2 的幂
+        """
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._slots: list = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._tail = 0
+        self._discard = 0
+        self._data_event = threading.Event()
+        self._space_event = threading.Event()
+    
+    def __len__(self) -> int:
+        return self._tail - max(self._head, self._discard)
+    
+    def empty(self) -> bool:
+        """队列是否为空"""
+        return len(self) == 0
+    
+    def clear(self):
+        """丢弃当前所有元素（生产者调用）"""
+        self._discard = self._tail
+    
+    def reset(self):
+        """清空队列并立即释放所有槽位（只能在生产者和消费者都没有在使用队列时调用）"""
+        self._slots = [None] * len(self._slots)
+        self._head = self._discard = self._tail
+        self._space_event.set()
+    
+    def push(self, item: Any, timeout: Optional[float] = None) -> bool:
+        """
+        放入一个元素（生产者调用），队列满时阻塞等待
+        
+        Args:
+            item: 元素（不能为 None，None 表示队列为空）
+            timeout: 最长等待时间（秒），None 为一直等待
+        
+        Returns:
+            是否成功放入
+        """
+        tail = self._tail
+        # 按 head 计算占用：被 clear() 丢弃、消费者尚未跳过的槽位不能覆盖
+        while tail - self._head > self._mask:
+            self._space_event.clear()
+            if tail - self._head > self._mask and not self._space_event.wait(timeout):
+                return False
+        self._slots[tail & self._mask] = item
+        self._tail = tail + 1
+        self._data_event.set()
+        return True
+    
+    def pop(self) -> Optional[Any]:
+        """
+        取出一个元素（消费者调用），队列为空时立即返回 None
+        """
+        head = self._head
+        discard = self._discard
+        if head < discard:
+            # 跳过 clear() 丢弃的元素，同时释放其槽位中的引用（生产者在 head 越过之前不会写入这些槽位）
+            slots = self._slots
+            mask = self._mask
+            for i in range(head, discard):
+                slots[i & mask] = None
+            head = discard
+            self._head = head
+            self._space_event.set()
+        if head == self._tail:
+            return None
+        index = head & self._mask
+        item = self._slots[index]
+        self._slots[index] = None
+        self._head = head + 1
+        self._space_event.set()
+        return item
+    
+    def wait_pop(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        取出一个元素，队列为空时最多等待 timeout 秒
+        """
+        item = self.pop()
+        if item is not None:
+            return item
+        self._data_event.clear()
+        # clear 之后再检查一次，避免错过生产者刚刚发出的通知
+        item = self.pop()
+        if item is None and self._data_event.wait(timeout):
+            item = self.pop()
+        return item
@@ -0,0 +1,45 @@
+"""Token 计数"""
+# 尝试导入 tiktoken，不可用时按字符数估算
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    tiktoken = None
+    HAS_TIKTOKEN = False
+
+# 每条消息在对话格式中的额外开销（role、分隔符等）
+MESSAGE_OVERHEAD = 4
+
+_encoding = None
+
+
+def _get_encoding():
+    """加载 BPE 编码（首次使用时可能需要下载，失败时退回字符数估算）"""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+    
+    Args:
+        text: 文本内容
+    
+    Returns:
+        token 数；没有 tiktoken 时按字符数估算（中文约一字一 token，英文偏保守）
+    """
+    encoding = _get_encoding() if HAS_TIKTOKEN else None
+    if encoding is None:
+        return len(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: dict) -> int:
+    """估算单条对话消息的 token 数（含格式开销）"""
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD
@@ -1,5 +1,6 @@
 """音频输入输出测试"""
 import sys
+import threading
 import time
 from pathlib import Path
 
@@ -71,35 +72,46 @@ def test_audio_recording():
         console.print("准备录制 3 秒音频...")
         audio_input = AudioInputHandler(sample_rate=16000, chunk_size=1600)
         
-        # 启动录音
-        audio_input.start()
-        console.print("[green]● 录音中...[/green] (请说话)")
+        # 录制 3 秒：在音频回调中直接写入预分配的缓冲区，不经过队列和轮询
+        buf = bytearray(16000 * 2 * 3)
+        # 回调线程写入、主线程读取的状态：[已写入字节数, 块数, 当前电平, 最大电平]
+        state = [0, 0, 0.0, 0.0]
+        done = threading.Event()
         
-        chunks = []
-        max_level = 0.0
+        def on_audio(chunk: bytes):
+            filled = state[0]
+            n = min(len(chunk), len(buf) - filled)
+            if n <= 0:
+                return
+            buf[filled:filled + n] = memoryview(chunk)[:n]
+            level = audio_input.get_audio_level(chunk)
+            state[3] = max(state[3], level)
+            state[2] = level
+            state[1] += 1
+            state[0] = filled + n
+            if state[0] == len(buf):
+                done.set()
         
-        # 录制 3 秒
-        for i in range(30):  # 3秒，每次100ms
-            chunk = audio_input.read(timeout=0.2)
-            if chunk:
-                chunks.append(chunk)
-                level = audio_input.get_audio_level(chunk)
-                max_level = max(max_level, level)
-                
-                # 显示音频电平
-                bars = int(level * 50)
-                console.print(f"\r音频电平: {'█' * bars}", end="")
-            time.sleep(0.1)
+        # 启动录音
+        audio_input.start(callback=on_audio)
+        console.print("[green]● 录音中...[/green] (请说话)")
         
-        console.print()  # 换行
+        # 主线程只负责显示音频电平（10 次/秒，直接写终端，不经过 rich 排版）
+        deadline = time.monotonic() + 4.0
+        while not done.wait(timeout=0.1) and time.monotonic() < deadline:
+            bars = min(int(state[2] * 50), 50)
+            sys.stdout.write(f"\r音频电平: {'█' * bars:<50}")
+            sys.stdout.flush()
         
         # 停止录音
         audio_input.stop()
+        console.print()  # 换行
+        filled, num_chunks, _, max_level = state
         
         console.print(f"\n[green]✓ 录制完成[/green]")
-        console.print(f"  总块数: {len(chunks)}")
+        console.print(f"  总块数: {num_chunks}")
         console.print(f"  最大电平: {max_level:.3f}")
-        console.print(f"  总时长: ~{len(chunks) * 0.1:.1f}秒")
+        console.print(f"  总时长: ~{filled / (16000 * 2):.1f}秒")
         
         return True
         
@@ -119,6 +131,7 @@ def test_audio_playback():
     
     try:
         from src.audio import AudioOutputHandler
+        import math
         import numpy as np
         
         console.print("生成测试音频...")
@@ -128,11 +141,13 @@ def test_audio_playback():
         duration = 2.0  # 秒
         frequency = 440  # Hz
         
-        t = np.linspace(0, duration, int(sample_rate * duration))
-        audio_data = np.sin(2 * np.pi * frequency * t)
-        
-        # 转换为 int16 格式
-        audio_data = (audio_data * 32767).astype(np.int16)
+        # 正弦波是周期信号：sample_rate / gcd(sample_rate, frequency) 个样本恰好包含整数个周期
+        # （440Hz@16kHz 为 400 个样本、11 个周期），只对这一段计算 sin 并转换为 int16，再平铺
+        num_samples = int(sample_rate * duration)
+        period = sample_rate // math.gcd(sample_rate, frequency)
+        t = np.arange(period) / sample_rate
+        one_period = (np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+        audio_data = np.tile(one_period, -(-num_samples // period))[:num_samples]
         audio_bytes = audio_data.tobytes()
         
         console.print(f"播放 {duration} 秒 {frequency}Hz 正弦波...")
@@ -168,18 +183,22 @@ def test_record_and_playback():
         audio_input.start()
         console.print("[green]● 录音中...[/green] (请说话)")
         
-        chunks = []
-        for i in range(30):
+        # 数据直接写入预分配的缓冲区，回放时不需要再拼接
+        audio_data = bytearray(16000 * 2 * 3)
+        filled = 0
+        deadline = time.monotonic() + 4.0
+        while filled < len(audio_data) and time.monotonic() < deadline:
             chunk = audio_input.read(timeout=0.2)
             if chunk:
-                chunks.append(chunk)
-            time.sleep(0.1)
+                n = min(len(chunk), len(audio_data) - filled)
+                audio_data[filled:filled + n] = memoryview(chunk)[:n]
+                filled += n
         
         audio_input.stop()
         console.print("[green]✓ 录制完成[/green]")
         
-        # 合并所有音频块
-        audio_data = b''.join(chunks)
+        # 去掉未写入的尾部（原地截断，不复制）
+        del audio_data[filled:]
         
         console.print("\n播放录制的音频...")
         audio_output = AudioOutputHandler(sample_rate=16000)
@@ -32,6 +32,32 @@ def test_config_manager():
         unknown = config.get('unknown', 'key', default='默认值')
         print(f"✓ 默认值功能: {unknown}")
         
+        # 读取子树得到的是副本，修改它不影响配置
+        models['deepseek']['model'] = 'changed'
+        assert config.get('models', 'deepseek', 'model') == deepseek_model
+        assert config.get('models', 'deepseek')['model'] == deepseek_model
+        print("✓ 子树返回副本")
+        
+        # set() 之后叶子节点和子树都能读到新值
+        config.set('models', 'deepseek', 'model', value='test-model')
+        assert config.get('models', 'deepseek', 'model') == 'test-model'
+        assert config.get('models', 'deepseek')['model'] == 'test-model'
+        config.set('extra', value={'a': {'b': 1}})
+        assert config.get('extra', 'a', 'b') == 1
+        print("✓ set() 后读取新值")
+        
+        # 空文件/只有注释的配置文件：不报错，get() 返回默认值
+        import os
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            empty_file = os.path.join(tmp, 'empty.yaml')
+            with open(empty_file, 'w', encoding='utf-8') as f:
+                f.write("# 只有注释\n")
+            empty = ConfigManager(empty_file)
+            assert empty.get('asr', 'engine', default='whisper') == 'whisper'
+            assert empty.get_asr_config() == {}
+        print("✓ 空配置文件")
+        
         print("\n✅ 配置管理器测试通过")
         return True
         
@@ -74,10 +100,19 @@ def test_conversation_manager():
         
         print(f"✓ 历史修剪: {len(conv.messages)} 条 (max_history=3)")
         
-        # 清空历史
+        # 清空历史（系统提示词保留）
         conv.clear_history()
         print(f"✓ 清空历史: {len(conv.messages)} 条")
         
+        # max_history=0：请求中只有系统提示词和当前一轮
+        conv = ConversationManager(system_prompt="你是测试助手", max_history=0)
+        conv.add_user_message("问题1")
+        conv.add_assistant_message("回答1")
+        conv.add_user_message("问题2")
+        assert [m["content"] for m in conv.get_messages()] == ["你是测试助手", "问题2"]
+        assert not conv.save_history
+        print("✓ 不保留历史 (max_history=0)")
+        
         print("\n✅ 对话管理器测试通过")
         return True
         
@@ -137,6 +172,12 @@ def test_audio_utils():
         rms = calculate_rms(audio_data)
         print(f"✓ RMS计算: {rms:.4f}")
         
+        # 测试归一化：输出始终为 float32（包括空数组和静音）
+        from src.utils.audio_utils import normalize_audio
+        for data in (np.zeros(4, np.int16), np.array([], np.int16), np.array([100, -100], np.int16)):
+            assert normalize_audio(data).dtype == np.float32
+        print("✓ 归一化输出 float32")
+        
         # 测试音频缓冲
         buffer = AudioBuffer(max_size=10)
         for i in range(5):
@@ -147,6 +188,15 @@ def test_audio_utils():
         print(f"✓ 获取数据: {len(all_data)} 样本")
         print(f"✓ 缓冲清空: {buffer.is_empty}")
         
+        # 测试 int16 环形缓冲区：超出容量后只保留最近的样本，按时间顺序取出
+        from src.utils import PCMRing
+        ring = PCMRing(capacity=5)
+        ring.write(np.arange(3, dtype=np.int16))
+        ring.write(np.arange(3, 7, dtype=np.int16))
+        assert ring.recent(10).tolist() == [2, 3, 4, 5, 6]
+        assert ring.recent(2).tolist() == [5, 6]
+        print(f"✓ 环形缓冲区: {ring.recent(10).tolist()}")
+        
         print("\n✅ 音频工具测试通过")
         return True
         
@@ -195,6 +245,385 @@ def test_llm_framework():
         return False
 
 
+def test_audio_ring():
+    """测试单生产者/单消费者环形队列与缓冲块复用池"""
+    print("\n" + "="*50)
+    print("测试6: 无锁环形队列")
+    print("="*50)
+    
+    try:
+        from src.utils import SPSCRing
+        from src.audio.output_handler import BytesSlabPool
+        
+        # 容量向上取整为 2 的幂，队列满时 push 超时返回 False
+        ring = SPSCRing(capacity=3)
+        for i in range(4):
+            assert ring.push(bytes([i]), timeout=0)
+        assert len(ring) == 4
+        assert not ring.push(b"x", timeout=0.01)
+        print("✓ 容量取整与队满超时")
+        
+        # 反复收发，下标越过槽位数后仍按 FIFO 顺序取出
+        assert ring.pop() == b"\x00"
+        assert ring.pop() == b"\x01"
+        for i in range(4, 10):
+            assert ring.push(bytes([i]), timeout=0)
+            assert ring.pop() == bytes([i - 2])
+        assert [ring.pop(), ring.pop()] == [b"\x08", b"\x09"]
+        assert ring.pop() is None and ring.empty()
+        print("✓ 环绕后先进先出")
+        
+        # clear() 只记录丢弃位置，之前的数据块不再被取出，之后的正常取出
+        ring.push(b"a")
+        ring.push(b"b")
+        ring.clear()
+        assert len(ring) == 0 and ring.pop() is None
+        ring.push(b"c")
+        assert ring.wait_pop(timeout=0) == b"c"
+        assert ring.wait_pop(timeout=0.01) is None
+        
+        # 消费者跳过被丢弃的元素时释放槽位；跳过之前这些槽位仍占用容量，生产者不会覆盖
+        for i in range(4):
+            ring.push(bytes([i]), timeout=0)
+        ring.clear()
+        assert not ring.push(b"x", timeout=0)
+        assert ring.pop() is None
+        assert all(slot is None for slot in ring._slots)
+        assert ring.push(b"x", timeout=0) and ring.pop() == b"x"
+        
+        # reset()：两端都停止时直接清空
+        ring.push(b"y")
+        ring.reset()
+        assert ring.empty() and all(slot is None for slot in ring._slots)
+        print("✓ 清空后丢弃旧数据块并释放槽位")
+        
+        # 归还的缓冲块被再次取出；超过 slab_size 时返回 None；空闲块数量有上限
+        pool = BytesSlabPool(slab_size=16, max_slabs=1)
+        slab = pool.acquire(8)
+        assert len(slab) == 16
+        pool.release(slab)
+        assert pool.acquire(16) is slab
+        assert pool.acquire(17) is None
+        pool.release(bytearray(16))
+        pool.release(bytearray(16))
+        assert len(pool._free) == 1
+        print("✓ 缓冲块复用")
+        
+        print("\n✅ 无锁环形队列测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ 无锁环形队列测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_sentence_splitter():
+    """测试流式分句"""
+    print("\n" + "="*50)
+    print("测试7: 流式分句")
+    print("="*50)
+    
+    try:
+        from src.utils import SentenceSplitter
+        
+        # 中文标点、跨片段的英文句号；数字中的小数点不切分
+        splitter = SentenceSplitter()
+        sentences = []
+        for token in ["你好", "。今天", "天气不错！", "Pi is 3.", "14. It", " is ok"]:
+            sentences.extend(splitter.feed(token))
+        assert sentences == ["你好。", "今天天气不错！", "Pi is 3.14."], sentences
+        assert splitter.flush() == "It is ok"
+        assert splitter.flush() is None
+        print(f"✓ 句子边界: {sentences}")
+        
+        # 没有标点的长句优先在逗号/空格处切分，没有可切位置时按 max_chars 硬切
+        splitter = SentenceSplitter(max_chars=10)
+        assert splitter.feed("一二三四，五六七八九十十一") == ["一二三四，"]
+        assert splitter.feed("二") == []
+        assert splitter.feed("三") == ["五六七八九十十一二三"]
+        assert splitter.flush() is None
+        print("✓ 长句切分")
+        
+        print("\n✅ 流式分句测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ 流式分句测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_response_cache():
+    """测试LLM响应缓存"""
+    print("\n" + "="*50)
+    print("测试8: LLM响应缓存")
+    print("="*50)
+    
+    try:
+        from src.llm.response_cache import ResponseCache, iter_chunks
+        
+        messages = [{"role": "user", "content": "你好"}]
+        key = ResponseCache.make_key("m", messages, 0.0, 100)
+        assert key == ResponseCache.make_key("m", [dict(messages[0])], 0.0, 100)
+        assert key != ResponseCache.make_key("m", messages, 0.1, 100)
+        print("✓ 缓存键只由请求内容决定")
+        
+        # 超出容量时淘汰最久未使用的条目
+        cache = ResponseCache(max_size=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        assert cache.get("a") == "A"
+        cache.put("c", "C")
+        assert cache.get("b") is None
+        assert cache.get("a") == "A" and cache.get("c") == "C"
+        assert len(cache) == 2
+        print("✓ LRU 淘汰")
+        
+        # 已过期的条目视为未命中并被删除
+        cache = ResponseCache(ttl=-1)
+        cache.put("a", "A")
+        assert cache.get("a") is None and len(cache) == 0
+        print("✓ 过期失效")
+        
+        assert "".join(iter_chunks("x" * 45, size=20)) == "x" * 45
+        print("✓ 缓存响应分段输出")
+        
+        print("\n✅ LLM响应缓存测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ LLM响应缓存测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_tts_cache():
+    """测试TTS合成缓存"""
+    print("\n" + "="*50)
+    print("测试9: TTS合成缓存")
+    print("="*50)
+    
+    try:
+        import os
+        import tempfile
+        import time
+        from src.tts.tts_cache import TTSCache
+        
+        # 内存 LRU 按字节数限额
+        cache = TTSCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        assert cache.get("a") == b"12345"
+        cache.put("c", b"123")
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        cache.put("big", b"x" * 11)
+        assert cache.get("big") is None
+        print("✓ 内存 LRU 按字节数淘汰")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            key = TTSCache.make_key("edge", "voice", "+0%", "+0Hz", "你好")
+            cache = TTSCache(cache_dir=tmp, ttl=60)
+            cache.put(key, b"mp3-data")
+            
+            # 新实例（模拟重启）从磁盘命中
+            cache = TTSCache(cache_dir=tmp, ttl=60)
+            assert cache.get(key) == b"mp3-data"
+            print("✓ 磁盘缓存重启后命中")
+            
+            output = os.path.join(tmp, "out.mp3")
+            assert cache.copy_to(key, output)
+            with open(output, 'rb') as f:
+                assert f.read() == b"mp3-data"
+            # 输出文件是独立的副本，修改它不影响缓存
+            with open(output, 'wb') as f:
+                f.write(b"edited")
+            assert TTSCache(cache_dir=tmp, ttl=60).get(key) == b"mp3-data"
+            assert not cache.copy_to("missing", output)
+            print("✓ 缓存文件输出到指定路径")
+            
+            # 磁盘文件按修改时间判断过期
+            path = os.path.join(tmp, f"{key}.mp3")
+            old = time.time() - 120
+            os.utime(path, (old, old))
+            cache = TTSCache(cache_dir=tmp, ttl=60)
+            assert cache.get(key) is None
+            assert not os.path.exists(path)
+            print("✓ 磁盘缓存过期删除")
+        
+        print("\n✅ TTS合成缓存测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ TTS合成缓存测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_conversation_history_file():
+    """测试对话历史文件（JSON Lines）"""
+    print("\n" + "="*50)
+    print("测试10: 对话历史文件")
+    print("="*50)
+    
+    try:
+        import json
+        import tempfile
+        from src.core import ConversationManager
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            history_file = Path(tmp) / "history.jsonl"
+            
+            # 加载：系统提示词以当前配置为准，跳过写了一半的行，只保留最近 max_history 轮
+            lines = [json.dumps({"system_prompt": "旧提示词"}, ensure_ascii=False)]
+            for i in range(3):
+                lines.append(json.dumps({"role": "user", "content": f"问题{i}"}, ensure_ascii=False))
+                lines.append(json.dumps({"role": "assistant", "content": f"回答{i}"}, ensure_ascii=False))
+            lines.append('{"role": "user", "con')
+            history_file.write_text("\n".join(lines), encoding='utf-8')
+            
+            conv = ConversationManager(
+                system_prompt="测试提示词",
+                max_history=2,
+                history_file=str(history_file)
+            )
+            assert conv.messages[0] == {"role": "system", "content": "测试提示词"}
+            assert [m["content"] for m in conv.messages[1:]] == ["问题1", "回答1", "问题2", "回答2"]
+            print(f"✓ 加载历史: {len(conv.messages)} 条")
+            
+            # 追加：启动后第一次写入时重写文件，之后逐行追加
+            conv.add_user_message("问题3")
+            conv.add_assistant_message("回答3")
+            conv.flush()
+            records = [json.loads(line) for line in history_file.read_text(encoding='utf-8').splitlines()]
+            assert records[0] == {"system_prompt": "测试提示词"}
+            assert [r["content"] for r in records[-4:]] == ["问题2", "回答2", "问题3", "回答3"]
+            print("✓ 追加写入")
+            
+            # 压缩：文件行数超过 max_history * 8 时按内存中的历史重写
+            for i in range(4, 20):
+                conv.add_user_message(f"问题{i}")
+                conv.add_assistant_message(f"回答{i}")
+            conv.close()
+            records = history_file.read_text(encoding='utf-8').splitlines()
+            assert len(records) <= conv.max_history * 8 + 1, len(records)
+            print(f"✓ 历史文件压缩: {len(records)} 行")
+            
+            conv = ConversationManager(max_history=2, history_file=str(history_file))
+            assert [m["content"] for m in conv.messages[1:]] == ["问题18", "回答18", "问题19", "回答19"]
+            conv.close()
+            print("✓ 压缩后重新加载")
+            
+            # 第一次重写失败（如暂时的磁盘错误）后，之后的追加仍能写入
+            history_file = Path(tmp) / "retry.jsonl"
+            conv = ConversationManager(max_history=2, history_file=str(history_file))
+            rewrite = conv._rewrite_history
+            failures = []
+            
+            def failing_rewrite(system_prompt, messages):
+                if not failures:
+                    failures.append(True)
+                    rewrite(system_prompt, messages)
+                    conv._close_file()
+                    raise OSError("模拟磁盘错误")
+                rewrite(system_prompt, messages)
+            
+            conv._rewrite_history = failing_rewrite
+            conv.add_user_message("问题A")
+            conv.add_assistant_message("回答A")
+            conv.close()
+            records = [json.loads(line) for line in history_file.read_text(encoding='utf-8').splitlines()]
+            assert [r["content"] for r in records[1:]] == ["问题A", "回答A"], records
+            print("✓ 重写失败后恢复写入")
+        
+        print("\n✅ 对话历史文件测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ 对话历史文件测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_vad_detector():
+    """测试VAD状态机（用桩函数代替 webrtcvad 判定）"""
+    print("\n" + "="*50)
+    print("测试11: VAD检测器")
+    print("="*50)
+    
+    try:
+        import numpy as np
+        from src.audio import VADDetector
+        
+        # 30ms 帧 = 480 样本；前后填充和静音等待都是 3 帧
+        vad = VADDetector(
+            sample_rate=16000,
+            frame_duration_ms=30,
+            padding_duration_ms=90,
+            silence_duration_ms=90,
+            min_segment_ms=200,
+            min_segment_rms=0.01
+        )
+        # 桩函数：帧的第一个样本非零即为语音
+        vad._is_speech_fn = lambda frame, sample_rate: frame[0] != 0 or frame[1] != 0
+        
+        def frames(value: int, count: int) -> bytes:
+            return np.full(480 * count, value, dtype=np.int16).tobytes()
+        
+        def window_voiced() -> int:
+            return sum(is_speech for _, is_speech in vad.ring_buffer)
+        
+        # 不足一帧的数据留到下次
+        silence = frames(0, 3)
+        is_speech, utterances = vad.process_frames(silence[:2 * 960 + 480])
+        assert len(vad._pending) == 480 and len(vad.ring_buffer) == 2
+        is_speech, utterances = vad.process_frames(silence[2 * 960 + 480:])
+        assert not vad._pending and len(vad.ring_buffer) == 3
+        assert not is_speech and utterances == []
+        print("✓ 不足一帧的数据保留到下次")
+        
+        # 滑动窗口内的语音帧计数与窗口内容一致；语音帧超过一半时触发
+        vad.process_frames(frames(8000, 1))
+        assert vad.voiced_count == window_voiced() == 1 and not vad.triggered
+        is_speech, _ = vad.process_frames(frames(8000, 1))
+        assert is_speech and vad.triggered and vad.voiced_count == 0
+        assert vad.utterance_bytes == 3 * 960
+        print("✓ 语音开始检测")
+        
+        # 连续静音达到 silence_duration 时结束，返回包含前后填充的完整语音段
+        is_speech, utterances = vad.process_frames(frames(8000, 10) + frames(0, 3))
+        assert not is_speech and len(utterances) == 1
+        assert len(utterances[0]) == (3 + 10 + 3) * 960
+        assert not vad.is_negligible(utterances[0])
+        print(f"✓ 语音结束检测: {len(utterances[0]) // 960} 帧")
+        
+        # 触发后窗口被清空，计数重新开始
+        vad.process_frames(frames(0, 2) + frames(8000, 1))
+        assert vad.voiced_count == window_voiced() == 1
+        vad.reset()
+        
+        # 过短或能量过低的语音段视为误触发
+        assert vad.is_negligible(frames(8000, 6))      # 180ms < 200ms
+        assert vad.is_negligible(frames(100, 10))      # RMS ≈ 0.003 < 0.01
+        assert not vad.is_negligible(frames(8000, 10))
+        print("✓ 误触发过滤")
+        
+        print("\n✅ VAD检测器测试通过")
+        return True
+        
+    except Exception as e:
+        print(f"\n❌ VAD检测器测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def main():
     """运行所有测试"""
     print("\n" + "="*60)
@@ -207,6 +636,12 @@ def main():
         '日志系统': test_logger(),
         '音频工具': test_audio_utils(),
         'LLM框架': test_llm_framework(),
+        '无锁环形队列': test_audio_ring(),
+        '流式分句': test_sentence_splitter(),
+        'LLM响应缓存': test_response_cache(),
+        'TTS合成缓存': test_tts_cache(),
+        '对话历史文件': test_conversation_history_file(),
+        'VAD检测器': test_vad_detector(),
     }
     
     # 总结
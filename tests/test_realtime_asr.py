@@ -1,10 +1,8 @@
 """实时流语音转文字测试"""
+import importlib.util
 import sys
 import time
-import threading
-import queue
 from pathlib import Path
-from collections import deque
 from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
@@ -14,142 +12,51 @@ from rich.text import Text
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.core import ConfigManager
-from src.asr import ASRManager
-from src.audio import VADDetector
-from src.utils import setup_logger, get_logger, calculate_rms
+from src.asr import ASRManager, RealtimeASR
+from src.utils import setup_logger, get_logger
 
-# 尝试导入音频输入
-try:
-    from src.audio import AudioInputHandler
-    HAS_AUDIO_INPUT = True
-except ImportError:
-    AudioInputHandler = None
-    HAS_AUDIO_INPUT = False
+# 音频输入需要 pyaudio；这里只检查是否安装，真正用到时才导入
+HAS_AUDIO_INPUT = importlib.util.find_spec('pyaudio') is not None
 
-# 设置日志
-setup_logger(level='INFO', console=True)
+# 状态面板显示最近几条结果
+RECENT_RESULTS = 5
+
+# 设置日志（后台线程写日志，识别线程不会被终端输出阻塞）
+setup_logger(level='INFO', console=True, async_write=True)
 logger = get_logger("realtime_asr")
 console = Console()
 
 
-class RealtimeASR:
-    """实时语音识别"""
-    
-    def __init__(self, asr_manager: ASRManager, sample_rate: int = 16000):
-        """
-        初始化实时 ASR
-        
-        Args:
-            asr_manager: ASR 管理器
-            sample_rate: 采样率
-        """
-        self.asr_manager = asr_manager
-        self.sample_rate = sample_rate
-        
-        # 音频缓冲
-        self.audio_buffer = deque(maxlen=100)  # 保留最近 100 个块
-        self.is_running = False
-        
-        # VAD 检测器
-        self.vad = VADDetector(
-            sample_rate=sample_rate,
-            aggressiveness=2,  # 降低激进度，避免截断语音（从3改为2）
-            frame_duration_ms=30,
-            silence_duration_ms=800,  # 增加静音等待时间，避免句子被截断
-            padding_duration_ms=400  # 增加前后填充，保留完整语音
-        )
-        
-        # 识别队列
-        self.recognition_queue = queue.Queue()
-        self.recognition_thread = None
-        
-        # 结果存储
-        self.results = []
-        self.current_audio_level = 0.0
-        self.is_speech_active = False
+class RealtimeASRDisplay(RealtimeASR):
+    """在实时识别流水线上增加状态面板的显示内容"""
     
-    def start(self):
-        """开始实时识别"""
-        self.is_running = True
-        
-        # 启动识别线程
-        self.recognition_thread = threading.Thread(target=self._recognition_worker)
-        self.recognition_thread.daemon = True
-        self.recognition_thread.start()
-        
-        logger.info("实时 ASR 已启动")
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 最近结果部分的显示文本，只在有新结果时重建
+        self._recent_results_text = self._build_recent_results_text()
     
-    def stop(self):
-        """停止实时识别"""
-        self.is_running = False
-        
-        if self.recognition_thread:
-            self.recognition_thread.join(timeout=2.0)
-        
-        logger.info("实时 ASR 已停止")
+    def _on_result(self, result: dict):
+        self._recent_results_text = self._build_recent_results_text()
     
-    def process_audio_chunk(self, audio_chunk: bytes):
-        """
-        处理音频块
-        
-        Args:
-            audio_chunk: 音频数据块
-        """
-        if not self.is_running:
-            return
-        
-        # 添加到缓冲区
-        self.audio_buffer.append(audio_chunk)
-        
-        # 计算音频电平
-        import numpy as np
-        audio_np = np.frombuffer(audio_chunk, dtype=np.int16)
-        self.current_audio_level = calculate_rms(audio_np)
-        
-        # VAD 检测
-        is_speech, complete_audio = self.vad.process_frame(audio_chunk)
-        self.is_speech_active = is_speech
-        
-        # 如果检测到完整语音段落，加入识别队列
-        if complete_audio is not None:
-            logger.debug("检测到完整语音段落，加入识别队列")
-            self.recognition_queue.put(complete_audio)
-    
-    def _recognition_worker(self):
-        """识别工作线程"""
-        while self.is_running:
-            try:
-                # 从队列获取音频
-                audio_data = self.recognition_queue.get(timeout=0.1)
-                
-                # 执行识别
-                logger.debug("开始识别...")
-                start_time = time.time()
-                text = self.asr_manager.transcribe(audio_data)
-                elapsed = time.time() - start_time
-                
-                if text and text.strip():
-                    result = {
-                        'text': text.strip(),
-                        'timestamp': time.strftime('%H:%M:%S'),
-                        'elapsed': elapsed
-                    }
-                    self.results.append(result)
-                    logger.info(f"识别结果: {text} (耗时: {elapsed:.2f}s)")
-                else:
-                    logger.debug("未识别到内容")
-                    
-            except queue.Empty:
-                continue
-            except Exception as e:
-                logger.error(f"识别错误: {e}")
+    def _build_recent_results_text(self) -> Text:
+        """生成最近识别结果部分的显示文本"""
+        text = Text()
+        text.append("最近识别结果:\n", style="bold cyan")
+        if self.results:
+            for i in range(max(0, len(self.results) - RECENT_RESULTS), len(self.results)):
+                result = self.results[i]
+                text.append(f"[{result['timestamp']}] ", style="dim")
+                text.append(f"{result['text']}\n", style="white")
+        else:
+            text.append("(暂无结果)\n", style="dim")
+        return text
     
     def get_status_text(self) -> Text:
         """获取状态文本"""
         status = Text()
         
         # 音频电平
-        level_bars = int(self.current_audio_level * 50)
+        level_bars = self.level_bars
         level_color = "green" if self.is_speech_active else "dim"
         status.append("音频电平: ", style="bold")
         status.append("█" * level_bars, style=level_color)
@@ -163,18 +70,18 @@ class RealtimeASR:
             status.append("○ 静音", style="dim")
         status.append("\n\n")
         
+        # 中间结果
+        interim_text = self.interim_text
+        if interim_text:
+            status.append("识别中: ", style="bold")
+            status.append(f"{interim_text}\n\n", style="dim italic")
+        
         # 待识别队列
-        queue_size = self.recognition_queue.qsize()
+        queue_size = len(self.recognition_queue)
         status.append(f"待识别队列: {queue_size}\n\n", style="bold")
         
-        # 最近的识别结果
-        status.append("最近识别结果:\n", style="bold cyan")
-        if self.results:
-            for result in self.results[-5:]:  # 显示最近 5 条
-                status.append(f"[{result['timestamp']}] ", style="dim")
-                status.append(f"{result['text']}\n", style="white")
-        else:
-            status.append("(暂无结果)\n", style="dim")
+        # 最近的识别结果（使用缓存的文本）
+        status.append_text(self._recent_results_text)
         
         return status
 
@@ -203,6 +110,7 @@ def test_realtime_recognition():
     # 2. 初始化音频输入
     console.print("\n[2/4] 初始化音频输入...")
     try:
+        from src.audio import AudioInputHandler
         audio_input = AudioInputHandler(
             sample_rate=16000,
             channels=1,
@@ -221,7 +129,13 @@ def test_realtime_recognition():
     
     # 3. 创建实时 ASR
     console.print("\n[3/4] 创建实时 ASR 实例...")
-    realtime_asr = RealtimeASR(asr_manager, sample_rate=16000)
+    vad_config = config_manager.get('audio', 'vad', default={})
+    realtime_asr = RealtimeASRDisplay(
+        asr_manager,
+        sample_rate=16000,
+        min_segment_ms=vad_config.get('min_segment_ms', 200),
+        min_segment_rms=vad_config.get('min_segment_rms', 0.005)
+    )
     console.print("[green]✓[/green] 实时 ASR 已创建")
     
     # 4. 开始录音和识别
@@ -243,15 +157,20 @@ def test_realtime_recognition():
         audio_input.start(callback=audio_callback)
         
         # 实时显示状态
-        with Live(console=console, refresh_per_second=4) as live:
+        # 实时显示状态：等待状态变化再重绘，静音无变化时不做任何工作
+        state_dirty = realtime_asr.state_dirty
+        with Live(console=console, auto_refresh=False) as live:
             while True:
                 status_panel = Panel(
                     realtime_asr.get_status_text(),
                     title="[bold]实时语音识别状态[/bold]",
                     border_style="cyan"
                 )
-                live.update(status_panel)
-                time.sleep(0.25)
+                live.update(status_panel, refresh=True)
+                # 超时只用于及时响应 Ctrl+C；短暂休眠把密集的电平变化合并为一次重绘（最多约 20 次/秒）
+                state_dirty.wait(timeout=1.0)
+                time.sleep(0.05)
+                state_dirty.clear()
                 
     except KeyboardInterrupt:
         console.print("\n\n[yellow]检测到中断，正在停止...[/yellow]")
@@ -267,13 +186,27 @@ def test_realtime_recognition():
         console.print("\n" + "=" * 50)
         console.print(f"[bold]识别总结[/bold]")
         console.print("=" * 50)
-        console.print(f"总共识别: {len(realtime_asr.results)} 段")
+        console.print(f"总共识别: {realtime_asr.total_results} 段")
+        if realtime_asr.skipped_segments:
+            console.print(f"忽略误触发: {realtime_asr.skipped_segments} 段")
         
         if realtime_asr.results:
             console.print("\n[bold cyan]完整识别结果:[/bold cyan]")
-            for i, result in enumerate(realtime_asr.results, 1):
+            if realtime_asr.total_results > len(realtime_asr.results):
+                console.print(f"[dim](只保留最近 {len(realtime_asr.results)} 段)[/dim]")
+            first = realtime_asr.total_results - len(realtime_asr.results) + 1
+            for i, result in enumerate(realtime_asr.results, first):
                 console.print(f"{i}. [{result['timestamp']}] {result['text']}")
                 console.print(f"   (耗时: {result['elapsed']:.2f}秒)")
+        
+        latency_stats = realtime_asr.get_latency_stats()
+        if latency_stats:
+            console.print("\n[bold cyan]延迟统计 (毫秒):[/bold cyan]")
+            for name, s in latency_stats.items():
+                console.print(
+                    f"  {name}: avg {s['avg']:.1f}  p50 {s['p50']:.1f}  p90 {s['p90']:.1f}  "
+                    f"p95 {s['p95']:.1f}  p99 {s['p99']:.1f}"
+                )
 
 
 def main():
@@ -1,6 +1,8 @@
 """TTS语音合成测试"""
+import io
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 添加项目根目录到路径
@@ -45,141 +47,213 @@ def test_tts_manager():
         return None
 
 
-def test_edge_tts_basic(tts_manager):
+def test_edge_tts_basic(tts_manager, out: Console = console):
     """测试Edge TTS基本合成"""
-    console.print("\n[bold cyan]测试 2: Edge TTS 基本合成[/bold cyan]\n")
+    out.print("\n[bold cyan]测试 2: Edge TTS 基本合成[/bold cyan]\n")
     
     if not tts_manager:
-        console.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
+        out.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
         return False
     
     try:
         test_text = "你好，我是语音合成测试。"
         
-        console.print(f"合成文本: {test_text}")
-        console.print("正在合成...")
+        out.print(f"合成文本: {test_text}")
+        out.print("正在合成...")
         
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
-            console=console
+            console=out
         ) as progress:
             task = progress.add_task("合成中...", total=None)
             
-            start_time = time.time()
+            start_time = time.perf_counter()
             audio_data = tts_manager.synthesize(test_text)
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             
             progress.remove_task(task)
         
         if audio_data:
-            console.print(f"[green]✓ 合成成功[/green]")
-            console.print(f"  音频大小: {len(audio_data)} 字节")
-            console.print(f"  耗时: {elapsed:.2f} 秒")
+            out.print(f"[green]✓ 合成成功[/green]")
+            out.print(f"  音频大小: {len(audio_data)} 字节")
+            out.print(f"  耗时: {elapsed:.2f} 秒")
             return True
         else:
-            console.print("[red]✗ 合成失败（返回None）[/red]")
+            out.print("[red]✗ 合成失败（返回None）[/red]")
             return False
             
     except Exception as e:
-        console.print(f"[red]✗ 合成失败: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        out.print(f"[red]✗ 合成失败: {e}[/red]")
+        out.print_exception()
         return False
 
 
-def test_edge_tts_stream(tts_manager):
+def test_edge_tts_stream(tts_manager, out: Console = console):
     """测试Edge TTS流式合成"""
-    console.print("\n[bold cyan]测试 3: Edge TTS 流式合成[/bold cyan]\n")
+    out.print("\n[bold cyan]测试 3: Edge TTS 流式合成[/bold cyan]\n")
     
     if not tts_manager:
-        console.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
+        out.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
         return False
     
     try:
         test_text = "这是一个流式语音合成测试，我会逐块返回音频数据。"
         
-        console.print(f"合成文本: {test_text}")
-        console.print("正在流式合成...")
+        out.print(f"合成文本: {test_text}")
+        out.print("正在流式合成...")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         chunk_count = 0
         total_size = 0
         
         for chunk in tts_manager.synthesize_stream(test_text):
             chunk_count += 1
             total_size += len(chunk)
-            console.print(f"  收到音频块 {chunk_count}: {len(chunk)} 字节")
+            out.print(f"  收到音频块 {chunk_count}: {len(chunk)} 字节")
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         
         if chunk_count > 0:
-            console.print(f"\n[green]✓ 流式合成成功[/green]")
-            console.print(f"  总音频块数: {chunk_count}")
-            console.print(f"  总大小: {total_size} 字节")
-            console.print(f"  耗时: {elapsed:.2f} 秒")
+            out.print(f"\n[green]✓ 流式合成成功[/green]")
+            out.print(f"  总音频块数: {chunk_count}")
+            out.print(f"  总大小: {total_size} 字节")
+            out.print(f"  耗时: {elapsed:.2f} 秒")
             return True
         else:
-            console.print("[red]✗ 流式合成失败（无数据）[/red]")
+            out.print("[red]✗ 流式合成失败（无数据）[/red]")
             return False
             
     except Exception as e:
-        console.print(f"[red]✗ 流式合成失败: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        out.print(f"[red]✗ 流式合成失败: {e}[/red]")
+        out.print_exception()
         return False
 
 
-def test_edge_tts_save_file(tts_manager):
+def test_edge_tts_save_file(tts_manager, out: Console = console):
     """测试Edge TTS保存到文件"""
-    console.print("\n[bold cyan]测试 4: Edge TTS 保存到文件[/bold cyan]\n")
+    out.print("\n[bold cyan]测试 4: Edge TTS 保存到文件[/bold cyan]\n")
     
     if not tts_manager:
-        console.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
+        out.print("[yellow]跳过测试（TTS管理器未初始化）[/yellow]")
         return False
     
     try:
         test_text = "测试保存到文件功能。"
         output_file = "test_output.mp3"
         
-        console.print(f"合成文本: {test_text}")
-        console.print(f"输出文件: {output_file}")
-        console.print("正在合成...")
+        out.print(f"合成文本: {test_text}")
+        out.print(f"输出文件: {output_file}")
+        out.print("正在合成...")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         success = tts_manager.synthesize_to_file(test_text, output_file)
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         
         if success:
             import os
             if os.path.exists(output_file):
                 file_size = os.path.getsize(output_file)
-                console.print(f"[green]✓ 保存成功[/green]")
-                console.print(f"  文件大小: {file_size} 字节")
-                console.print(f"  耗时: {elapsed:.2f} 秒")
+                out.print(f"[green]✓ 保存成功[/green]")
+                out.print(f"  文件大小: {file_size} 字节")
+                out.print(f"  耗时: {elapsed:.2f} 秒")
                 
                 # 清理测试文件
                 try:
                     os.remove(output_file)
-                    console.print(f"  已清理测试文件: {output_file}")
+                    out.print(f"  已清理测试文件: {output_file}")
                 except:
                     pass
                 
                 return True
             else:
-                console.print("[red]✗ 文件未创建[/red]")
+                out.print("[red]✗ 文件未创建[/red]")
                 return False
         else:
-            console.print("[red]✗ 保存失败[/red]")
+            out.print("[red]✗ 保存失败[/red]")
             return False
             
     except Exception as e:
-        console.print(f"[red]✗ 保存失败: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        out.print(f"[red]✗ 保存失败: {e}[/red]")
+        out.print_exception()
         return False
 
 
+def _play_mp3_stream(ffmpeg_path: str, mp3_chunks, sample_rate: int = 24000) -> dict:
+    """
+    边合成边播放：MP3 数据块写入 ffmpeg 的标准输入，解码出的 PCM 直接交给播放器
+    
+    Args:
+        ffmpeg_path: ffmpeg 可执行文件路径
+        mp3_chunks: MP3 数据块迭代器（例如 synthesize_stream 的返回值）
+        sample_rate: 输出采样率（Edge TTS 为 24kHz，相同时 ffmpeg 不需要重采样）
+    
+    Returns:
+        统计信息：first_audio（开始到首个 PCM 块的秒数）、pcm_bytes
+    """
+    import subprocess
+    import threading
+    from src.audio import AudioOutputHandler
+    
+    proc = subprocess.Popen(
+        [ffmpeg_path, '-loglevel', 'error', '-i', 'pipe:0',
+         '-f', 's16le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE
+    )
+    
+    errors = []
+    
+    def feed():
+        """写入线程：收到一块 MP3 就交给 ffmpeg"""
+        try:
+            for chunk in mp3_chunks:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            # 合成失败：关闭 stdin 让解码和播放结束，错误交给调用方
+            errors.append(e)
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+    
+    start_time = time.perf_counter()
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    
+    audio_output = AudioOutputHandler(sample_rate=sample_rate)
+    audio_output.start()
+    first_audio = None
+    pcm_bytes = 0
+    try:
+        while True:
+            pcm = proc.stdout.read1(4096)
+            if not pcm:
+                break
+            if first_audio is None:
+                first_audio = time.perf_counter() - start_time
+            # 播放队列满时 play 会阻塞，自然形成背压
+            audio_output.play(pcm)
+            pcm_bytes += len(pcm)
+        writer.join()
+        proc.wait()
+        # 等待剩余音频播放完（最多音频时长再加 1 秒）
+        audio_output.wait_drained(timeout=pcm_bytes / (sample_rate * 2) + 1.0)
+    finally:
+        audio_output.stop()
+        if proc.poll() is None:
+            proc.kill()
+    
+    if errors:
+        raise errors[0]
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg 解码失败 (退出码 {proc.returncode})")
+    return {'first_audio': first_audio, 'pcm_bytes': pcm_bytes}
+
+
 def test_tts_with_playback(tts_manager):
     """测试TTS合成并播放"""
     console.print("\n[bold cyan]测试 5: TTS 合成并播放[/bold cyan]\n")
@@ -189,19 +263,13 @@ def test_tts_with_playback(tts_manager):
         return None  # 返回 None 表示跳过
     
     try:
-        from src.audio import AudioOutputHandler
-        import io
+        from src.audio import output_handler
         import shutil
         
-        # 尝试导入音频处理库
-        try:
-            from pydub import AudioSegment
-            from pydub.playback import play
-            HAS_PYDUB = True
-        except ImportError:
-            HAS_PYDUB = False
-            console.print("[yellow]未安装 pydub，跳过播放测试[/yellow]")
-            console.print("[yellow]安装: pip install pydub[/yellow]")
+        # 播放需要 pyaudio（只检查是否安装，开始播放时才导入）
+        if not output_handler.HAS_PYAUDIO:
+            console.print("[yellow]未安装 pyaudio，跳过播放测试[/yellow]")
+            console.print("[yellow]安装: pip install pyaudio[/yellow]")
             return None  # 返回 None 表示跳过
         
         # 检查 ffmpeg 是否可用
@@ -227,29 +295,25 @@ def test_tts_with_playback(tts_manager):
         test_text = "你好，这是语音合成播放测试。"
         
         console.print(f"合成文本: {test_text}")
-        console.print("正在合成...")
+        console.print("正在流式合成并播放...")
         
-        audio_data = tts_manager.synthesize(test_text)
+        # 合成、解码、播放流水线进行：收到第一块音频就开始出声
+        try:
+            stats = _play_mp3_stream(ffmpeg_path, tts_manager.synthesize_stream(test_text))
+        except Exception as e:
+            console.print(f"[yellow]播放失败: {e}[/yellow]")
+            console.print("[yellow]提示: 可能需要安装或配置 ffmpeg[/yellow]")
+            console.print("[yellow]Windows 安装方法:[/yellow]")
+            console.print("[yellow]  1. 下载: https://ffmpeg.org/download.html[/yellow]")
+            console.print("[yellow]  2. 解压并添加到系统 PATH 环境变量[/yellow]")
+            console.print("[yellow]  3. 或使用: choco install ffmpeg (需要 Chocolatey)[/yellow]")
+            console.print("[yellow]  4. 或使用: winget install ffmpeg[/yellow]")
+            return None  # 返回 None 表示跳过（不是失败）
         
-        if audio_data:
-            console.print(f"[green]✓ 合成成功[/green] ({len(audio_data)} 字节)")
-            console.print("正在播放...")
-            
-            # 播放音频
-            try:
-                audio_segment = AudioSegment.from_mp3(io.BytesIO(audio_data))
-                play(audio_segment)
-                console.print("[green]✓ 播放完成[/green]")
-                return True
-            except Exception as e:
-                console.print(f"[yellow]播放失败: {e}[/yellow]")
-                console.print("[yellow]提示: 可能需要安装或配置 ffmpeg[/yellow]")
-                console.print("[yellow]Windows 安装方法:[/yellow]")
-                console.print("[yellow]  1. 下载: https://ffmpeg.org/download.html[/yellow]")
-                console.print("[yellow]  2. 解压并添加到系统 PATH 环境变量[/yellow]")
-                console.print("[yellow]  3. 或使用: choco install ffmpeg (需要 Chocolatey)[/yellow]")
-                console.print("[yellow]  4. 或使用: winget install ffmpeg[/yellow]")
-                return None  # 返回 None 表示跳过（不是失败）
+        if stats['pcm_bytes']:
+            console.print(f"[green]✓ 播放完成[/green] ({stats['pcm_bytes']} 字节 PCM)")
+            console.print(f"  首个音频块延迟: {stats['first_audio']:.2f} 秒")
+            return True
         else:
             console.print("[red]✗ 合成失败[/red]")
             return False
@@ -261,6 +325,51 @@ def test_tts_with_playback(tts_manager):
         return False
 
 
+def _run_network_tests(tts_manager) -> list:
+    """
+    并发运行相互独立的 Edge TTS 网络测试（基本合成、流式合成、保存文件）
+    
+    每个测试的输出先写入各自的缓冲区，全部完成后按固定顺序打印，避免输出交错。
+    
+    Returns:
+        [(测试名称, 结果), ...]，顺序与串行运行时相同
+    """
+    network_tests = [
+        ("基本合成", test_edge_tts_basic),
+        ("流式合成", test_edge_tts_stream),
+        ("保存文件", test_edge_tts_save_file),
+    ]
+    
+    def run(test):
+        name, test_func = test
+        buffer = io.StringIO()
+        out = Console(
+            file=buffer,
+            force_terminal=console.is_terminal,
+            color_system=console.color_system,
+            width=console.width
+        )
+        try:
+            result = test_func(tts_manager, out)
+        except Exception as e:
+            out.print(f"[red]✗ 测试出错: {e}[/red]")
+            result = False
+        return name, result, buffer.getvalue()
+    
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(network_tests)) as executor:
+        outcomes = list(executor.map(run, network_tests))
+    elapsed = time.perf_counter() - start_time
+    
+    results = []
+    for name, result, output in outcomes:
+        console.file.write(output)
+        results.append((name, result))
+    console.file.flush()
+    console.print(f"\n[dim]网络测试并发耗时: {elapsed:.2f} 秒[/dim]")
+    return results
+
+
 def main():
     """主函数"""
     console.print(Panel.fit(
@@ -277,17 +386,8 @@ def main():
     tests.append(("TTS管理器初始化", tts_manager is not None))
     
     if tts_manager:
-        # 2. 基本合成测试
-        result = test_edge_tts_basic(tts_manager)
-        tests.append(("基本合成", result))
-        
-        # 3. 流式合成测试
-        result = test_edge_tts_stream(tts_manager)
-        tests.append(("流式合成", result))
-        
-        # 4. 保存文件测试
-        result = test_edge_tts_save_file(tts_manager)
-        tests.append(("保存文件", result))
+        # 2-4. 基本合成、流式合成、保存文件测试（相互独立，并发运行）
+        tests.extend(_run_network_tests(tts_manager))
         
         # 5. 合成并播放测试
         result = test_tts_with_playback(tts_manager)